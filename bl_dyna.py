@@ -1,11 +1,21 @@
 import numpy as np
 import pandas as pd
-import pathlib, copy, math, time, os, importlib, datetime, shutil, re, psutil
+import pathlib, copy, math, time, os, importlib, datetime, shutil, re, psutil, gzip, sys
+import threading, tempfile, contextlib, functools, pickle, hashlib, json, collections, socket
+import secrets, hmac, filecmp, weakref
 from types import MappingProxyType
 from collections import defaultdict
-from itertools import groupby
+from itertools import groupby, chain, repeat
 from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures import wait, FIRST_COMPLETED
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, Client, AuthenticationError
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 EntityCls_CardFields = {
     **{
@@ -64,6 +74,32 @@ EntityCls_CardFields = {
         for k in ["*SET_NODE", "*SET_PART", "*SET_SHELL"]
         + ["*SET_NODE_LIST", "*SET_PART_LIST", "*SET_SHELL_LIST"]
     },
+    **{
+        "*CONSTRAINED_RIGID_BODIES": [[10] * 3],
+        "*CONSTRAINED_NODAL_RIGID_BODY": [[10] * 7],
+        "*CONSTRAINED_EXTRA_NODES_NODE": [[10] * 2],
+        "*CONSTRAINED_EXTRA_NODES_SET": [[10] * 2],
+        "*CONSTRAINED_SPOTWELD": [[10] * 8],
+        "*DEFINE_COORDINATE_NODES": [[10] * 6],
+        "*DEFINE_COORDINATE_SYSTEM": [[10] * 8, [10] * 3],
+        "*DEFINE_COORDINATE_VECTOR": [[10] * 8],
+        "*DEFINE_TRANSFORMATION": [[10], [10] * 8],
+        "*HOURGLASS": [[10] * 8],
+        "*BOUNDARY_SPC_NODE": [[10] * 8],
+        "*BOUNDARY_SPC_SET": [[10] * 8],
+        "*BOUNDARY_PRESCRIBED_MOTION_NODE": [[10] * 8],
+        "*BOUNDARY_PRESCRIBED_MOTION_SET": [[10] * 8],
+        "*BOUNDARY_PRESCRIBED_MOTION_RIGID": [[10] * 8],
+        "*INITIAL_VELOCITY": [[10] * 5, [10] * 6],
+        "*INITIAL_VELOCITY_NODE": [[10] * 7],
+        "*INITIAL_VELOCITY_GENERATION": [[10] * 8],
+        "*SET_SEGMENT": [[10] * 5, [10] * 8],
+        "*SET_SOLID": [[10] * 5, [10] * 8],
+        "*SET_BEAM": [[10] * 5, [10] * 8],
+        "*SET_NODE_ADD": [[10] * 5, [10] * 8],
+        "*SET_PART_ADD": [[10] * 5, [10] * 8],
+        "*SET_SHELL_ADD": [[10] * 5, [10] * 8],
+    },
 }
 EntityCls_PagmFields = {
     **{
@@ -324,6 +360,84 @@ EntityCls_PagmFields = {
         for k in ["*SET_NODE", "*SET_PART", "*SET_SHELL"]
         + ["*SET_NODE_LIST", "*SET_PART_LIST", "*SET_SHELL_LIST"]
     },
+    **{
+        "*CONSTRAINED_RIGID_BODIES": {
+            "PIDL": {"index": ["0:", 0], "format": "", "info": "主刚体 PART ID"},
+            "PIDC": {"index": ["0:", 1], "format": "", "info": "从刚体 PART ID"},
+            "IFLAG": {"index": ["0:", 2], "format": "", "info": "质量属性更新选项"},
+        },
+        "*CONSTRAINED_NODAL_RIGID_BODY": {
+            "PID": {"index": [0, 0], "format": "", "info": "刚体 PART ID"},
+            "CID": {"index": [0, 1], "format": "", "info": "坐标系ID"},
+            "NSID": {"index": [0, 2], "format": "", "info": "节点集ID"},
+            "PNODE": {"index": [0, 3], "format": "", "info": "质心节点ID"},
+        },
+        "*CONSTRAINED_EXTRA_NODES_NODE": {
+            "PID": {"index": ["0:", 0], "format": "", "info": "刚体 PART ID"},
+            "NID": {"index": ["0:", 1], "format": "", "info": "节点ID"},
+        },
+        "*CONSTRAINED_EXTRA_NODES_SET": {
+            "PID": {"index": ["0:", 0], "format": "", "info": "刚体 PART ID"},
+            "NSID": {"index": ["0:", 1], "format": "", "info": "节点集ID"},
+        },
+        "*CONSTRAINED_SPOTWELD": {
+            "N1": {"index": ["0:", 0], "format": "", "info": "节点1"},
+            "N2": {"index": ["0:", 1], "format": "", "info": "节点2"},
+        },
+        "*DEFINE_COORDINATE_NODES": {
+            "CID": {"index": ["0:", 0], "format": "", "info": "坐标系ID"},
+            "N1": {"index": ["0:", 1], "format": "", "info": "原点节点"},
+            "N2": {"index": ["0:", 2], "format": "", "info": "轴向节点"},
+            "N3": {"index": ["0:", 3], "format": "", "info": "平面节点"},
+        },
+        "*DEFINE_COORDINATE_SYSTEM": {
+            "CID": {"index": [0, 0], "format": "", "info": "坐标系ID"},
+            "CIDL": {"index": [0, 7], "format": "", "info": "参考坐标系ID"},
+        },
+        "*DEFINE_COORDINATE_VECTOR": {
+            "CID": {"index": [0, 0], "format": "", "info": "坐标系ID"},
+            "NID": {"index": [0, 7], "format": "", "info": "节点ID"},
+        },
+        "*DEFINE_TRANSFORMATION": {"TRANID": {"index": [0, 0], "format": "", "info": "转换定义ID"}},
+        "*HOURGLASS": {"HGID": {"index": [0, 0], "format": "", "info": "沙漏控制ID"}},
+        "*BOUNDARY_SPC_NODE": {
+            "NID": {"index": ["0:", 0], "format": "", "info": "节点ID"},
+            "CID": {"index": ["0:", 1], "format": "", "info": "坐标系ID"},
+        },
+        "*BOUNDARY_SPC_SET": {
+            "NSID": {"index": ["0:", 0], "format": "", "info": "节点集ID"},
+            "CID": {"index": ["0:", 1], "format": "", "info": "坐标系ID"},
+        },
+        "*BOUNDARY_PRESCRIBED_MOTION_NODE": {
+            "NID": {"index": ["0:", 0], "format": "", "info": "节点ID"},
+            "LCID": {"index": ["0:", 3], "format": "", "info": "曲线ID"},
+        },
+        "*BOUNDARY_PRESCRIBED_MOTION_SET": {
+            "NSID": {"index": ["0:", 0], "format": "", "info": "节点集ID"},
+            "LCID": {"index": ["0:", 3], "format": "", "info": "曲线ID"},
+        },
+        "*BOUNDARY_PRESCRIBED_MOTION_RIGID": {
+            "PID": {"index": ["0:", 0], "format": "", "info": "刚体 PART ID"},
+            "LCID": {"index": ["0:", 3], "format": "", "info": "曲线ID"},
+        },
+        "*INITIAL_VELOCITY": {
+            "NSID": {"index": [0, 0], "format": "", "info": "节点集ID"},
+            "NSIDEX": {"index": [0, 1], "format": "", "info": "排除节点集ID"},
+        },
+        "*INITIAL_VELOCITY_NODE": {"NID": {"index": ["0:", 0], "format": "", "info": "节点ID"}},
+        "*INITIAL_VELOCITY_GENERATION": {
+            "ID": {"index": [0, 0], "format": "", "info": "PART ID 或集合ID"},
+            "STYP": {"index": [0, 1], "format": "", "info": "1:PART集 2:PART 3:节点集"},
+        },
+        **{
+            k: {
+                "SID": {"index": [0, 0], "format": "", "info": "id"},
+                **{f"K{i + 1}": {"index": ["1:", i], "format": "", "info": ""} for i in range(8)},
+            }
+            for k in ["*SET_SEGMENT", "*SET_SOLID", "*SET_BEAM"]
+            + ["*SET_NODE_ADD", "*SET_PART_ADD", "*SET_SHELL_ADD"]
+        },
+    },
 }
 TopoClsMap = {
     "nodes": ["*NODE"],
@@ -336,6 +450,65 @@ TopoClsMap = {
     + ["*SET_NODE_TITLE", "*SET_PART_TITLE", "*SET_SHELL_TITLE"]
     + ["*SET_NODE_LIST_TITLE", "*SET_PART_LIST_TITLE", "*SET_SHELL_LIST_TITLE"],
 }
+TopoAttrMap = {
+    "nodes": "nodes",
+    "elems": "elems",
+    "parts": "parts",
+    "define_curve": "curves",
+    "set_list": "sets",
+}
+EntityCls_RefFields = {
+    "*MAT_": {"MID": "mats"},
+    "*SECTION_": {"SECID": "sections"},
+    "*PART_": {"PID": "parts", "SECID": "sections", "MID": "mats", "HGID": "hgids"},
+    "*LOAD_NODE": {"ID": "nodes", "LCID": "curves"},
+    "*LOAD_NODE_SET": {"ID": "sets", "LCID": "curves"},
+    "*CONSTRAINED_RIGID_BODIES": {"PIDL": "parts", "PIDC": "parts"},
+    "*CONSTRAINED_NODAL_RIGID_BODY": {
+        "PID": "parts",
+        "CID": "cids",
+        "NSID": "sets",
+        "PNODE": "nodes",
+    },
+    "*CONSTRAINED_EXTRA_NODES_NODE": {"PID": "parts", "NID": "nodes"},
+    "*CONSTRAINED_EXTRA_NODES_SET": {"PID": "parts", "NSID": "sets"},
+    "*CONSTRAINED_SPOTWELD": {"N1": "nodes", "N2": "nodes"},
+    "*DEFINE_COORDINATE_NODES": {"CID": "cids", "N1": "nodes", "N2": "nodes", "N3": "nodes"},
+    "*DEFINE_COORDINATE_SYSTEM": {"CID": "cids", "CIDL": "cids"},
+    "*DEFINE_COORDINATE_VECTOR": {"CID": "cids", "NID": "nodes"},
+    "*DEFINE_TRANSFORMATION": {"TRANID": "tranids"},
+    "*HOURGLASS": {"HGID": "hgids"},
+    "*BOUNDARY_SPC_NODE": {"NID": "nodes", "CID": "cids"},
+    "*BOUNDARY_SPC_SET": {"NSID": "sets", "CID": "cids"},
+    "*BOUNDARY_PRESCRIBED_MOTION_NODE": {"NID": "nodes", "LCID": "curves"},
+    "*BOUNDARY_PRESCRIBED_MOTION_SET": {"NSID": "sets", "LCID": "curves"},
+    "*BOUNDARY_PRESCRIBED_MOTION_RIGID": {"PID": "parts", "LCID": "curves"},
+    "*INITIAL_VELOCITY": {"NSID": "sets", "NSIDEX": "sets"},
+    "*INITIAL_VELOCITY_NODE": {"NID": "nodes"},
+    "*SET_SEGMENT": {"SID": "sets", **{f"K{i + 1}": "nodes" for i in range(4)}},
+    "*SET_SOLID": {"SID": "sets", **{f"K{i + 1}": "elems" for i in range(8)}},
+    "*SET_BEAM": {"SID": "sets", **{f"K{i + 1}": "elems" for i in range(8)}},
+    **{
+        k: {"SID": "sets", **{f"K{i + 1}": "sets" for i in range(8)}}
+        for k in ["*SET_NODE_ADD", "*SET_PART_ADD", "*SET_SHELL_ADD"]
+    },
+}
+EntityCls_TypedRefs = {
+    "*CONTACT_": [[0, 2, {0: "sets", 1: "sets", 2: "sets", 3: "parts", 4: "sets", 6: "sets"}]]
+    + [[1, 3, {0: "sets", 1: "sets", 2: "sets", 3: "parts", 6: "sets"}]],
+    "*INITIAL_VELOCITY_GENERATION": [[0, 1, {1: "sets", 2: "parts", 3: "sets"}]],
+}
+EntityCls_IdOwners = {
+    "cids": {
+        "*DEFINE_COORDINATE_NODES": "CID",
+        "*DEFINE_COORDINATE_SYSTEM": "CID",
+        "*DEFINE_COORDINATE_VECTOR": "CID",
+    },
+    "tranids": {"*DEFINE_TRANSFORMATION": "TRANID"},
+    "hgids": {"*HOURGLASS": "HGID"},
+}
+EntityCls_RefPrefix = ["*CONTACT_", "*CONSTRAINED_", "*BOUNDARY_", "*SET_", "*INITIAL_"]
+EntityCls_RefPrefix += ["*DEFINE_", "*LOAD_", "*ELEMENT_", "*DATABASE_HISTORY_", "*RIGIDWALL_"]
 
 
 def reshape_list(ids: list = [0], n: int = 8):
@@ -401,6 +574,246 @@ def format_numeric2str(value: int | float, len_fomrat: int = 8):
     return result
 
 
+def format_fields2str(values: list, widths: list[int]):
+    # 单个实体只有几个字段, 逐个标量格式化更快; 整列渲染 (vec_write/__render_topo) 才用 format_array2str
+    return [
+        " " * w if isinstance(v, str) else format_numeric2str(v, w) for v, w in zip(values, widths)
+    ]
+
+
+def shift_typed(entity, refs: list, offsets: dict):
+    _card = 0
+    if re.search(r"_(ID|TITLE)(_|$)", entity.keyword):
+        _card += 1
+    if "_MPP" in entity.keyword:
+        _card += 1
+        if _card < len(entity.cards) and entity.cards[_card].lstrip().startswith("&"):
+            _card += 1
+    if _card >= len(entity.cards):
+        return
+    _line = entity.cards[_card].rstrip("\n")
+    _eol = "\n" if entity.cards[_card].endswith("\n") else ""
+    _f = lambda i: _line[i * 10 : (i + 1) * 10].strip()
+    for col, typ_col, typemap in refs:
+        _s, _t = _f(col), _f(typ_col) or "0"
+        if not (_s.isdigit() and _t.lstrip("+-").isdigit()) or not int(_s):
+            continue
+        _o = offsets.get(typemap.get(int(_t)), 0)
+        if _o:
+            _line = _line.ljust((col + 1) * 10)
+            _line = (
+                _line[: col * 10] + format_numeric2str(int(_s) + _o, 10) + _line[(col + 1) * 10 :]
+            )
+    entity.cards[_card] = _line + _eol
+
+
+def shift_contact_id(entity, offset: int = 0):
+    if not re.search(r"_(ID|TITLE)(_|$)", entity.keyword) or not entity.cards:
+        return []
+    _line = entity.cards[0].rstrip("\n")
+    _s = _line[:10].strip()
+    if not _s.isdigit() or not int(_s):
+        return []
+    if offset:
+        _eol = "\n" if entity.cards[0].endswith("\n") else ""
+        entity.cards[0] = format_numeric2str(int(_s) + offset, 10) + _line[10:] + _eol
+    return [int(_s)]
+
+
+def shift_bypagm(entity, field: str, offset: int = 0):
+    card, col = entity._pagmfield[field]["index"]
+    if not isinstance(col, int):
+        return []
+    if isinstance(card, str):
+        _slc = slice(*map(lambda x: int(x) if x else None, card.split(":")))
+        range_card = list(range(*_slc.indices(len(entity.cards))))
+    else:
+        range_card = [card] if card < len(entity.cards) else []
+    ids = []
+    for _c in range_card:
+        try:
+            _cf = entity._cardfield[_c]
+            _left = sum(_cf[:col])
+            _right = _left + _cf[col]
+        except IndexError:
+            continue
+        _s = entity.cards[_c][_left:_right].strip()
+        if not _s.lstrip("+-").isdigit():
+            continue
+        ids.append(int(_s))
+        if offset and int(_s):
+            _eol = "\n" if entity.cards[_c].endswith("\n") else ""
+            _line = entity.cards[_c].rstrip("\n").ljust(_right)
+            entity.cards[_c] = (
+                _line[:_left]
+                + format_numeric2str(int(_s) + offset, _cf[col])
+                + _line[_right:]
+                + _eol
+            )
+    return ids
+
+
+def reshape_idnodes(keyword: str, id_nodes: list[int]):
+    _id_nodes = id_nodes
+    _l_in = len(id_nodes)
+    if _l_in < 6:
+        if "SOLID" in keyword:
+            _nmap = {4: 4, 5: 3}
+            _id_nodes = _id_nodes + [_id_nodes[-1]] * (8 - _nmap[_l_in])
+    elif _l_in == 6:
+        if "SOLID" in keyword:
+            _id_nodes = _id_nodes[:4] + [_id_nodes[4]] * 2 + [_id_nodes[5]] * 2
+    elif _l_in == 13:
+        _i_m = id_nodes[:7]
+        _id_nodes = _i_m[:4] + [_i_m[4]] * 3 + _i_m[5:7]
+    elif _l_in == 15:
+        _i_m = id_nodes[:8]
+        _id_nodes = _i_m[:4] + [_i_m[4]] * 2 + [_i_m[5]] * 2 + _i_m[6:8]
+    elif _l_in == 20:
+        _id_nodes = _id_nodes[:10]
+    return _id_nodes
+
+
+def format_array2str(values, len_fomrat: int = 8, dtype: str = "U"):
+    values = np.asarray(values)
+    _lf = len_fomrat if len_fomrat > 7 else 7
+    _shape = values.shape
+    values = values.ravel()
+    _n, _kind = values.size, values.dtype.kind
+    _u10, _sp = np.uint64(10), np.uint8(32)
+    _p10 = 10 ** np.arange(20, dtype=np.uint64)
+    _ok = np.zeros(_n, dtype=bool)
+    if _kind in "iu":
+        _v = values.astype(np.int64)
+        _neg = _v < 0
+        _i = np.abs(_v).astype(np.uint64)
+        _ok[:] = True
+        _g = np.full((_n, _lf), _sp, dtype=np.uint8)
+    elif _kind == "f":
+        _v = values.astype(np.float64)
+        _neg = np.signbit(_v)
+        _fr, _ex = np.frexp(np.abs(_v))
+        _m = (_fr * 2.0**53).astype(np.uint64)
+        _k = 53 - _ex.astype(np.int64)
+        _k[_m == 0] = 0
+        _ok = np.isfinite(_v) & (_k >= 0) & (_k <= 60) & (_lf <= 18)
+        _k = np.where(_ok, _k, 0).astype(np.uint64)
+        _m = np.where(_ok, _m, 0)
+        _i, _mask = _m >> _k, (np.uint64(1) << _k) - np.uint64(1)
+        _f = _m & _mask
+        _g = np.full((_n, 2 * _lf + 1), _sp, dtype=np.uint8)
+        _g[:, _lf] = ord(".")
+        _dg = _g[:, _lf + 1 :]
+        for j in range(_lf):
+            _f *= _u10
+            _dg[:, j] = _f >> _k
+            _f &= _mask
+        _half = (np.uint64(1) << _k) >> np.uint64(1)
+        _odd = (_dg[:, -1] & 1).astype(bool)
+        _c = (_k > 0) & ((_f > _half) | ((_f == _half) & _odd))
+        for j in range(_lf - 1, -1, -1):
+            if not _c.any():
+                break
+            _dg[:, j] += _c
+            _c = _dg[:, j] == 10
+            _dg[_c, j] = 0
+        _i += _c
+        _dg += 48
+    if _kind in "iuf":
+        _il = np.maximum(np.searchsorted(_p10, _i, side="right"), 1)
+        _ok &= _il + (_neg if _kind in "iu" else 1) <= _lf
+        _r = _i.copy()
+        for j in range(min(int(_il[_ok].max(initial=1)), _lf)):
+            _g[:, _lf - 1 - j] = np.where(j < _il, (_r % _u10).astype(np.uint8) + 48, _sp)
+            _r //= _u10
+        _rows = np.flatnonzero(_neg & _ok)
+        _g[_rows, _lf - 1 - _il[_rows]] = ord("-")
+        if _kind in "iu":
+            result = _g
+        else:
+            _nz = _g[:, _lf + 1 :] != 48
+            _any = _nz.any(axis=1)
+            _dl = np.where(_any, _lf - np.argmax(_nz[:, ::-1], axis=1), 1)
+            _lead = np.where(_any, np.argmax(_nz, axis=1), 0)
+            _ok &= (_il > 1) | (_lead <= _lf - 7 + np.where(_v >= 0, 2, 1))
+            _src = np.minimum(_lf - _il - _neg, _dl + 1)[:, None] + np.arange(_lf)
+            result = np.take_along_axis(_g, _src, axis=1)
+        result = np.ascontiguousarray(result).view(f"S{_lf}").ravel()
+    else:
+        result = np.full(_n, b"", dtype=f"S{_lf}")
+    _ix = np.flatnonzero(~_ok)
+    if len(_ix):
+        _vals = values[_ix]
+        if _kind in "iuf":
+            _vals = _vals.astype(int if _kind in "iu" else float)
+        _s = [format_numeric2str(v, len_fomrat).encode("utf-8") for v in _vals.tolist()]
+        result = result.astype(f"S{max(_lf, *map(len, _s))}")
+        result[_ix] = _s
+    result = result.reshape(_shape)
+    return result if dtype == "S" else result.astype(f"U{result.dtype.itemsize}")
+
+
+def open_kf(path, mode: str = "r", encoding: str = "utf-8", buffering: int = 2**20):
+    _sfx = pathlib.Path(path).suffix.lower()
+    if _sfx == ".gz":
+        return gzip.open(path, mode + "t", compresslevel=6, encoding=encoding)
+    if _sfx in [".zst", ".zstd"]:
+        if zstandard is None:
+            raise ImportError("读写 .zst 文件需要安装 zstandard")
+        return zstandard.open(path, mode + "t", encoding=encoding)
+    return open(path, mode, encoding=encoding, buffering=buffering)
+
+
+layout_cache = {}
+
+
+def layout_tables(FORMAT_TYPE: str = "NORMAL"):
+    FORMAT_TYPE = FORMAT_TYPE.upper()
+    if FORMAT_TYPE in layout_cache:
+        return layout_cache[FORMAT_TYPE]
+    _ec = copy.deepcopy(EntityCls_CardFields)
+    _ep = copy.deepcopy(EntityCls_PagmFields)
+    if FORMAT_TYPE.upper() == "NORMAL":
+        pass
+    else:
+        for fileds in [_ec]:
+            for kw, value in fileds.items():
+                for each in value:
+                    if FORMAT_TYPE.upper() == "I10":
+                        _fieldlong = 10
+                    if FORMAT_TYPE.upper() == "LONG":
+                        _fieldlong = 20
+                    each[:] = [_fieldlong if x < _fieldlong else x for x in each]
+    for kw, value in _ep.items():
+        for _, field_setting in value.items():
+            index = field_setting["index"]
+            formater = field_setting["format"]
+            if "e" in formater:
+                field_setting["format"] = formater.format(_ec[kw][index[0]][index[1]] - 7)
+            if "d" in formater:
+                field_setting["format"] = formater.format(_ec[kw][index[0]][index[1]])
+            if "s" in formater:
+                field_setting["format"] = formater.format(_ec[kw][index[0]][index[1]])
+            if "f" in formater:
+                ...
+    layout_cache[FORMAT_TYPE] = (_ec, _ep)
+    return _ec, _ep
+
+
+def read_kf_lines(path, encoding: str = "utf-8"):
+    with open_kf(path, encoding=encoding) as file:
+        _raw = [line for line in file if line[0] != "$"]
+    lines = [line.upper() for line in _raw]
+    # *INCLUDE 的卡片是文件路径, 保留原始大小写
+    _inc = False
+    for i, line in enumerate(lines):
+        if line[0] == "*":
+            _inc = line.startswith("*INCLUDE")
+        elif _inc:
+            lines[i] = _raw[i]
+    return lines
+
+
 def split_sequence(seq, num):
     base_length = len(seq) // num
     remainder = len(seq) % num
@@ -414,6 +827,155 @@ def split_sequence(seq, num):
     return [x for x in result if x]
 
 
+def split_bywidth_array(buf: bytes, widths: list[list[int]]):
+    lines = buf.split(b"\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    _lpr = len(widths)
+    _n = len(lines) // _lpr
+    cols = []
+    for i, _w in enumerate(widths):
+        _W = sum(_w)
+        _s = b"".join(l.rstrip(b"\r").ljust(_W)[:_W] for l in lines[i : _n * _lpr : _lpr])
+        _a = np.frombuffer(_s, dtype="S1").reshape(_n, _W)
+        _o = 0
+        for w in _w:
+            _c = np.ascontiguousarray(_a[:, _o : _o + w]).view(f"S{w}").ravel()
+            _c = np.char.strip(_c)
+            _v = np.full(_n, np.nan)
+            _m = _c != b""
+            _v[_m] = _c[_m].astype(np.float64)
+            cols.append(_v)
+            _o += w
+    return np.column_stack(cols) if cols else np.empty((_n, 0))
+
+
+shm_attached = {}
+
+
+def attach_shm(name: str):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def attach_topo(handle: dict):
+    topo = {}
+    for kw, cols in handle.items():
+        topo[kw] = {}
+        for col, (name, shape, dtype) in cols.items():
+            if name not in shm_attached:
+                shm_attached[name] = attach_shm(name)
+            topo[kw][col] = np.ndarray(shape, dtype=dtype, buffer=shm_attached[name].buf)
+    return topo
+
+
+def detach_topo(handle: dict):
+    for cols in handle.values():
+        for name, _, _ in cols.values():
+            shm = shm_attached.pop(name, None)
+            if shm is not None:
+                shm.close()
+
+
+def parse_topo_shm(src: str, start: int, stop: int, widths, out: str, row0: int, shape):
+    shm_i = attach_shm(src)
+    shm_o = attach_shm(out)
+    try:
+        _arr = split_bywidth_array(bytes(shm_i.buf[start:stop]), widths)
+        np.ndarray(shape, dtype=np.float64, buffer=shm_o.buf)[row0 : row0 + len(_arr)] = _arr
+        return len(_arr)
+    finally:
+        shm_i.close()
+        shm_o.close()
+
+
+inner_state = threading.local()
+
+
+def inner_ids():
+    try:
+        return inner_state.ids
+    except AttributeError:
+        inner_state.ids = set()
+        return inner_state.ids
+
+
+class bl_rwlock:
+    def __init__(self):
+        self.__cond = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writer = None
+        self.__depth = 0
+        self.__local = threading.local()
+
+    def __own_reads(self):
+        return getattr(self.__local, "n", 0)
+
+    @contextlib.contextmanager
+    def read(self):
+        _me = threading.get_ident()
+        with self.__cond:
+            _owned = self.__writer == _me
+            if not _owned:
+                while self.__writer is not None:
+                    self.__cond.wait()
+                self.__readers += 1
+                self.__local.n = self.__own_reads() + 1
+        try:
+            yield self
+        finally:
+            if not _owned:
+                with self.__cond:
+                    self.__readers -= 1
+                    self.__local.n -= 1
+                    if not self.__readers:
+                        self.__cond.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        _me = threading.get_ident()
+        _held = 0
+        with self.__cond:
+            if self.__writer != _me:
+                # 读锁升级: 先让出本线程的读锁再排队, 否则两个升级的读者会互相等待;
+                # 让出期间其他写者可能先改动, 调用方需在写锁内重新检查状态
+                _held = self.__own_reads()
+                if _held:
+                    self.__readers -= _held
+                    self.__cond.notify_all()
+                while self.__writer is not None or self.__readers:
+                    self.__cond.wait()
+                self.__writer = _me
+            self.__depth += 1
+        try:
+            yield self
+        finally:
+            with self.__cond:
+                self.__depth -= 1
+                if not self.__depth:
+                    self.__readers += _held
+                    self.__writer = None
+                    self.__cond.notify_all()
+
+
+def kf_locked(mode: str = "write"):
+    def deco(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            _kf = self if isinstance(self, bl_keyfile) else self.__dict__.get("__outer_obj__")
+            _lock = getattr(_kf, "_bl_keyfile__rwlock", None)
+            if _lock is None:
+                return func(self, *args, **kwargs)
+            with getattr(_lock, mode)():
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
 class __LsDyna_Base:
     def __init__(
         self, outer_obj, keyword: str = "", cards: list[str] = [""], keyword_settings: str = ""
@@ -437,7 +999,7 @@ class __LsDyna_Base:
         self.__dict__["__is_init__"] = False
 
     def __set_str__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         str_title = "".join(
             [
                 f"{self.keyword}",
@@ -447,61 +1009,108 @@ class __LsDyna_Base:
         )
         self.str_cardsonly = "".join(self.cards)
         self.str = str_title + self.str_cardsonly
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
 
     def __str__(self) -> str:
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         self.__set_str__()
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return self.str
 
     def __setattr__(self, ww, value):
         if self.__is_init__:
             self.__dict__[ww] = value
-        elif self.__dict__.get("__is_inner__", False):
+        elif id(self) in inner_ids():
             self.__dict__[ww] = value
         else:
-            if ww not in self.__set_onlyin_inner__:
-                self.__dict__[ww] = value
-                self.__set_str__()
-            else:
-                print(f"属性{ww}是只读属性 不能被修改")
-            if self.is_edited or (ww in ["__reset__"]):
-                self.__outer_obj__._bl_keyfile__diff_kf["mod"].append(
-                    [self.keyword, self.str_cardsonly]
-                )
-                if self.keyword in sum(self.__outer_obj__.__topocls_name__.values(), []):
-                    _pd_newkw = self.__outer_obj__.__update_kwdf__(self)
-                    _pd_all = self.__outer_obj__.keywords[self.keyword]
-                    _pd_newkw = _pd_newkw[_pd_all.columns]
-                    _pd_all.iloc[
-                        [next((_i for _i, _v in enumerate(_pd_all.obj == self) if _v), -1)]
-                    ] = _pd_newkw
-                    self.__outer_obj__._bl_keyfile__filtercache = {}
+            _lock = getattr(self.__dict__.get("__outer_obj__"), "_bl_keyfile__rwlock", None)
+            with _lock.write() if _lock else contextlib.nullcontext():
+                self.__cow_detach__()
+                if ww not in self.__set_onlyin_inner__:
+                    self.__dict__[ww] = value
+                    self.__set_str__()
+                else:
+                    print(f"属性{ww}是只读属性 不能被修改")
+                if self.is_edited or (ww in ["__reset__"]):
+                    self.__outer_obj__._bl_keyfile__diff_kf["mod"].append(
+                        [self.keyword, self.str_cardsonly]
+                    )
+                    if self.keyword in sum(self.__outer_obj__.__topocls_name__.values(), []):
+                        if self.__outer_obj__._bl_keyfile__kw_buffer.get(self.keyword):
+                            self.__outer_obj__.flush_kws(self.keyword)
+                        _pd_newkw = self.__outer_obj__.__update_kwdf__(self)
+                        _pd_all = self.__outer_obj__._bl_keyfile__own_frame(self.keyword)
+                        _pd_newkw = _pd_newkw[_pd_all.columns]
+                        _pd_all.iloc[
+                            [next((_i for _i, _v in enumerate(_pd_all.obj == self) if _v), -1)]
+                        ] = _pd_newkw
+                        self.__outer_obj__._bl_keyfile__filtercache = {}
+
+    def __cow_detach__(self):
+        # 与克隆共享的实体在原地修改前, 先让其余模型各自保留一份修改前的副本
+        _share = self.__dict__.pop("__cow_share__", None)
+        for _kf in list(_share or ()):
+            if _kf is not self.__dict__.get("__outer_obj__"):
+                _kf._bl_keyfile__cow_adopt(self)
 
     def __deepcopy__(self, memo):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         new_obj = self.__class__.__new__(self.__class__)
         for k, v in self.__dict__.items():
+            if k == "__cow_share__":
+                continue
             if k == "__outer_obj__":
                 new_obj.__dict__[k] = self.__outer_obj__
             else:
                 new_obj.__dict__[k] = copy.deepcopy(v, memo)
+        self.__set_inner__(False)
         return new_obj
 
+    def __copy__(self):
+        new_obj = self.__class__.__new__(self.__class__)
+        for k, v in self.__dict__.items():
+            if k != "__cow_share__":
+                new_obj.__dict__[k] = list(v) if isinstance(v, list) else v
+        return new_obj
+
+    def __set_inner__(self, flag: bool = True):
+        (inner_ids().add if flag else inner_ids().discard)(id(self))
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("__outer_obj__", None)
+        state.pop("__cow_share__", None)
+        _c = state.get("str_cardsonly", "")
+        if isinstance(state.get("str"), str) and state["str"].endswith(_c):
+            _s = state.pop("str")
+            state["__str_head__"] = sys.intern(_s[: len(_s) - len(_c)])
+        if state.get("cards") == _c.splitlines(True):
+            state.pop("cards")
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        _head = state.pop("__str_head__", None)
+        state.pop("__is_inner__", None)
+        self.__dict__.update(state)
+        if _head is not None:
+            self.__dict__["str"] = _head + self.str_cardsonly
+        if "cards" not in state:
+            self.__dict__["cards"] = self.str_cardsonly.splitlines(True)
+
     @property
     def is_edited(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         ...
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return self.str_cardsonly != self.__str_cardsonly__
 
     def save(self, filename, with_title=True, permission="w"):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         write_str = self.str if with_title else self.str_cardsonly
         with open(filename, permission) as f:
             f.write(write_str)
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
 
 
 class LsDyna_ENTITY(__LsDyna_Base):
@@ -525,7 +1134,7 @@ class LsDyna_ENTITY(__LsDyna_Base):
         self.__dict__["__is_init__"] = False
 
     def __set_additional_info(self, cardfield: list, pagmfield: dict):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         keyword = self.keyword
         if cardfield:
             _cardfield = cardfield
@@ -575,7 +1184,7 @@ class LsDyna_ENTITY(__LsDyna_Base):
             raise ValueError("关键字的不定长行卡片只能为同一种形态")
         self._cardfield = convert_to_tuple(_cardfield)
         self._pagmfield = _pagmfield
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
 
     def __getitem__(self, pos):
         def __get_card_field(card, field):
@@ -587,7 +1196,7 @@ class LsDyna_ENTITY(__LsDyna_Base):
             except:
                 return "无法以指定索引获取字段"
 
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         range_card, range_field = [], []
         if isinstance(pos, tuple):
             if isinstance(pos[0], int):
@@ -660,23 +1269,24 @@ class LsDyna_ENTITY(__LsDyna_Base):
                 picks = picks[0][1][0]
         else:
             picks = "索引错误 或 未编码全部卡片索引"
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return picks
 
+    @kf_locked("write")
     def __setitem__(self, pos, value):
-        def __set_card_field(card, field, value):
+        def __set_card_field(card, field, value, formatted=0):
             try:
                 _card_field = self._cardfield[card]
                 if isinstance(value, (int, float)):
                     value = format_numeric2str(value, _card_field[field])
-                elif isinstance(value, str):
+                elif not isinstance(value, str):
+                    raise ValueError("赋值类型错误")
+                elif not formatted:
                     value = (
                         f"{value:<{_card_field[field]}s}"
                         if len(value) < _card_field[field]
                         else value[: _card_field[field]]
                     )
-                else:
-                    raise ValueError("赋值类型错误")
                 _left = sum(_card_field[:field]) if field else 0
                 _right = sum(_card_field[: field + 1])
                 self.cards[card] = self.cards[card][:_left] + value + self.cards[card][_right:]
@@ -685,8 +1295,10 @@ class LsDyna_ENTITY(__LsDyna_Base):
                         [self.keyword, self.str_cardsonly]
                     )
                     if self.keyword in sum(self.__outer_obj__.__topocls_name__.values(), []):
+                        if self.__outer_obj__._bl_keyfile__kw_buffer.get(self.keyword):
+                            self.__outer_obj__.flush_kws(self.keyword)
                         _pd_newkw = self.__outer_obj__.__update_kwdf__(self)
-                        _pd_all = self.__outer_obj__.keywords[self.keyword]
+                        _pd_all = self.__outer_obj__._bl_keyfile__own_frame(self.keyword)
                         _pd_newkw = _pd_newkw[_pd_all.columns]
                         _pd_all.iloc[
                             [next((_i for _i, _v in enumerate(_pd_all.obj == self) if _v), -1)]
@@ -696,9 +1308,10 @@ class LsDyna_ENTITY(__LsDyna_Base):
             except:
                 return "索引错误 或 未编码全部卡片索引"
 
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         _excl_kw = sum(self.__outer_obj__.__topocls_name__.values(), [])
         if not self.keyword in _excl_kw:
+            self.__cow_detach__()
             range_card, range_field = [], []
             if isinstance(pos, tuple):
                 if all([isinstance(each, int) for each in pos]):
@@ -755,22 +1368,34 @@ class LsDyna_ENTITY(__LsDyna_Base):
                         or (self._cardfield[x[0]][x[1]] > 60)
                     ]
                     _l_s = len(_ep)
+                    if isinstance(value, np.ndarray):
+                        value = value.ravel().tolist()
                     if _l_s == 1:
                         if not isinstance(value, (list, tuple)):
                             value = [value]
                     else:
                         if len(value) != _l_s:
                             raise TypeError("目标和字段数量不相等")
+                    _fmt = {}
+                    if _l_s > 1:
+                        _grp = defaultdict(list)
+                        for i, (c, f) in enumerate(_ep):
+                            if type(value[i]) in (int, float):
+                                _grp[(self._cardfield[c][f], type(value[i]))].append(i)
+                        for (w, _), _ix in _grp.items():
+                            _fmt.update(
+                                zip(_ix, format_array2str([value[i] for i in _ix], w).tolist())
+                            )
                     for i, (c, f) in enumerate(_ep):
-                        __set_card_field(c, f, value[i])
+                        __set_card_field(c, f, _fmt.get(i, value[i]), i in _fmt)
                 self.__set_str__()
                 result = self.cards
         else:
             result = f"不处理{_excl_kw}"
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
 
     def __repr__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         _c_f = self._cardfield
         _p_f = self._pagmfield
         repr_str = "".join(
@@ -795,11 +1420,12 @@ class LsDyna_ENTITY(__LsDyna_Base):
                 "".join([f"  |_ {k}:{v}\n" for k, v in _p_f.items()]),
             ]
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return repr_str
 
     def reset(self):
-        self.__dict__["__is_inner__"] = True
+        self.__cow_detach__()
+        self.__set_inner__(True)
         self.__init__(
             outer_obj=self.__outer_obj__,
             **self.__outer_obj__.__read_kwstr__(
@@ -808,7 +1434,7 @@ class LsDyna_ENTITY(__LsDyna_Base):
                 only_pre=1,
             ),
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         self.__reset__ = True
 
 
@@ -845,20 +1471,21 @@ class LsDyna_NODE(__LsDyna_Base):
         self._cardfield = convert_to_tuple(
             self.__outer_obj__._bl_keyfile__EntityCls_CardFields[self.keyword]
         )
-        self.__set_str__()
-        self.__str_cardsonly__ = self.str_cardsonly
+        if not getattr(inner_state, "bulk_str", 0):
+            self.__set_str__()
+            self.__str_cardsonly__ = self.str_cardsonly
         self.__dict__["__is_init__"] = False
 
     def get_related_elems(self, return_asdf=0):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         related_elems = self.__outer_obj__.filter_TopoDF_by_ids(
             et_type="elems", field="id_nodes", ids=[self.id], return_asdf=return_asdf
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return related_elems
 
     def __set_str__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         str_title = "".join(
             [
                 f"{self.keyword}",
@@ -873,30 +1500,18 @@ class LsDyna_NODE(__LsDyna_Base):
         )
         _cf = self._cardfield
         _cf_0 = _cf[0]
-        _fn2s = format_numeric2str
+        _values = [self.id, self.x, self.y, self.z, *self.card1_add_fields]
         str_cardsonly_parts = [
-            _fn2s(self.id, _cf_0[0]),
-            "".join(
-                [
-                    _fn2s(each, _cf_0[index])
-                    for index, each in ((1, self.x), (2, self.y), (3, self.z))
-                ]
-            ),
-            "".join(
-                [
-                    (_fn2s(each, _cf_0[index + 4]) if not each == "" else " " * _cf_0[index + 4])
-                    for index, each in enumerate(self.card1_add_fields)
-                ]
-            ),
+            "".join(format_fields2str(_values, _cf_0[: len(_values)])),
             "\n",
         ]
         self.str_cardsonly = "".join(str_cardsonly_parts) + self.card_EX
         self.str = str_title + str_field_comments + self.str_cardsonly
         self.cards = [s + "\n" for s in self.str_cardsonly.split("\n") if s]
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
 
     def __repr__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         lines = [f"node with:"]
         lines.extend(
             [
@@ -910,16 +1525,17 @@ class LsDyna_NODE(__LsDyna_Base):
             lines.append(f"    ids:".ljust(10) + f"{[x.id.tolist() for x in _r_e]}")
         else:
             lines.append(f"  Elems:".ljust(10) + f"None, is a isolated node")
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return "\n".join(lines)
 
     def reset(self):
-        self.__dict__["__is_inner__"] = True
+        self.__cow_detach__()
+        self.__set_inner__(True)
         self.__init__(
             outer_obj=self.__outer_obj__,
             **self.__outer_obj__.get_nodes(self.__str_cardsonly__).iloc[0, :].to_dict(),
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         self.__reset__ = True
 
 
@@ -938,39 +1554,20 @@ class __LsDyna_Elem_Factory(__LsDyna_Base):
         self.__dict__["__is_init__"] = False
 
     def reshape_nodes(self, id_nodes):
-        self.__dict__["__is_inner__"] = True
-        self.__id_nodes__ = self.id_nodes
-        _l_in = len(self.id_nodes)
-        if _l_in < 6:
-            if "SOLID" in self.keyword:
-                _nmap = {4: 4, 5: 3}
-                self.__id_nodes__ = self.__id_nodes__ + [self.__id_nodes__[-1]] * (8 - _nmap[_l_in])
-        elif _l_in == 6:
-            if "SOLID" in self.keyword:
-                _i_m = self.id_nodes[:8]
-                self.__id_nodes__ = (
-                    self.__id_nodes__[:4] + [self.__id_nodes__[4]] * 2 + [self.__id_nodes__[5]] * 2
-                )
-        elif _l_in == 13:
-            _i_m = self.id_nodes[:7]
-            self.__id_nodes__ = _i_m[:4] + [_i_m[4]] * 3 + _i_m[5:7]
-        elif _l_in == 15:
-            _i_m = self.id_nodes[:8]
-            self.__id_nodes__ = _i_m[:4] + [_i_m[4]] * 2 + [_i_m[5]] * 2 + _i_m[6:8]
-        elif _l_in == 20:
-            self.__id_nodes__ = self.__id_nodes__[:10]
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(True)
+        self.__id_nodes__ = reshape_idnodes(self.keyword, self.id_nodes)
+        self.__set_inner__(False)
 
     def get_related_nodes(self, return_asdf=0):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         related_nodes = self.__outer_obj__.filter_TopoDF_by_ids(
             et_type="nodes", field="id", ids=self.id_nodes, return_asdf=return_asdf
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return related_nodes[0] if related_nodes else None
 
     def get_centercoords(self, return_size=0):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         _rns = self.get_related_nodes()
         _rnd_c = [(n["x"], n["y"], n["z"]) for n in _rns]
         _len = len(_rnd_c)
@@ -988,19 +1585,19 @@ class __LsDyna_Elem_Factory(__LsDyna_Base):
                 _dist = _f_dist(_rnd_c[0], _rnd_c[1])
             else:
                 _dist = (_f_dist(_rnd_c[0], _rnd_c[1]) + _f_dist(_rnd_c[0], _rnd_c[-2])) / 2
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return _center, _dist
 
     def get_related_part(self, return_asdf=0):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         related_part = self.__outer_obj__.filter_TopoDF_by_ids(
             et_type="parts", field="id", ids=[self.id_part], return_asdf=return_asdf
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return related_part[0] if related_part else None
 
     def __repr__(self) -> str:
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         lines = [f"{self.keyword} with:"]
         lines.append(f"  ID:".ljust(10) + f"{self.id}")
         centercoords = self.get_centercoords(1)
@@ -1014,18 +1611,19 @@ class __LsDyna_Elem_Factory(__LsDyna_Base):
         )
         lines.append(f"    ids:".ljust(10) + f"{self.id_nodes}")
         lines.append(f"  partid:".ljust(10) + f"{self.id_part}")
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return "\n".join(lines)
 
     def reset(self):
-        self.__dict__["__is_inner__"] = True
+        self.__cow_detach__()
+        self.__set_inner__(True)
         self.__init__(
             outer_obj=self.__outer_obj__,
             **self.__outer_obj__.get_elems(self.__str_cardsonly__, kw_type=self.keyword)
             .iloc[0, :]
             .to_dict(),
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         self.__reset__ = True
 
 
@@ -1053,12 +1651,13 @@ class LsDyna_ELEMENT_SOLID(__LsDyna_Elem_Factory):
         self._cardfield = convert_to_tuple(
             self.__outer_obj__._bl_keyfile__EntityCls_CardFields[self.keyword]
         )
-        self.__set_str__()
-        self.__str_cardsonly__ = self.str_cardsonly
+        if not getattr(inner_state, "bulk_str", 0):
+            self.__set_str__()
+            self.__str_cardsonly__ = self.str_cardsonly
         self.__dict__["__is_init__"] = False
 
     def __set_str__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         str_title = "".join(
             [
                 f"{self.keyword}",
@@ -1072,18 +1671,17 @@ class LsDyna_ELEMENT_SOLID(__LsDyna_Elem_Factory):
         ).replace(" ", "-")
         _cf = self._cardfield
         _cf_0, _cf_1 = (_cf[0], _cf[1]) if len(_cf) > 1 else (_cf[0][0:2], _cf[0][2:])
-        _fn2s = format_numeric2str
+        _fs2s = format_fields2str
         str_cardsonly_parts = [
-            _fn2s(self.id, _cf_0[0]),
-            _fn2s(self.id_part, _cf_0[1]),
+            "".join(_fs2s([self.id, self.id_part], _cf_0[:2])),
             "\n",
-            "".join([_fn2s(each, _cf_1[index]) for index, each in enumerate(self.__id_nodes__)]),
+            "".join(_fs2s(self.__id_nodes__, _cf_1[: len(self.__id_nodes__)])),
             "\n",
         ]
         self.str_cardsonly = "".join(str_cardsonly_parts) + self.card_EX
         self.str = str_title + str_field_comments + self.str_cardsonly
         self.cards = [s + "\n" for s in self.str_cardsonly.split("\n") if s]
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
 
 
 class LsDyna_ELEMENT_SHELL(__LsDyna_Elem_Factory):
@@ -1110,12 +1708,13 @@ class LsDyna_ELEMENT_SHELL(__LsDyna_Elem_Factory):
         self._cardfield = convert_to_tuple(
             self.__outer_obj__._bl_keyfile__EntityCls_CardFields[self.keyword]
         )
-        self.__set_str__()
-        self.__str_cardsonly__ = self.str_cardsonly
+        if not getattr(inner_state, "bulk_str", 0):
+            self.__set_str__()
+            self.__str_cardsonly__ = self.str_cardsonly
         self.__dict__["__is_init__"] = False
 
     def __set_str__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         str_title = "".join(
             [
                 f"{self.keyword}",
@@ -1126,19 +1725,15 @@ class LsDyna_ELEMENT_SHELL(__LsDyna_Elem_Factory):
         str_field_comments = "$    EID     PID      N1      N2      N3      N4\n".replace(" ", "-")
         _cf = self._cardfield
         _cf_0 = _cf[0]
-        _fn2s = format_numeric2str
+        _values = [self.id, self.id_part, *self.__id_nodes__]
         str_cardsonly_parts = [
-            _fn2s(self.id, _cf_0[0]),
-            _fn2s(self.id_part, _cf_0[1]),
-            "".join(
-                [_fn2s(each, _cf_0[index + 2]) for index, each in enumerate(self.__id_nodes__)]
-            ),
+            "".join(format_fields2str(_values, _cf_0[: len(_values)])),
             "\n",
         ]
         self.str_cardsonly = "".join(str_cardsonly_parts) + self.card_EX
         self.str = str_title + str_field_comments + self.str_cardsonly
         self.cards = [s + "\n" for s in self.str_cardsonly.split("\n") if s]
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
 
 
 class LsDyna_ELEMENT_BEAM(__LsDyna_Elem_Factory):
@@ -1173,12 +1768,13 @@ class LsDyna_ELEMENT_BEAM(__LsDyna_Elem_Factory):
         self._cardfield = convert_to_tuple(
             self.__outer_obj__._bl_keyfile__EntityCls_CardFields[self.keyword]
         )
-        self.__set_str__()
-        self.__str_cardsonly__ = self.str_cardsonly
+        if not getattr(inner_state, "bulk_str", 0):
+            self.__set_str__()
+            self.__str_cardsonly__ = self.str_cardsonly
         self.__dict__["__is_init__"] = False
 
     def __set_str__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         str_title = "".join(
             [
                 f"{self.keyword}",
@@ -1191,22 +1787,15 @@ class LsDyna_ELEMENT_BEAM(__LsDyna_Elem_Factory):
         )
         _cf = self._cardfield
         _cf_0 = _cf[0]
-        _fn2s = format_numeric2str
+        _values = [self.id, self.id_part, *self.__id_nodes__, *self.card1_add_fields]
         str_cardsonly_parts = [
-            _fn2s(self.id, _cf_0[0]),
-            _fn2s(self.id_part, _cf_0[1]),
-            "".join(
-                [
-                    (_fn2s(each, _cf_0[index + 2]) if not each == "" else " " * _cf_0[index + 2])
-                    for index, each in enumerate(self.__id_nodes__ + self.card1_add_fields)
-                ]
-            ),
+            "".join(format_fields2str(_values, _cf_0[: len(_values)])),
             "\n",
         ]
         self.str_cardsonly = "".join(str_cardsonly_parts) + self.card_EX
         self.str = str_title + str_field_comments + self.str_cardsonly
         self.cards = [s + "\n" for s in self.str_cardsonly.split("\n") if s]
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
 
 
 class LsDyna_PART(__LsDyna_Base):
@@ -1255,31 +1844,31 @@ class LsDyna_PART(__LsDyna_Base):
         self.__dict__["__is_init__"] = False
 
     def get_related_elems(self, return_asdf=0):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         related_elems = self.__outer_obj__.filter_TopoDF_by_ids(
             et_type="elems", field="id_part", ids=[self.id], return_asdf=return_asdf
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return related_elems
 
     def get_related_mat(self, return_asdf=0):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         related_mat = self.__outer_obj__.filter_TopoDF_by_ids(
             et_type="mats", field="id", ids=[self.id_mat], return_asdf=return_asdf
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return related_mat[0] if related_mat else None
 
     def get_related_section(self, return_asdf=0):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         related_section = self.__outer_obj__.filter_TopoDF_by_ids(
             et_type="sections", field="id", ids=[self.id_sec], return_asdf=return_asdf
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return related_section[0] if related_section else None
 
     def __set_str__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         str_title = "".join(
             [
                 f"{self.keyword}",
@@ -1295,31 +1884,20 @@ class LsDyna_PART(__LsDyna_Base):
         _cf = self._cardfield
         _cf_0 = _cf[0]
         _cf_1 = _cf[1]
-        _fn2s = format_numeric2str
+        _values = [self.id, self.id_sec, self.id_mat, *self.card2_add_fields]
         str_cardsonly_parts = [
             (f"{self.name:<{_cf_0[0]}s}" if len(self.name) < _cf_0[0] else self.name[: _cf_0[0]]),
             "\n",
-            "".join(
-                [
-                    _fn2s(each, _cf_1[index])
-                    for index, each in enumerate([self.id, self.id_sec, self.id_mat])
-                ]
-            ),
-            "".join(
-                [
-                    (_fn2s(each, _cf_1[index + 3]) if not each == "" else " " * _cf_1[index + 3])
-                    for index, each in enumerate(self.card2_add_fields)
-                ]
-            ),
+            "".join(format_fields2str(_values, _cf_1[: len(_values)])),
             "\n",
         ]
         self.str_cardsonly = "".join(str_cardsonly_parts) + self.card_EX
         self.str = str_title + str_field_comments + self.str_cardsonly
         self.cards = [s + "\n" for s in self.str_cardsonly.split("\n") if s]
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
 
     def __repr__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         lines = [f"part with:"]
         lines.extend(
             [
@@ -1335,16 +1913,17 @@ class LsDyna_PART(__LsDyna_Base):
             lines.append(f"    ids:".ljust(10) + f"{[x.id.tolist() for x in _r_e]}")
         else:
             lines.append(f"  Elems:".ljust(10) + f"None, is a isolated part")
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return "\n".join(lines)
 
     def reset(self):
-        self.__dict__["__is_inner__"] = True
+        self.__cow_detach__()
+        self.__set_inner__(True)
         self.__init__(
             outer_obj=self.__outer_obj__,
             **self.__outer_obj__.get_parts(self.__str_cardsonly__).iloc[0, :].to_dict(),
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         self.__reset__ = True
 
 
@@ -1392,7 +1971,7 @@ class LsDyna_DEFINE_CURVE(__LsDyna_Base):
         self.__dict__["__is_init__"] = False
 
     def __set_str__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         str_title = "".join(
             [
                 f"{self.keyword}",
@@ -1408,43 +1987,33 @@ class LsDyna_DEFINE_CURVE(__LsDyna_Base):
         _cf = self._cardfield
         _cf_0 = _cf[0]
         _cf_1 = _cf[1]
-        _fn2s = format_numeric2str
+        _fs2s = format_fields2str
+        _values = [
+            self.id,
+            self.sidr,
+            self.sfa,
+            self.sfo,
+            self.offa,
+            self.offo,
+            self.dattyp,
+            self.lcint,
+        ]
+        _xy = [each for each in zip(self.x, self.y) if not any([x in [np.nan, []] for x in each])]
+        _s = _fs2s([v for each in _xy for v in each], [_cf_1[0], _cf_1[1]] * len(_xy))
         str_cardsonly_parts = [
-            "".join(
-                [
-                    _fn2s(each, _cf_0[index]) if not each == "" else " " * _cf_0[index]
-                    for index, each in enumerate(
-                        [
-                            self.id,
-                            self.sidr,
-                            self.sfa,
-                            self.sfo,
-                            self.offa,
-                            self.offo,
-                            self.dattyp,
-                            self.lcint,
-                        ]
-                    )
-                ]
-            ),
+            "".join(_fs2s(_values, _cf_0[: len(_values)])),
             "\n",
-            "\n".join(
-                [
-                    (_fn2s(each[0], _cf_1[0]) + _fn2s(each[1], _cf_1[1]))
-                    for each in zip(self.x, self.y)
-                    if not any([x in [np.nan, []] for x in each])
-                ]
-            ),
+            "\n".join([_s[i] + _s[i + 1] for i in range(0, len(_s), 2)]),
             "\n",
         ]
         self.str_cardsonly = "".join(str_cardsonly_parts) + self.card_EX
         self.str = str_title + str_field_comments + self.str_cardsonly
         __cards = [s + "\n" for s in self.str_cardsonly.split("\n") if s]
         self.cards = [__cards[0], "".join(__cards[1:])]
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
 
     def __repr__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         lines = [f"cruve with:"]
         lines.extend(
             [
@@ -1457,16 +2026,17 @@ class LsDyna_DEFINE_CURVE(__LsDyna_Base):
                 + f"重插 {self.lcint} ",
             ]
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return "\n".join(lines)
 
     def reset(self):
-        self.__dict__["__is_inner__"] = True
+        self.__cow_detach__()
+        self.__set_inner__(True)
         self.__init__(
             outer_obj=self.__outer_obj__,
             **self.__outer_obj__.get_define_curve(self.__str_cardsonly__).iloc[0, :].to_dict(),
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         self.__reset__ = True
 
 
@@ -1508,7 +2078,7 @@ class LsDyna_SET_LIST(__LsDyna_Base):
         self.__dict__["__is_init__"] = False
 
     def __set_str__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         str_title = "".join(
             [
                 f"{self.keyword}",
@@ -1523,37 +2093,29 @@ class LsDyna_SET_LIST(__LsDyna_Base):
         _cf = self._cardfield
         _cf_0 = _cf[0]
         _cf_1 = _cf[1]
-        _fn2s = format_numeric2str
+        _fs2s = format_fields2str
+        _s = _fs2s(
+            [each for _line in self.nids for each in _line],
+            [_cf_1[index] for _line in self.nids for index in range(len(_line))],
+        )
+        _n = np.cumsum([0] + [len(_line) for _line in self.nids]).tolist()
         str_cardsonly_parts = [
             "".join(
-                [
-                    _fn2s(each, _cf_0[index]) if not each == "" else " " * _cf_0[index]
-                    for index, each in enumerate([self.id, self.da1, self.da2, self.da3, self.da4])
-                ]
+                _fs2s([self.id, self.da1, self.da2, self.da3, self.da4], _cf_0[:5])
                 + [f"{self.solver:<{_cf_0[5]}s}"]
             ),
             "\n",
-            "\n".join(
-                [
-                    "".join(
-                        [
-                            _fn2s(each, _cf_1[index]) if not each == "" else " " * _cf_1[index]
-                            for index, each in enumerate(_line)
-                        ]
-                    )
-                    for _line in self.nids
-                ]
-            ),
+            "\n".join(["".join(_s[a:b]) for a, b in zip(_n[:-1], _n[1:])]),
             "\n",
         ]
         self.str_cardsonly = "".join(str_cardsonly_parts) + self.card_EX
         self.str = str_title + str_field_comments + self.str_cardsonly
         __cards = [s + "\n" for s in self.str_cardsonly.split("\n") if s]
         self.cards = [__cards[0], "".join(__cards[1:])]
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
 
     def __repr__(self):
-        self.__dict__["__is_inner__"] = True
+        self.__set_inner__(True)
         lines = [f"set with:"]
         lines.extend(
             [
@@ -1565,21 +2127,112 @@ class LsDyna_SET_LIST(__LsDyna_Base):
                 f"    ids:".ljust(10) + f"{self.nids}",
             ]
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         return "\n".join(lines)
 
     def reset(self):
-        self.__dict__["__is_inner__"] = True
+        self.__cow_detach__()
+        self.__set_inner__(True)
         self.__init__(
             outer_obj=self.__outer_obj__,
             **self.__outer_obj__.get_set_list(self.__str_cardsonly__, kw_type=self.keyword)
             .iloc[0, :]
             .to_dict(),
         )
-        self.__dict__["__is_inner__"] = False
+        self.__set_inner__(False)
         self.__reset__ = True
 
 
+def cow_target(entity):
+    return entity._bl_cowref__cur() if type(entity) is bl_cowref else entity
+
+
+class bl_cowref:
+    __slots__ = ("__target", "__owner")
+
+    def __init__(self, target, owner):
+        object.__setattr__(self, "_bl_cowref__target", cow_target(target))
+        object.__setattr__(self, "_bl_cowref__owner", owner)
+
+    def __cur(self):
+        _t = self.__target
+        _owned = self.__owner.__dict__.get("_bl_keyfile__cow_owned")
+        if _owned and id(_t) in _owned and _owned[id(_t)][0] is _t:
+            _t = _owned[id(_t)][1]
+            object.__setattr__(self, "_bl_cowref__target", _t)
+        return _t
+
+    def __own(self):
+        _t, _kf = self.__cur(), self.__owner
+        if _t.__dict__.get("__outer_obj__") is not _kf:
+            _kf._bl_keyfile__cow_adopt(_t)
+        return self.__cur()
+
+    @property
+    def __class__(self):
+        return self.__cur().__class__
+
+    def __getattr__(self, name):
+        _t = self.__cur()
+        _v = getattr(_t, name)
+        if callable(_v) and getattr(_v, "__self__", None) is _t:
+            if _t.__dict__.get("__outer_obj__") is not self.__owner:
+                _view = copy.copy(_t)
+                _view.__dict__["__outer_obj__"] = self.__owner
+                _v = getattr(_view, name)
+        return _v
+
+    def __setattr__(self, name, value):
+        setattr(self.__own(), name, value)
+
+    def __getitem__(self, pos):
+        return self.__cur()[pos]
+
+    def __setitem__(self, pos, value):
+        self.__own()[pos] = value
+
+    def __eq__(self, other):
+        return self is other or self.__cur() is cow_target(other)
+
+    def __hash__(self):
+        return hash(self.__cur())
+
+    def __str__(self):
+        return str(self.__cur())
+
+    def __repr__(self):
+        return repr(self.__cur())
+
+    def __copy__(self):
+        return copy.copy(self.__cur())
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.__cur(), memo)
+
+    def __reduce_ex__(self, protocol):
+        return self.__cur().__reduce_ex__(protocol)
+
+
+class bl_cowlist(list):
+    def __init__(self, iterable, outer_obj):
+        super().__init__(map(cow_target, iterable))
+        self.__outer_obj__: bl_keyfile = outer_obj
+
+    def __wrap(self, entity):
+        if entity.__dict__.get("__outer_obj__") is self.__outer_obj__:
+            return entity
+        return bl_cowref(entity, self.__outer_obj__)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.__wrap(x) for x in list.__getitem__(self, index)]
+        return self.__wrap(list.__getitem__(self, index))
+
+    def __iter__(self):
+        for x in list.__iter__(self):
+            yield self.__wrap(x)
+
+
 class bl_keyfile:
     def __init__(
         self,
@@ -1587,8 +2240,10 @@ class bl_keyfile:
         parsing_topo=True,
         is_init=1,
         acc_initbythread=0,
+        acc_parsebyprocess=0,
         encoding="utf-8",
         show_pbar=1,
+        include_cache: dict = None,
     ):
         self.__set_params()
         self.__set_fieldconfig()
@@ -1596,9 +2251,11 @@ class bl_keyfile:
         if keyfile:
             self.kfilepath = pathlib.Path(keyfile)
             self.encoding = encoding
+            self.__include_cache = include_cache
             if parsing_topo:
                 self.__parsing_topo = parsing_topo
                 self.__acc_initbythread = acc_initbythread
+                self.__acc_parsebyprocess = acc_parsebyprocess
                 self.__topocls_name__ = copy.deepcopy(TopoClsMap)
                 self.read_kf(self.kfilepath)
                 self.collect_PARAMETER()
@@ -1612,11 +2269,14 @@ class bl_keyfile:
             else:
                 self.__topocls_name__ = {}
                 self.read_kf(self.kfilepath)
+            self.__track_src()
+            self.__include_cache = None
 
     def __set_params(self):
         self.kfilepath = ""
         self.__parsing_topo = 0
         self.__acc_initbythread = 0
+        self.__acc_parsebyprocess = 0
         self.acc_filterbycache = 1
         self.__filtercache = {}
         self.__topocls_name__ = {}
@@ -1631,46 +2291,30 @@ class bl_keyfile:
         self.__acc_kwpre = TopoClsMap["nodes"] + TopoClsMap["elems"]
         self.__ori_kw_order = []
         self.__diff_kf = {"add": [], "del": [], "mod": []}
+        self.__kw_buffer = defaultdict(list)
+        self.__kw_batch = 0
+        self.__src_snap = {}
+        self.__src_ids = {}
+        self.__shm_topo = []
+        self.__rwlock = bl_rwlock()
+        self.__include_cache = None
         self.diff_kf = MappingProxyType(self.__diff_kf)
 
     def __set_fieldconfig(self, FORMAT_TYPE="NORMAL"):
-        self.__EntityCls_CardFields = copy.deepcopy(EntityCls_CardFields)
-        self.__EntityCls_PagmFields = copy.deepcopy(EntityCls_PagmFields)
-        if FORMAT_TYPE.upper() == "NORMAL":
-            pass
-        else:
-            for fileds in [self.__EntityCls_CardFields]:
-                for kw, value in fileds.items():
-                    for each in value:
-                        if FORMAT_TYPE.upper() == "I10":
-                            _fieldlong = 10
-                        if FORMAT_TYPE.upper() == "LONG":
-                            _fieldlong = 20
-                        each[:] = [_fieldlong if x < _fieldlong else x for x in each]
-        for kw, value in self.__EntityCls_PagmFields.items():
-            for _, field_setting in value.items():
-                index = field_setting["index"]
-                formater = field_setting["format"]
-                if "e" in formater:
-                    field_setting["format"] = formater.format(
-                        self.__EntityCls_CardFields[kw][index[0]][index[1]] - 7
-                    )
-                if "d" in formater:
-                    field_setting["format"] = formater.format(
-                        self.__EntityCls_CardFields[kw][index[0]][index[1]]
-                    )
-                if "s" in formater:
-                    field_setting["format"] = formater.format(
-                        self.__EntityCls_CardFields[kw][index[0]][index[1]]
-                    )
-                if "f" in formater:
-                    ...
-        self.entityclass_cardfields = MappingProxyType(self.__EntityCls_CardFields)
-        self.topoclass_cardfields = MappingProxyType(self.__EntityCls_CardFields)
-        self.entityclass_pagmfields = MappingProxyType(self.__EntityCls_PagmFields)
+        self.__publish_layout(*layout_tables(FORMAT_TYPE))
+
+    def __publish_layout(self, cardfields: dict, pagmfields: dict):
+        with self.__rwlock.write():
+            self.__EntityCls_CardFields = cardfields
+            self.__EntityCls_PagmFields = pagmfields
+            self.entityclass_cardfields = MappingProxyType(cardfields)
+            self.topoclass_cardfields = MappingProxyType(cardfields)
+            self.entityclass_pagmfields = MappingProxyType(pagmfields)
 
     def __repr__(self) -> str:
         lines = []
+        if self.__kw_buffer:
+            self.flush_kws()
         if self.__parsing_topo:
             lines.append("LsDynaEntity with:")
             for each in sum(self.__topocls_name__.values(), []):
@@ -1682,6 +2326,46 @@ class bl_keyfile:
         )
         return "\n".join(lines)
 
+    def __getstate__(self):
+        self.flush_kws()
+        state = {k: v for k, v in self.__dict__.items() if not isinstance(v, MappingProxyType)}
+        state["_bl_keyfile__filtercache"] = {}
+        state["_bl_keyfile__shm_topo"] = []
+        state.pop("_bl_keyfile__rwlock", None)
+        state.pop("_bl_keyfile__cow_owned", None)
+        state.pop("_bl_keyfile__cow_frames", None)
+        if "keywords" in state:
+            state["keywords"] = {
+                k: list.copy(v) if isinstance(v, bl_cowlist) else v
+                for k, v in self.keywords.items()
+            }
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__rwlock = bl_rwlock()
+        for _ec, _ep in layout_cache.values():
+            if self.__EntityCls_CardFields == _ec and self.__EntityCls_PagmFields == _ep:
+                self.__EntityCls_CardFields, self.__EntityCls_PagmFields = _ec, _ep
+                break
+        self.diff_kf = MappingProxyType(self.__diff_kf)
+        self.entityclass_cardfields = MappingProxyType(self.__EntityCls_CardFields)
+        self.topoclass_cardfields = MappingProxyType(self.__EntityCls_CardFields)
+        self.entityclass_pagmfields = MappingProxyType(self.__EntityCls_PagmFields)
+        _objs = [self.__ori_kw_order]
+        for v in getattr(self, "keywords", {}).values():
+            if isinstance(v, pd.DataFrame):
+                _objs.append(v["obj"].tolist() if "obj" in v else [])
+            else:
+                _objs.append(v)
+        for v in self.__diff_kf.values():
+            for d in v:
+                _v = next(iter(d.values())) if isinstance(d, dict) else d[1]
+                _objs.append(_v if isinstance(_v, list) else [_v])
+        for e in chain.from_iterable(_objs):
+            if "__str_cardsonly__" in getattr(e, "__dict__", {}):
+                e.__dict__["__outer_obj__"] = self
+
     @staticmethod
     def format_numeric2str(value: int | float, len_fomrat: int = 8):
         return format_numeric2str(value, len_fomrat)
@@ -1690,34 +2374,36 @@ class bl_keyfile:
         self, et_type: str, ids: list[int], field: str = "id", return_asdf: bool = 0
     ):
         data = []
-        if hasattr(self, et_type):
-            _dd = getattr(self, et_type)
-            for _k, _df in _dd.items():
-                if not self.acc_filterbycache:
-                    self.__filtercache = {}
-                if _k not in self.__filtercache.keys():
-                    self.__filtercache[_k] = _df.to_dict(orient="index")
-                _k_f = "_".join([_k, field])
-                if _k_f not in self.__filtercache.keys():
-                    ix_map = defaultdict(list)
-                    is_iterable = isinstance(_df[field].iloc[0], (list, tuple, np.ndarray))
-                    if is_iterable:
-                        for _ix, _r_ids in _df[field].to_dict().items():
-                            for _r_id in _r_ids:
+        if self.__kw_buffer:
+            self.flush_kws()
+        with self.__rwlock.read():
+            _cache = self.__filtercache if self.acc_filterbycache else {}
+            if hasattr(self, et_type):
+                _dd = getattr(self, et_type)
+                for _k, _df in _dd.items():
+                    if _k not in _cache.keys():
+                        _cache[_k] = _df.to_dict(orient="index")
+                    _k_f = "_".join([_k, field])
+                    if _k_f not in _cache.keys():
+                        ix_map = defaultdict(list)
+                        is_iterable = isinstance(_df[field].iloc[0], (list, tuple, np.ndarray))
+                        if is_iterable:
+                            for _ix, _r_ids in _df[field].to_dict().items():
+                                for _r_id in _r_ids:
+                                    ix_map[_r_id].append(_ix)
+                        else:
+                            for _ix, _r_id in _df[field].to_dict().items():
                                 ix_map[_r_id].append(_ix)
-                    else:
-                        for _ix, _r_id in _df[field].to_dict().items():
-                            ix_map[_r_id].append(_ix)
-                    self.__filtercache[_k_f] = {"_ex_ia": ix_map, "_ex_ix": ix_map.keys()}
-                _ex_ia = self.__filtercache[_k_f]["_ex_ia"]
-                _ex_ix = self.__filtercache[_k_f]["_ex_ix"]
-                _ex_dd = self.__filtercache[_k]
-                _index = sum([_ex_ia[i] for i in ids if i in _ex_ix], [])
-                pick = [_ex_dd[i] for i in _index]
-                if pick:
-                    if return_asdf:
-                        pick = pd.DataFrame(pick)
-                    data.append(pick)
+                        _cache[_k_f] = {"_ex_ia": ix_map, "_ex_ix": ix_map.keys()}
+                    _ex_ia = _cache[_k_f]["_ex_ia"]
+                    _ex_ix = _cache[_k_f]["_ex_ix"]
+                    _ex_dd = _cache[_k]
+                    _index = sum([_ex_ia[i] for i in ids if i in _ex_ix], [])
+                    pick = [_ex_dd[i] for i in _index]
+                    if pick:
+                        if return_asdf:
+                            pick = pd.DataFrame(pick)
+                        data.append(pick)
         return data
 
     def __read_kwstr__(self, kf_lines: list[str], only_pre=0):
@@ -1731,22 +2417,26 @@ class bl_keyfile:
             > 2
             and len(self.__EntityCls_CardFields["*ELEMENT_SOLID"]) > 1
         ):
-            self.__EntityCls_CardFields["*ELEMENT_SOLID"] = [[8] * 10]
-            self.__EntityCls_PagmFields["*ELEMENT_SOLID"] = {
-                "ID": {"index": [":", 0], "format": "", "info": "ID"},
-                "PID": {"index": [":", 1], "format": "", "info": "PART ID"},
-                "NIDS1": {"index": [":", "2:"], "format": "", "info": "节点"},
+            _ec = {**self.__EntityCls_CardFields, "*ELEMENT_SOLID": [[8] * 10]}
+            _ep = {
+                **self.__EntityCls_PagmFields,
+                "*ELEMENT_SOLID": {
+                    "ID": {"index": [":", 0], "format": "", "info": "ID"},
+                    "PID": {"index": [":", 1], "format": "", "info": "PART ID"},
+                    "NIDS1": {"index": [":", "2:"], "format": "", "info": "节点"},
+                },
             }
+            self.__publish_layout(_ec, _ep)
         if kw_title.endswith("_TITLE") and kw_title not in self.__EntityCls_CardFields.keys():
             _t_ref = kw_title.replace("_TITLE", "")
-            _ec = self.__EntityCls_CardFields
+            _ec = dict(self.__EntityCls_CardFields)
             _ec_k = _ec.keys()
             if _t_ref in _ec_k:
                 _ec[kw_title] = [[80]] + _ec[_t_ref]
             else:
                 _keys = sorted([x for x in _ec_k if _t_ref.startswith(x)], key=len, reverse=True)
                 _ec[kw_title] = ([[80]] + _ec[_keys[0]]) if _keys else [[80]]
-            _ep = self.__EntityCls_PagmFields
+            _ep = dict(self.__EntityCls_PagmFields)
             _ep_k = _ep.keys()
             if _t_ref in _ep_k:
                 _ep[kw_title] = copy.deepcopy(_ep[_t_ref])
@@ -1769,6 +2459,7 @@ class bl_keyfile:
                     else:
                         raise ValueError("关键字字段索引设置错误")
             _ep[kw_title].update({"NAME": {"index": [0, 0], "format": "", "info": "TITLE"}})
+            self.__publish_layout(_ec, _ep)
         if kw_title == "*KEYWORD" and any([x in kw_settings for x in ["=Y", "=S"]]):
             if "I10" in kw_settings:
                 self.__set_fieldconfig(FORMAT_TYPE="I10")
@@ -1816,33 +2507,48 @@ class bl_keyfile:
         kw_ranges = [(star_lines[i], star_lines[i + 1]) for i in range(len(star_lines) - 1)]
         return kf_lines, kw_ranges
 
+    def __read_kwblocks(self, kfilepath, preacc=1):
+        # 同批模型共用的包含文件按 (路径, mtime, size) 缓存切好的关键字块, 命中时不再读文件
+        _key = None
+        if self.__include_cache is not None:
+            _st = os.stat(kfilepath)
+            _key = (str(pathlib.Path(kfilepath).resolve()), _st.st_mtime_ns, _st.st_size)
+            _key += (self.encoding, preacc)
+            if _key in self.__include_cache:
+                return self.__include_cache[_key]
+        kf_lines = read_kf_lines(kfilepath, self.encoding)
+        if not kf_lines[0].startswith("*KEYWORD"):
+            raise ValueError("Missing *KEYWORD keyword")
+        star_lines = [index for index, line in enumerate(kf_lines) if line[0] == "*"]
+        star_lines = star_lines + [star_lines[-1] + 1]
+        kw_ranges = [(star_lines[i], star_lines[i + 1]) for i in range(len(star_lines) - 1)]
+        if preacc:
+            kf_lines, kw_ranges = self.__read_kwpreacc(kf_lines, kw_ranges)
+        kw_blocks = [kf_lines[_s:_e] for _s, _e in kw_ranges]
+        if _key is not None:
+            self.__include_cache[_key] = kw_blocks
+        return kw_blocks
+
     def read_kf(self, kfilepath, kwinkf=0, engine="bl", preacc=1):
         if engine == "bl":
-            with open(kfilepath, encoding=self.encoding) as file:
-                kf_lines = [line.upper() for line in file if line[0] != "$"]
-            if not kf_lines[0].startswith("*KEYWORD"):
-                raise ValueError("Missing *KEYWORD keyword")
-            star_lines = [index for index, line in enumerate(kf_lines) if line[0] == "*"]
-            star_lines = star_lines + [star_lines[-1] + 1]
-            kw_ranges = [(star_lines[i], star_lines[i + 1]) for i in range(len(star_lines) - 1)]
-            if preacc:
-                kf_lines, kw_ranges = self.__read_kwpreacc(kf_lines, kw_ranges)
+            kw_blocks = self.__read_kwblocks(kfilepath, preacc)
             kwinkf = kwinkf if kwinkf else {}
             if kwinkf:
                 kwinkf = kwinkf
-                _items = kw_ranges
+                _items = kw_blocks
             else:
                 kwinkf = {}
                 _items = tqdm(
-                    kw_ranges,
+                    kw_blocks,
                     desc="KW_ITEM ".ljust(30),
                     leave=True,
                     unit="",
                     bar_format="{l_bar}{bar:10}|     {n_fmt:>15}/{total_fmt:<16}",
                     disable=self.__show_pbar__,
                 )
-            for _s, _e in _items:
-                entity = self.__read_kwstr__(kf_lines=kf_lines[_s:_e])
+            for _block in _items:
+                entity = self.__read_kwstr__(kf_lines=_block)
+                entity.__dict__["__src_kf__"] = pathlib.Path(kfilepath)
                 _e_kw = entity.keyword
                 if _e_kw not in kwinkf.keys():
                     kwinkf[_e_kw] = [entity]
@@ -1881,6 +2587,7 @@ class bl_keyfile:
                                 path = pathlib.Path(kfilepath).parent / path
                             _include_kfs.append(path)
                     self.include_kfs.extend(_include_kfs)
+                    entity.__dict__["__inc_kfs__"] = _include_kfs
                     for include_kf in _include_kfs:
                         self.read_kf(include_kf, kwinkf)
             kwinkf["*KEYWORD"] = [kwinkf["*KEYWORD"][0]]
@@ -1913,6 +2620,65 @@ class bl_keyfile:
                     pbar.set_postfix_str(f"{len(_obj)}")
         return _obj
 
+    def __acc_parsetopo(self, kw_cards, widths, n_head=0, chunk=50000, bar_title=""):
+        # 子进程只做定宽切分; 超出前 n_head 个字段的首行按原文返回, 由调用方按串行规则解析
+        _text = "".join(
+            l if l.endswith("\n") else l + "\n" for _c in kw_cards for l in _c if l.strip()
+        ).encode(self.encoding)
+        _lpr = len(widths)
+        _nl = np.flatnonzero(np.frombuffer(_text, dtype=np.uint8) == 10)
+        _n = len(_nl) // _lpr
+        _shape = (_n, sum(len(w) for w in widths))
+        _tail = {}
+        if n_head:
+            _start = np.r_[0, _nl[:-1] + 1][::_lpr][:_n]
+            _end = _nl[::_lpr][:_n]
+            _rows = np.flatnonzero(_end - _start > sum(widths[0][:n_head])).tolist()
+            _tail = {i: _text[_start[i] : _end[i]].decode(self.encoding) for i in _rows}
+        num = self.__acc_parsebyprocess
+        num = psutil.cpu_count(logical=False) if num == 1 else int(num)
+        num = min(num, _n // chunk)
+        if num < 2:
+            return split_bywidth_array(_text, widths), _tail
+        _bounds = np.linspace(0, _n, num + 1).astype(np.int64).tolist()
+        _byte = [0] + (_nl[_lpr - 1 :: _lpr][:_n] + 1).tolist()
+        shm_i = shared_memory.SharedMemory(create=True, size=len(_text))
+        shm_o = shared_memory.SharedMemory(create=True, size=_shape[0] * _shape[1] * 8)
+        try:
+            shm_i.buf[: len(_text)] = _text
+            with ProcessPoolExecutor(max_workers=num) as executor:
+                futures = [
+                    executor.submit(
+                        parse_topo_shm,
+                        shm_i.name,
+                        _byte[a],
+                        _byte[b],
+                        widths,
+                        shm_o.name,
+                        a,
+                        _shape,
+                    )
+                    for a, b in zip(_bounds[:-1], _bounds[1:])
+                ]
+                with tqdm(
+                    total=len(futures),
+                    desc=f"    {bar_title.upper()} ".ljust(30),
+                    leave=False,
+                    unit="",
+                    bar_format="{l_bar}{bar:10}|     {n_fmt:>15}/{total_fmt:<16}",
+                    disable=self.__show_pbar__,
+                ) as pbar:
+                    for future in as_completed(futures):
+                        future.result()
+                        pbar.update(1)
+            _arr = np.ndarray(_shape, dtype=np.float64, buffer=shm_o.buf).copy()
+        finally:
+            shm_i.close()
+            shm_i.unlink()
+            shm_o.close()
+            shm_o.unlink()
+        return _arr, _tail
+
     def __create_nodes_batch(self, batch_data, kw_settings, progress_bar=0, bar_title=""):
         if progress_bar:
             batch_data = tqdm(
@@ -1923,7 +2689,7 @@ class bl_keyfile:
                 bar_format="{l_bar}{bar:10}|     {n_fmt:>15}/{total_fmt:<16}",
                 disable=self.__show_pbar__,
             )
-        return [LsDyna_NODE(self, **row, keyword_settings=kw_settings) for row in batch_data]
+        return self.__bulk_str(LsDyna_NODE, batch_data, kw_settings)
 
     def get_nodes(self, node_cardlines: list | str = "", kw_type="*NODE", is_init=1):
         self.__parsing_topo = 1
@@ -1963,17 +2729,25 @@ class bl_keyfile:
                     disable=self.__show_pbar__,
                 )
                 _f_f = lambda x: x if x.strip() else ""
-                _nodes = [
-                    list(map(_f_f, split_bywidth(_l, _cf_0)))
-                    for _c in _kw_c
-                    for _l in _f_b(_c)
-                    if _l
-                ]
-                nodes = pd.DataFrame([n[:4] for n in _nodes], columns=_d_c)
-                nodes["card1_add_fields"] = [
-                    {key: vars for key, vars in zip(["TC", "RC"], each)}
-                    for each in [x[4:] for x in _nodes]
-                ]
+                if self.__acc_parsebyprocess and not node_cardlines:
+                    _arr, _tail = self.__acc_parsetopo(_kw_c, [_cf_0], 4, bar_title=_kw_type)
+                    nodes = pd.DataFrame(_arr[:, :4], columns=_d_c)
+                    _add = [{} for _ in range(len(nodes))]
+                    for i, _l in _tail.items():
+                        _add[i] = dict(zip(["TC", "RC"], map(_f_f, split_bywidth(_l, _cf_0)[4:])))
+                    nodes["card1_add_fields"] = _add
+                else:
+                    _nodes = [
+                        list(map(_f_f, split_bywidth(_l, _cf_0)))
+                        for _c in _kw_c
+                        for _l in _f_b(_c)
+                        if _l
+                    ]
+                    nodes = pd.DataFrame([n[:4] for n in _nodes], columns=_d_c)
+                    nodes["card1_add_fields"] = [
+                        {key: vars for key, vars in zip(["TC", "RC"], each)}
+                        for each in [x[4:] for x in _nodes]
+                    ]
                 nodes["keyword"] = _kw_type
                 nodes["card_EX"] = ""
                 nodes = nodes.astype(
@@ -2019,7 +2793,32 @@ class bl_keyfile:
                 bar_format="{l_bar}{bar:10}|     {n_fmt:>15}/{total_fmt:<16}",
                 disable=self.__show_pbar__,
             )
-        return [cls(self, **row, keyword_settings=kw_settings) for row in batch_data]
+        return self.__bulk_str(cls, batch_data, kw_settings)
+
+    def __bulk_str(self, cls, batch_data, kw_settings, chunk=200000):
+        _rows = getattr(batch_data, "iterable", batch_data)
+        inner_state.bulk_str = 1
+        try:
+            objs = [cls(self, **row, keyword_settings=kw_settings) for row in batch_data]
+        finally:
+            inner_state.bulk_str = 0
+        if not objs:
+            return objs
+        objs[0].__set_str__()
+        _head = objs[0].str[: len(objs[0].str) - len(objs[0].str_cardsonly)]
+        _df = pd.DataFrame.from_records(_rows)
+        for i in range(0, len(objs), chunk):
+            _lines = self.__render_topo(objs[0].keyword, _df.iloc[i : i + chunk])
+            for _o, _s in zip(objs[i : i + chunk], np.char.decode(_lines, "utf-8").tolist()):
+                _o.__dict__.update(
+                    {
+                        "str": _head + _s,
+                        "str_cardsonly": _s,
+                        "__str_cardsonly__": _s,
+                        "cards": [x + "\n" for x in _s.split("\n") if x],
+                    }
+                )
+        return objs
 
     def get_elems(self, elem_cardlines: list | str = "", kw_type="*ELEMENT_SOLID", is_init=1):
         self.__parsing_topo = 1
@@ -2073,7 +2872,41 @@ class bl_keyfile:
                     if _l
                 ]
                 _f_u = lambda x: list(dict.fromkeys([_id for _id in x if _id]))
-                if _kw_type in ["*ELEMENT_SOLID"]:
+                if (
+                    self.__acc_parsebyprocess
+                    and not elem_cardlines
+                    and _kw_type in ["*ELEMENT_SOLID", "*ELEMENT_SHELL", "*ELEMENT_BEAM"]
+                ):
+                    _cf = self.__EntityCls_CardFields[_kw_type]
+                    _ws = (
+                        [_cf[-1][:2], _cf[-1]] if "SOLID" in _kw_type and len(_cf) > 1 else [_cf[0]]
+                    )
+                    _n_h = 4 if "BEAM" in _kw_type else 0
+                    _arr, _tail = self.__acc_parsetopo(_kw_c, _ws, _n_h, bar_title=_kw_type)
+                    _ids = np.nan_to_num(_arr, nan=0).astype(np.int64)
+                    elems = pd.DataFrame(_ids[:, :2], columns=["id", "id_part"])
+                    if "BEAM" in _kw_type:
+                        elems["id_nodes"] = _ids[:, 2:4].tolist()
+                        _add = [{} for _ in range(len(elems))]
+                        for i, _l in _tail.items():
+                            _add[i] = dict(
+                                zip(
+                                    ["N3", "RT1", "RR1", "RT2", "RR2", "LOCAL"],
+                                    map(_f_f, split_bywidth(_l, _cf[0])[4:]),
+                                )
+                            )
+                        elems["card1_add_fields"] = _add
+                    else:
+                        _m = _ids[:, 2:]
+                        for j in range(1, _m.shape[1]):
+                            _m[(_m[:, :j] == _m[:, j : j + 1]).any(axis=1), j] = 0
+                        _keep = _m != 0
+                        elems["id_nodes"] = [
+                            x.tolist() for x in np.split(_m[_keep], np.cumsum(_keep.sum(1))[:-1])
+                        ]
+                    elems["keyword"] = _kw_type
+                    elems["card_EX"] = ""
+                elif _kw_type in ["*ELEMENT_SOLID"]:
                     _cf_0 = self.__EntityCls_CardFields[_kw_type][-1]
                     _elems = _f_r(_cf_0)
                     if len(self.__EntityCls_CardFields[_kw_type]) > 1:
@@ -2086,7 +2919,7 @@ class bl_keyfile:
                         )
                     elems["keyword"] = _kw_type
                     elems["card_EX"] = ""
-                if _kw_type in ["*ELEMENT_SOLID_H20"]:
+                elif _kw_type in ["*ELEMENT_SOLID_H20"]:
                     _cf_0 = self.__EntityCls_CardFields[_kw_type][1]
                     _elems = _f_r(_cf_0)
                     elems = pd.DataFrame(_elems[::3], columns=["id", "id_part"])
@@ -2095,7 +2928,7 @@ class bl_keyfile:
                     ]
                     elems["keyword"] = _kw_type
                     elems["card_EX"] = [_l for _c in _kw_c for _l in _c[1::2]]
-                if _kw_type in ["*ELEMENT_SHELL", "*ELEMENT_SHELL_THICKNESS"]:
+                elif _kw_type in ["*ELEMENT_SHELL", "*ELEMENT_SHELL_THICKNESS"]:
                     _cf_0 = self.__EntityCls_CardFields[_kw_type][0]
                     if _kw_type in ["*ELEMENT_SHELL_THICKNESS"]:
                         _f_r = lambda _cf_0: [
@@ -2110,7 +2943,7 @@ class bl_keyfile:
                     elems["card_EX"] = ""
                     if _kw_type in ["*ELEMENT_SHELL_THICKNESS"]:
                         elems["card_EX"] = [_l for _c in _kw_c for _l in _c[1::2]]
-                if _kw_type in [
+                elif _kw_type in [
                     "*ELEMENT_BEAM",
                     "*ELEMENT_BEAM_OFFSET",
                     "*ELEMENT_BEAM_ORIENTATION",
@@ -2532,10 +3365,12 @@ class bl_keyfile:
         parameters["vals_n"] = parameters["vals_s"].apply(_f_f)
         self.parameters = parameters
 
+    @kf_locked("write")
     def remove_kw(self, kw: str, at_index: int):
         if self.keywords.get(kw, False) is not False and at_index < len(self.keywords[kw]):
             _kw_container = self.keywords[kw]
             if kw in sum(self.__topocls_name__.values(), []):
+                _kw_container = self.__own_frame(kw)
                 _delkw = _kw_container.iloc[at_index]
                 _kw_container.drop(at_index, axis=0, inplace=True)
                 _kw_container.reset_index(drop=True, inplace=True)
@@ -2558,11 +3393,13 @@ class bl_keyfile:
         _pd_newcols["obj"] = newkwobj
         return _pd_newcols
 
+    @kf_locked("write")
     def insert_kw(self, newkwobj, at_index, method: str = "add"):
         kw = newkwobj.keyword
         if self.keywords.get(kw, False) is not False and at_index < len(self.keywords[kw]):
             _kw_container = self.keywords[kw]
             if kw in sum(self.__topocls_name__.values(), []):
+                _kw_container = self.__own_frame(kw)
                 if method == "add":
                     _pd_newkw = self.__update_kwdf__(newkwobj)
                     addindex = _kw_container.index.max() + (
@@ -2588,7 +3425,7 @@ class bl_keyfile:
         else:
             __end = {"*END": []}
             if self.keywords.get("*END", False):
-                __end = self.keywords.pop("*END")
+                __end = {"*END": self.keywords.pop("*END")}
             self.keywords.update({kw: [newkwobj]})
             self.keywords.update(__end)
             self.__ori_kw_order.insert(-1, newkwobj)
@@ -2596,35 +3433,866 @@ class bl_keyfile:
         self.__diff_kf[method].append({kw: newkwobj})
         return {method: {"at_index": at_index, "keyword": kw, "obj": newkwobj}}
 
-    def save_kf(self, path=0):
-        if path:
-            path = pathlib.Path(path)
+    def __topo_kwdf(self, kw, data, kw_settings=""):
+        _cate = TopoAttrMap[{v: k for k, vs in TopoClsMap.items() for v in vs}[kw]]
+        if isinstance(data, (np.ndarray, dict, pd.DataFrame)):
+            if _cate not in ["nodes", "elems"]:
+                raise ValueError(f"{kw} 只能以对象列表批量插入")
+            if isinstance(data, np.ndarray):
+                data = np.atleast_2d(data)
+                if _cate == "nodes":
+                    data = {"id": data[:, 0], "x": data[:, 1], "y": data[:, 2], "z": data[:, 3]}
+                else:
+                    data = {"id": data[:, 0], "id_part": data[:, 1], "id_nodes": data[:, 2:]}
+            _df = pd.DataFrame({k: v for k, v in dict(data).items() if k != "id_nodes"})
+            if _cate == "nodes":
+                _df = _df.astype(
+                    dtype={"id": "int32", "x": "float64", "y": "float64", "z": "float64"}
+                )
+                if "card1_add_fields" not in _df:
+                    _df["card1_add_fields"] = [{}] * len(_df)
+            else:
+                _df["id_nodes"] = [[int(i) for i in x if i] for x in np.asarray(data["id_nodes"])]
+                _df = _df.astype(dtype={"id": "int32", "id_part": "int32"})
+                if "BEAM" in kw and "card1_add_fields" not in _df:
+                    _df["card1_add_fields"] = [
+                        {"N3": x[2]} if x[2:] else {} for x in _df["id_nodes"]
+                    ]
+                    _df["id_nodes"] = [x[:2] for x in _df["id_nodes"]]
+            _df["keyword"] = kw
+            if "card_EX" not in _df:
+                _df["card_EX"] = ""
+            data_dicts = _df.to_dict(orient="records")
+            if _cate == "nodes":
+                _df["obj"] = self.__create_nodes_batch(data_dicts, kw_settings)
+            else:
+                if "SOLID" in kw:
+                    _cls = LsDyna_ELEMENT_SOLID
+                elif "SHELL" in kw:
+                    _cls = LsDyna_ELEMENT_SHELL
+                else:
+                    _cls = LsDyna_ELEMENT_BEAM
+                _df["obj"] = self.__create_elems_batch(_cls, data_dicts, kw_settings)
         else:
-            path = self.kfilepath or (pathlib.Path(os.getcwd()).resolve() / "test.k")
-            path = path.with_name(
-                path.stem + time.strftime("_%Y_%m_%d_%H_%M_%S", time.localtime()) + ".k"
-            )
-        with open(path, "w") as file:
-            if self.__parsing_topo:
-                passed_k = []
-                for _kw_e in self.__ori_kw_order:
-                    k = _kw_e.keyword
-                    if k in sum(
-                        [
-                            self.__topocls_name__[x]
-                            for x in ["nodes", "elems"]
-                            if self.__topocls_name__.get(x, False)
-                        ],
-                        [],
-                    ):
+            if _cate == "nodes":
+                _rows = [
+                    {
+                        "id": o.id,
+                        "x": o.x,
+                        "y": o.y,
+                        "z": o.z,
+                        "card1_add_fields": dict(zip(["TC", "RC"], o.card1_add_fields)),
+                        "keyword": o.keyword,
+                        "card_EX": o.card_EX,
+                        "obj": o,
+                    }
+                    for o in data
+                ]
+                _df = pd.DataFrame(_rows).astype(dtype={"id": "int32"})
+            elif _cate == "elems":
+                _rows = [
+                    {
+                        "id": o.id,
+                        "id_part": o.id_part,
+                        "id_nodes": list(o.id_nodes),
+                        **(
+                            {
+                                "card1_add_fields": dict(
+                                    zip(
+                                        ["N3", "RT1", "RR1", "RT2", "RR2", "LOCAL"],
+                                        o.card1_add_fields,
+                                    )
+                                )
+                            }
+                            if "BEAM" in kw
+                            else {}
+                        ),
+                        "keyword": o.keyword,
+                        "card_EX": o.card_EX,
+                        "obj": o,
+                    }
+                    for o in data
+                ]
+                _df = pd.DataFrame(_rows).astype(dtype={"id": "int32", "id_part": "int32"})
+            else:
+                _df = pd.concat([self.__update_kwdf__(o) for o in data], ignore_index=True)
+        return _cate, _df
+
+    @kf_locked("write")
+    def insert_kws(self, kw: str, objs_or_arrays, flush: bool = 1):
+        kw = kw.upper()
+        if kw not in sum(self.__topocls_name__.values(), []):
+            raise ValueError(f"{kw} 不是已解析的拓扑关键字")
+        _kw_c = self.keywords.get(kw, None)
+        kw_settings = ""
+        if isinstance(_kw_c, pd.DataFrame) and len(_kw_c):
+            kw_settings = _kw_c["obj"].iloc[0].keyword_settings
+        _cate, _df = self.__topo_kwdf(kw, objs_or_arrays, kw_settings)
+        if not len(_df):
+            return {"add": {"keyword": kw, "obj": []}}
+        _ids = np.concatenate(
+            [_df["id"].to_numpy()]
+            + ([_kw_c["id"].to_numpy()] if isinstance(_kw_c, pd.DataFrame) else [])
+            + [x["id"].to_numpy() for x in self.__kw_buffer[kw]]
+        )
+        if len(_ids) != len(np.unique(_ids)):
+            print(f"Warning: {len(_ids) - len(np.unique(_ids))} duplicated ID in {kw}")
+        if not isinstance(_kw_c, pd.DataFrame):
+            __end = {"*END": []}
+            if self.keywords.get("*END", False):
+                __end = {"*END": self.keywords.pop("*END")}
+            self.keywords[kw] = _df.iloc[:0]
+            self.keywords.update(__end)
+            self.__ori_kw_order.insert(-1, _df["obj"].iloc[0])
+        self.__kw_buffer[kw].append(_df)
+        self.__diff_kf["add"].append({kw: _df["obj"].tolist()})
+        if flush and not self.__kw_batch:
+            self.flush_kws(kw)
+        return {"add": {"keyword": kw, "obj": _df["obj"].tolist()}}
+
+    @contextlib.contextmanager
+    def batch(self):
+        # 批量插入期间缓存 insert_kws 的新行, 退出时一次合并
+        self.__kw_batch += 1
+        try:
+            yield self
+        finally:
+            self.__kw_batch -= 1
+            if not self.__kw_batch:
+                self.flush_kws()
+
+    @kf_locked("write")
+    def flush_kws(self, kw: str = ""):
+        _reverse = {v: k for k, vs in TopoClsMap.items() for v in vs}
+        for _kw in [kw] if kw else list(self.__kw_buffer.keys()):
+            _buf = self.__kw_buffer.pop(_kw, [])
+            if not _buf:
+                continue
+            _df = pd.concat([self.keywords[_kw], *_buf], axis=0, ignore_index=True)
+            _cate = TopoAttrMap[_reverse[_kw]]
+            _dd = getattr(self, _cate, {})
+            _dd = _dd if isinstance(_dd, dict) else {}
+            self.keywords[_kw] = _dd[_kw] = _df
+            setattr(self, _cate, _dd)
+            self.__filtercache = {}
+
+    @kf_locked("write")
+    def remove_kws(self, kw: str, ids, drop_orphan_nodes: bool = 0):
+        kw = kw.upper()
+        self.flush_kws()
+        _kw_c = self.keywords.get(kw, None)
+        if not isinstance(_kw_c, pd.DataFrame):
+            return "删除失败"
+        _mask = _kw_c["id"].isin(np.asarray(ids, dtype=np.int64)).to_numpy()
+        _delkw = _kw_c[_mask]
+        _df = _kw_c[~_mask].reset_index(drop=True)
+        _reverse = {v: k for k, vs in TopoClsMap.items() for v in vs}
+        _cate = TopoAttrMap[_reverse[kw]]
+        _dd = getattr(self, _cate)
+        if len(_df):
+            self.keywords[kw] = _dd[kw] = _df
+        else:
+            self.keywords.pop(kw)
+            _dd.pop(kw)
+            self.__ori_kw_order = [x for x in self.__ori_kw_order if x.keyword != kw]
+        self.__diff_kf["del"].append({kw: _delkw["obj"].tolist()})
+        self.__filtercache = {}
+        result = {"del": _delkw["obj"].tolist()}
+        if drop_orphan_nodes and _cate == "elems" and len(_delkw):
+            _f_n = lambda x: np.fromiter((i for e in x for i in e), dtype=np.int64)
+            _used = [_f_n(v["id_nodes"]) for v in self.elems.values()]
+            _orphan = np.setdiff1d(
+                _f_n(_delkw["id_nodes"]),
+                np.concatenate(_used) if _used else [],
+                assume_unique=False,
+            )
+            if len(_orphan) and isinstance(self.keywords.get("*NODE", None), pd.DataFrame):
+                result["del_nodes"] = self.remove_kws("*NODE", _orphan)["del"]
+        return result
+
+    @kf_locked("write")
+    def morph_nodes(
+        self, ids=None, displacements=None, control=None, control_disp=None, method="rbf"
+    ):
+        self.flush_kws()
+        _df = self.keywords["*NODE"]
+        _xyz = _df[["x", "y", "z"]].to_numpy(dtype=np.float64)
+        _mask = np.ones(len(_df), dtype=bool) if ids is None else _df["id"].isin(ids).to_numpy()
+        _pts = _xyz[_mask]
+        if control is None:
+            _disp = np.broadcast_to(np.asarray(displacements, dtype=np.float64), _pts.shape)
+        else:
+            control = np.asarray(control)
+            if control.ndim == 1:
+                _c_ix = pd.Index(_df["id"]).get_indexer(control)
+                if (_c_ix < 0).any():
+                    raise KeyError(f"控制点 {control[_c_ix < 0].tolist()} 不在*NODE中")
+                control = _xyz[_c_ix]
+            control = control.astype(np.float64)
+            control_disp = np.broadcast_to(
+                np.asarray(control_disp, dtype=np.float64), control.shape
+            )
+            if method == "rbf":
+                _phi = lambda r: r**3
+            elif method == "linear":
+                _phi = lambda r: r
+            else:
+                raise ValueError(f"不支持的插值方法 {method}")
+            _m = len(control)
+            _dist = lambda a, b: np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(-1))
+            _poly = lambda a: np.hstack([np.ones((len(a), 1)), a])
+            _A = np.zeros((_m + 4, _m + 4))
+            _A[:_m, :_m] = _phi(_dist(control, control))
+            _A[:_m, _m:] = _poly(control)
+            _A[_m:, :_m] = _poly(control).T
+            _b = np.vstack([control_disp, np.zeros((4, 3))])
+            _w = np.linalg.lstsq(_A, _b, rcond=None)[0]
+            _disp = np.empty_like(_pts)
+            _chunk = max(1, 2**24 // (_m + 4))
+            for i in range(0, len(_pts), _chunk):
+                _p = _pts[i : i + _chunk]
+                _disp[i : i + _chunk] = _phi(_dist(_p, control)) @ _w[:_m] + _poly(_p) @ _w[_m:]
+        _new = _pts + _disp
+        _df = _df.copy()
+        _df.loc[_mask, ["x", "y", "z"]] = _new
+        _objs = _df["obj"].to_numpy(copy=True)
+        _ix = np.flatnonzero(_mask)
+        for i, (x, y, z) in zip(_ix, _new.tolist()):
+            _n = copy.copy(_objs[i])
+            _n.__dict__.update({"__outer_obj__": self, "x": x, "y": y, "z": z})
+            _objs[i] = _n
+        self.__restr_topo("*NODE", _df.iloc[_ix], _objs[_ix])
+        _df["obj"] = _objs
+        self.keywords["*NODE"] = self.nodes["*NODE"] = _df
+        self.__diff_kf["mod"].append(["*NODE", _objs[_mask].tolist()])
+        self.__filtercache = {}
+        return _disp
+
+    def clone(self):
+        self.flush_kws()
+        new_obj = self.__class__.__new__(self.__class__)
+        new_obj.__dict__.update(self.__dict__)
+        new_obj.keywords = {
+            k: v.copy(deep=False) if isinstance(v, pd.DataFrame) else bl_cowlist(v, new_obj)
+            for k, v in self.keywords.items()
+        }
+        if int(pd.__version__.split(".")[0]) < 3:
+            # 无写时复制的 pandas 上, 共享数组的表在首次原地写入前复制
+            _shared = self.__dict__.setdefault("_bl_keyfile__cow_frames", set())
+            _shared.update(id(v) for v in self.keywords.values() if isinstance(v, pd.DataFrame))
+            new_obj.__cow_frames = {
+                id(v) for v in new_obj.keywords.values() if isinstance(v, pd.DataFrame)
+            }
+        for _df in new_obj.keywords.values():
+            if isinstance(_df, pd.DataFrame) and "obj" in _df:
+                _df["obj"] = [bl_cowref(o, new_obj) for o in _df["obj"].tolist()]
+        for _cate in TopoAttrMap.values():
+            _dd = getattr(self, _cate, None)
+            if isinstance(_dd, dict):
+                _f_c = lambda k, v: (
+                    new_obj.keywords[k]
+                    if isinstance(new_obj.keywords.get(k, None), pd.DataFrame)
+                    else v.copy(deep=False)
+                )
+                setattr(new_obj, _cate, {k: _f_c(k, v) for k, v in _dd.items()})
+        for _attr in ["mats", "sections", "parameters"]:
+            if hasattr(self, _attr):
+                setattr(new_obj, _attr, getattr(self, _attr).copy())
+        new_obj.__ori_kw_order = list(map(cow_target, self.__ori_kw_order))
+        _shares = {}
+        for _e in chain(
+            new_obj.__ori_kw_order,
+            *(list.__iter__(v) for v in new_obj.keywords.values() if isinstance(v, bl_cowlist)),
+            *(
+                map(cow_target, v["obj"].tolist())
+                for v in new_obj.keywords.values()
+                if isinstance(v, pd.DataFrame) and "obj" in v
+            ),
+        ):
+            _old = _e.__dict__.get("__cow_share__")
+            if id(_old) not in _shares:
+                _shares[id(_old)] = weakref.WeakSet([*(_old or ()), self, new_obj])
+            _e.__dict__["__cow_share__"] = _shares[id(_old)]
+        new_obj.__diff_kf = {"add": [], "del": [], "mod": []}
+        new_obj.diff_kf = MappingProxyType(new_obj.__diff_kf)
+        new_obj.__filtercache = {}
+        new_obj.__kw_buffer = defaultdict(list)
+        new_obj.__kw_batch = 0
+        new_obj.__cow_owned = {}
+        new_obj.__shm_topo = []
+        new_obj.__rwlock = bl_rwlock()
+        new_obj.__topocls_name__ = copy.deepcopy(self.__topocls_name__)
+        new_obj.include_kfs = list(self.include_kfs)
+        new_obj.__publish_layout(self.__EntityCls_CardFields, self.__EntityCls_PagmFields)
+        return new_obj
+
+    def __cow_adopt(self, entity):
+        _owned = self.__dict__.setdefault("_bl_keyfile__cow_owned", {})
+        if id(entity) in _owned:
+            return _owned[id(entity)][1]
+        _e = copy.copy(entity)
+        _e.__dict__["__outer_obj__"] = self
+        _owned[id(entity)] = (entity, _e)
+        _c = self.keywords.get(entity.keyword, None)
+        if isinstance(_c, bl_cowlist):
+            _ix = next((i for i, x in enumerate(list.__iter__(_c)) if x is entity), -1)
+            if _ix >= 0:
+                list.__setitem__(_c, _ix, _e)
+        _ix = next((i for i, x in enumerate(self.__ori_kw_order) if x is entity), -1)
+        if _ix >= 0:
+            self.__ori_kw_order[_ix] = _e
+        return _e
+
+    def __own_frame(self, kw):
+        _df = self.keywords[kw]
+        _shared = self.__dict__.get("_bl_keyfile__cow_frames", ())
+        if id(_df) not in _shared:
+            return _df
+        _shared.discard(id(_df))
+        self.keywords[kw] = _df.copy(deep=True)
+        for _cate in TopoAttrMap.values():
+            _dd = getattr(self, _cate, None)
+            if isinstance(_dd, dict) and _dd.get(kw) is _df:
+                _dd[kw] = self.keywords[kw]
+        return self.keywords[kw]
+
+    def share_topo(self):
+        self.flush_kws()
+        self.unshare_topo()
+        handle = {}
+        for kw, _df in self.keywords.items():
+            if kw not in TopoClsMap["nodes"] + TopoClsMap["elems"]:
+                continue
+            if not isinstance(_df, pd.DataFrame):
+                continue
+            if kw in TopoClsMap["nodes"]:
+                _arrs = {
+                    "id": _df["id"].to_numpy(dtype=np.int64),
+                    "xyz": _df[["x", "y", "z"]].to_numpy(dtype=np.float64),
+                }
+            else:
+                _nl = _df["id_nodes"].tolist()
+                _lens = np.fromiter(map(len, _nl), dtype=np.int64, count=len(_nl))
+                _mat = np.zeros((len(_nl), int(_lens.max()) if len(_nl) else 0), dtype=np.int64)
+                _mat[np.arange(_mat.shape[1]) < _lens[:, None]] = np.fromiter(
+                    chain.from_iterable(_nl), dtype=np.int64, count=int(_lens.sum())
+                )
+                _arrs = {
+                    "id": _df["id"].to_numpy(dtype=np.int64),
+                    "id_part": _df["id_part"].to_numpy(dtype=np.int64),
+                    "id_nodes": _mat,
+                }
+            handle[kw] = {}
+            for col, a in _arrs.items():
+                shm = shared_memory.SharedMemory(create=True, size=max(a.nbytes, 1))
+                np.ndarray(a.shape, dtype=a.dtype, buffer=shm.buf)[...] = a
+                self.__shm_topo.append(shm)
+                handle[kw][col] = (shm.name, a.shape, a.dtype.str)
+        return handle
+
+    def unshare_topo(self):
+        for shm in self.__shm_topo:
+            shm.close()
+            shm.unlink()
+        self.__shm_topo = []
+
+    def collect_ids(self, et_type: str):
+        _ids = []
+        if self.__kw_buffer:
+            self.flush_kws()
+        if et_type in ["mats", "sections"]:
+            if isinstance(getattr(self, et_type, None), pd.DataFrame):
+                _ids.append(getattr(self, et_type)["id"].to_numpy())
+        else:
+            _dd = getattr(self, et_type, {})
+            if isinstance(_dd, dict):
+                _ids.extend([_df["id"].to_numpy() for _df in _dd.values()])
+        if et_type == "parts":
+            for k, v in self.keywords.items():
+                if k.startswith("*PART_") and isinstance(v, list):
+                    _ids.append(np.array(sum([shift_bypagm(e, "PID") for e in v], [])))
+        for k, field in EntityCls_IdOwners.get(et_type, {}).items():
+            if isinstance(self.keywords.get(k), list):
+                _ids.append(np.array(sum([shift_bypagm(e, field) for e in self.keywords[k]], [])))
+        if et_type == "contacts":
+            for k, v in self.keywords.items():
+                if k.startswith("*CONTACT_") and isinstance(v, list):
+                    _ids.append(np.array(sum([shift_contact_id(e) for e in v], [])))
+        if not _ids:
+            return np.array([], dtype=np.int64)
+        return np.unique(np.concatenate(_ids).astype(np.int64))
+
+    @kf_locked("write")
+    def merge(self, other, offsets: str | int | dict = "auto"):
+        if not (self.__parsing_topo and other._bl_keyfile__parsing_topo):
+            raise ValueError("合并的两个模型都需要解析拓扑")
+        self.flush_kws()
+        other.flush_kws()
+        _cates = ["nodes", "elems", "parts", "mats", "sections", "sets", "curves"]
+        _cates += [*EntityCls_IdOwners, "contacts"]
+        if isinstance(offsets, dict):
+            offsets = {k: offsets.get(k, 0) for k in _cates}
+        else:
+            offsets = {k: offsets for k in _cates}
+        for k in _cates:
+            _ids_s, _ids_o = self.collect_ids(k), other.collect_ids(k)
+            if offsets[k] == "auto":
+                offsets[k] = 0
+                if np.intersect1d(_ids_s, _ids_o, assume_unique=True).size:
+                    offsets[k] = 10 ** math.ceil(math.log10(int(_ids_s.max() - _ids_o.min() + 1)))
+            offsets[k] = int(offsets[k])
+            _nz = _ids_o[_ids_o != 0]
+            if len(_nz) and offsets[k]:
+                _lo, _hi = int(_nz.min()) + offsets[k], int(_nz.max()) + offsets[k]
+                if _lo < 1 or _hi > np.iinfo(np.int32).max:
+                    raise ValueError(f"{k} 偏移 {offsets[k]} 后ID范围 [{_lo}, {_hi}] 超出 int32")
+            _n_c = np.intersect1d(_ids_s, _ids_o + offsets[k], assume_unique=True).size
+            if _n_c:
+                raise ValueError(f"{k} 偏移 {offsets[k]} 后仍有 {_n_c} 个ID冲突")
+        _f_s = lambda x, o: x + o if (o and isinstance(x, int) and x) else x
+        _set_ref = {"*SET_NODE": "nodes", "*SET_PART": "parts", "*SET_SHELL": "elems"}
+        _reverse = {v: k for k, vs in TopoClsMap.items() for v in vs}
+        _kw_skip = ["*KEYWORD", "*END", *self.__include_kw]
+        _ori_map, _unknown = {}, set()
+        __end = self.keywords.pop("*END", [])
+        for kw, _kw_c in other.keywords.items():
+            if kw in _kw_skip:
+                continue
+            if isinstance(_kw_c, pd.DataFrame):
+                _cate = TopoAttrMap[_reverse[kw]]
+                _df = _kw_c.copy()
+                _o_i = offsets[_cate]
+                if _o_i:
+                    _df["id"] = (_df["id"].to_numpy(dtype=np.int64) + _o_i).astype("int32")
+                if _cate == "elems":
+                    if offsets["parts"]:
+                        _df["id_part"] = (
+                            _df["id_part"].to_numpy(dtype=np.int64) + offsets["parts"]
+                        ).astype("int32")
+                    if offsets["nodes"] and "card1_add_fields" in _df:
+                        _df["card1_add_fields"] = [
+                            {**d, "N3": _f_s(d["N3"], offsets["nodes"])} if "N3" in d else d
+                            for d in _df["card1_add_fields"]
+                        ]
+                    if offsets["nodes"]:
+                        _lens = _df["id_nodes"].apply(len).to_numpy()
+                        _flat = np.fromiter(
+                            (i for x in _df["id_nodes"] for i in x),
+                            dtype=np.int64,
+                            count=_lens.sum(),
+                        )
+                        _flat = np.where(_flat != 0, _flat + offsets["nodes"], 0)
+                        _df["id_nodes"] = [
+                            x.tolist() for x in np.split(_flat, np.cumsum(_lens)[:-1])
+                        ]
+                if _cate == "parts":
+                    for col, ref in [["id_sec", "sections"], ["id_mat", "mats"]]:
+                        _df[col] = _df[col].apply(lambda x: _f_s(x, offsets[ref]))
+                    if offsets["hgids"]:
+                        _df["card2_add_fields"] = [
+                            {**d, "HGID": _f_s(d["HGID"], offsets["hgids"])} if "HGID" in d else d
+                            for d in _df["card2_add_fields"]
+                        ]
+                if _cate == "sets":
+                    _o_n = offsets[
+                        next((v for k, v in _set_ref.items() if kw.startswith(k)), "sets")
+                    ]
+                    _df["nids"] = _df["nids"].apply(
+                        lambda x: [[_f_s(i, _o_n) for i in l] for l in x]
+                    )
+                _rel = {"elems": ["parts", "nodes"], "parts": ["sections", "mats", "hgids"]}
+                _rel = [_cate, *_rel.get(_cate, [])] + (
+                    list(_set_ref.values()) if _cate == "sets" else []
+                )
+                _rerender = any(offsets[x] for x in _rel)
+                _objs = []
+                for _e, row in zip(_df["obj"], _df.to_dict(orient="records")):
+                    _n = copy.copy(_e)
+                    _n.__dict__["__outer_obj__"] = self
+                    _objs.append(_n)
+                    if not _rerender:
+                        continue
+                    _n.__dict__["id"] = row["id"]
+                    if _cate == "elems":
+                        _n.__dict__["id_part"] = row["id_part"]
+                        _n.__dict__["id_nodes"] = list(row["id_nodes"])
+                        _n.__dict__["__id_nodes__"] = reshape_idnodes(kw, _n.id_nodes)
+                        if "card1_add_fields" in _n.__dict__:
+                            _n.__dict__["card1_add_fields"] = [
+                                _f_s(_n.card1_add_fields[0], offsets["nodes"]),
+                                *_n.card1_add_fields[1:],
+                            ]
+                    if _cate == "parts":
+                        _n.__dict__["id_sec"] = row["id_sec"]
+                        _n.__dict__["id_mat"] = row["id_mat"]
+                        _n.__dict__["card2_add_fields"] = [
+                            _f_s(x, offsets["hgids"]) if i == 1 else x
+                            for i, x in enumerate(_n.card2_add_fields)
+                        ]
+                    if _cate == "sets":
+                        _n.__dict__["nids"] = row["nids"]
+                    if _cate not in ["nodes", "elems"]:
+                        _n.__set_str__()
+                if _rerender:
+                    if _cate in ["nodes", "elems"]:
+                        self.__restr_topo(kw, _df, _objs)
+                    for _n in _objs:
+                        _n.__dict__["__str_cardsonly__"] = _n.str_cardsonly
+                _df["obj"] = _objs
+                _dd = getattr(self, _cate, {})
+                _dd = _dd if isinstance(_dd, dict) else {}
+                if isinstance(self.keywords.get(kw, None), pd.DataFrame):
+                    _df = pd.concat([self.keywords[kw], _df], axis=0, ignore_index=True)
+                else:
+                    _e_o = next(e for e in other._bl_keyfile__ori_kw_order if e.keyword == kw)
+                    _ori_map[id(_e_o)] = copy.copy(_e_o)
+                    _ori_map[id(_e_o)].__dict__["__outer_obj__"] = self
+                    self.__topocls_name__.update({_reverse[kw]: TopoClsMap[_reverse[kw]]})
+                self.keywords[kw] = _df
+                _dd[kw] = _df
+                setattr(self, _cate, _dd)
+            else:
+                _ref = [
+                    x
+                    for x in EntityCls_RefFields
+                    if kw == x or (x.endswith("_") and kw.startswith(x))
+                ]
+                _ref = EntityCls_RefFields[max(_ref, key=len)] if _ref else {}
+                _typed = [v for x, v in EntityCls_TypedRefs.items() if kw.startswith(x)]
+                if not (_ref or _typed) and any(kw.startswith(x) for x in EntityCls_RefPrefix):
+                    _unknown.add(kw)
+                _objs = []
+                for _e in list.copy(_kw_c):
+                    _n = copy.copy(_e)
+                    _n.__dict__["__outer_obj__"] = self
+                    for field, ref in _ref.items():
+                        if field in _n._pagmfield:
+                            shift_bypagm(_n, field, offsets[ref])
+                    for refs in _typed:
+                        shift_typed(_n, refs, offsets)
+                    if kw.startswith("*CONTACT_"):
+                        shift_contact_id(_n, offsets["contacts"])
+                    _n.__set_str__()
+                    _n.__dict__["__str_cardsonly__"] = _n.str_cardsonly
+                    _ori_map[id(_e)] = _n
+                    _objs.append(_n)
+                self.keywords.setdefault(kw, []).extend(_objs)
+            self.__diff_kf["add"].append({kw: _objs})
+        if __end:
+            self.keywords["*END"] = __end
+        if _unknown and any(offsets.values()):
+            print(f"Warning: {sorted(_unknown)} 中的ID引用未知, 合并后未做偏移, 请检查")
+        _ix = len(self.__ori_kw_order)
+        if _ix and self.__ori_kw_order[-1].keyword == "*END":
+            _ix -= 1
+        self.__ori_kw_order[_ix:_ix] = [
+            _ori_map[id(e)] for e in other._bl_keyfile__ori_kw_order if id(e) in _ori_map
+        ]
+        self.include_kfs.extend(other.include_kfs)
+        self.__filtercache = {}
+        self.collect_PARAMETER()
+        self.collect_portion_MAT()
+        self.collect_portion_SECTION()
+        return offsets
+
+    def __render_topo(self, k, df):
+        _cf = self.__EntityCls_CardFields[k]
+        _fa = lambda v, w: format_array2str(v, w, dtype="S")
+        _add = np.char.add
+        _n = len(df)
+
+        def __f_add(col, keys, func, widths):
+            col = col.tolist()
+            result = np.full(len(col), b"", dtype=f"S{sum(widths)}")
+            for key, w in zip(keys, widths):
+                _v = list(map(dict.get, col, repeat(key), repeat("")))
+                _ix = np.flatnonzero(~np.fromiter(map(isinstance, _v, repeat(str)), bool, len(_v)))
+                _s = np.full(len(col), b" " * w, dtype=f"S{max(w, 32)}")
+                if len(_ix):
+                    _s[_ix] = _fa(np.array([func(_v[i]) for i in _ix.tolist()]), w)
+                result = _add(result, _s)
+            return result
+
+        if k in TopoClsMap["nodes"]:
+            _cf_0 = _cf[0]
+            lines = _fa(df["id"].to_numpy(), _cf_0[0])
+            for i, c in enumerate(["x", "y", "z"]):
+                lines = _add(lines, _fa(df[c].to_numpy(dtype=np.float64), _cf_0[i + 1]))
+            if "card1_add_fields" in df:
+                lines = _add(
+                    lines, __f_add(df["card1_add_fields"], ["TC", "RC"], float, _cf_0[4:6])
+                )
+            lines = _add(lines, b"\n")
+        else:
+            if "SOLID" in k:
+                _cf_0, _cf_1 = (_cf[0], _cf[1]) if len(_cf) > 1 else (_cf[0][0:2], _cf[0][2:])
+                _cf_n, _ix_n = _cf_1, 0
+            else:
+                _cf_0 = _cf[0]
+                _cf_n, _ix_n = _cf_0, 2
+            lines = _add(
+                _fa(df["id"].to_numpy(), _cf_0[0]), _fa(df["id_part"].to_numpy(), _cf_0[1])
+            )
+            if "SOLID" in k:
+                lines = _add(lines, b"\n")
+            _nl = df["id_nodes"].tolist()
+            _lens = np.fromiter(map(len, _nl), dtype=np.int64, count=_n)
+            for _l in np.unique(_lens).tolist():
+                if reshape_idnodes(k, list(range(_l))) != list(range(_l)):
+                    for i in np.flatnonzero(_lens == _l).tolist():
+                        _nl[i] = reshape_idnodes(k, _nl[i])
+            _lens = np.fromiter(map(len, _nl), dtype=np.int64, count=_n)
+            _beam = df["card1_add_fields"] if "BEAM" in k else None
+            _nodes = np.full(_n, b"", dtype=f"S{sum(_cf_n)}")
+            for _l in np.unique(_lens):
+                _ix = np.flatnonzero(_lens == _l)
+                _src = _nl if len(_ix) == _n else [_nl[i] for i in _ix.tolist()]
+                _mat = np.fromiter(
+                    chain.from_iterable(_src), dtype=np.int64, count=len(_ix) * _l
+                ).reshape(len(_ix), _l)
+                _s = np.full(len(_ix), b"", dtype=f"S{sum(_cf_n)}")
+                for j in range(_l):
+                    _s = _add(_s, _fa(_mat[:, j], _cf_n[_ix_n + j]))
+                if _beam is not None:
+                    _w = _cf_n[_ix_n + _l : _ix_n + _l + 6]
+                    _s = _add(
+                        _s,
+                        __f_add(
+                            _beam.iloc[_ix], ["N3", "RT1", "RR1", "RT2", "RR2", "LOCAL"], int, _w
+                        ),
+                    )
+                _nodes[_ix] = _s
+            lines = _add(_add(lines, _nodes), b"\n")
+        _ex = df["card_EX"].to_numpy(dtype=str)
+        if _ex.any():
+            lines = _add(lines, np.char.encode(_ex, "utf-8"))
+        return lines
+
+    def __topo_text(self, k, df, chunk=200000):
+        for i in range(0, len(df), chunk):
+            yield b"".join(self.__render_topo(k, df.iloc[i : i + chunk]).tolist()).decode("utf-8")
+
+    def __restr_topo(self, k, df, objs, chunk=200000):
+        for i in range(0, len(df), chunk):
+            _lines = np.char.decode(self.__render_topo(k, df.iloc[i : i + chunk]), "utf-8")
+            for _o, _s in zip(objs[i : i + chunk], _lines.tolist()):
+                _o.__dict__.update(
+                    {
+                        "str": _o.str[: len(_o.str) - len(_o.str_cardsonly)] + _s,
+                        "str_cardsonly": _s,
+                        "cards": [x + "\n" for x in _s.split("\n") if x],
+                    }
+                )
+
+    def __write_topo(self, file, k, chunk=200000):
+        for _s in self.__topo_text(k, self.keywords[k], chunk):
+            file.write(_s)
+
+    def __track_src(self):
+        _reverse = {v: k for k, vs in TopoClsMap.items() for v in vs}
+        _blocks = defaultdict(list)
+        self.__src_snap = defaultdict(list)
+        for _e in self.__ori_kw_order:
+            if isinstance(self.keywords.get(_e.keyword), pd.DataFrame):
+                _blocks[_e.keyword].append(_e)
+            else:
+                self.__src_snap[_e.__dict__.get("__src_kf__")].append(_e.__str_cardsonly__)
+        self.__src_snap = dict(self.__src_snap)
+        self.__src_ids = {}
+        for kw, _bs in _blocks.items():
+            _ids = self.keywords[kw]["id"].to_numpy()
+            if len(_bs) == 1:
+                _n = [len(_ids)]
+            elif _reverse[kw] in ["nodes", "elems"]:
+                _lpr = max(sum(len(b.cards) for b in _bs) // max(len(_ids), 1), 1)
+                _n = [len(b.cards) // _lpr for b in _bs]
+            else:
+                _func = getattr(self, f"get_{_reverse[kw]}")
+                _n = [len(_func(b.cards, kw, is_init=0)) for b in _bs]
+            for b, _s in zip(_bs, np.split(_ids, np.cumsum(_n)[:-1])):
+                _k = (kw, b.__dict__.get("__src_kf__"))
+                self.__src_ids[_k] = np.concatenate([self.__src_ids.get(_k, _ids[:0]), _s])
+
+    def __dirty_src(self):
+        _master = self.kfilepath
+        _files = {_master, *self.__src_snap, *[f for _, f in self.__src_ids]}
+        _files.update(f for e in self.__ori_kw_order for f in e.__dict__.get("__inc_kfs__", []))
+        _owner = lambda e: (
+            e.__dict__.get("__src_kf__") if e.__dict__.get("__src_kf__") in _files else _master
+        )
+        _cur = defaultdict(list)
+        for _e in self.__ori_kw_order:
+            if not isinstance(self.keywords.get(_e.keyword), pd.DataFrame):
+                _cur[_owner(_e)].append(_e)
+        dirty = set()
+        for _f in _files:
+            _s, _c = self.__src_snap.get(_f, []), _cur.get(_f, [])
+            if len(_s) != len(_c) or any(
+                a is not b.__dict__.get("__str_cardsonly__") or a != b.str_cardsonly
+                for a, b in zip(_s, _c)
+            ):
+                dirty.add(_f)
+        _kws = {
+            next(iter(d)) if isinstance(d, dict) else d[0]
+            for v in self.__diff_kf.values()
+            for d in v
+        }
+        _rows = {}
+        for kw, _df in self.keywords.items():
+            if not isinstance(_df, pd.DataFrame):
+                continue
+            _ids = _df["id"].to_numpy()
+            _own = np.full(len(_ids), None, dtype=object)
+            for (_k, _f), _b_ids in self.__src_ids.items():
+                if _k != kw:
+                    continue
+                _m = np.isin(_ids, _b_ids)
+                _own[_m] = _f
+                if kw in _kws and (
+                    _m.sum() != len(_b_ids)
+                    or any(
+                        o.str_cardsonly != o.__str_cardsonly__ for o in _df["obj"].to_numpy()[_m]
+                    )
+                ):
+                    dirty.add(_f)
+            _new = np.array([x is None for x in _own], dtype=bool)
+            if _new.any():
+                _own[_new] = _master
+                dirty.add(_master)
+            _rows[kw] = _own
+        for kw, _f in self.__src_ids:
+            if kw in _kws and not isinstance(self.keywords.get(kw), pd.DataFrame):
+                dirty.add(_f)
+        _root = _master.parent
+        moved = set()
+        for e in self.__ori_kw_order:
+            if e.keyword not in self.__include_kw or "PATH" in e.keyword:
+                continue
+            _n_p = len(e.cards) if e.keyword == "*INCLUDE" else 1
+            for c, f in zip(e.cards[:_n_p], e.__dict__.get("__inc_kfs__", [])):
+                if pathlib.Path(c.strip()).is_absolute() or os.path.relpath(f, _root).startswith(
+                    ".."
+                ):
+                    moved.add(f)
+                    dirty.add(_owner(e))
+        return _files, _owner, _rows, dirty, moved
+
+    def __write_src(self, file, src, owner, rows, dst, moved):
+        _master = src == self.kfilepath
+        _topo = TopoClsMap["nodes"] + TopoClsMap["elems"]
+        _passed = set()
+
+        def __write_block(k, _sub):
+            if not len(_sub):
+                return
+            if k in _topo:
+                file.write(k + " " + _sub["obj"].iloc[0].keyword_settings + "\n")
+                for _s in self.__topo_text(k, _sub):
+                    file.write(_s)
+            else:
+                for each in _sub["obj"]:
+                    file.write(each.str)
+
+        if not _master:
+            file.write("*KEYWORD\n")
+        for _e in self.__ori_kw_order:
+            k = _e.keyword
+            if owner(_e) != src or k == "*END":
+                continue
+            _df = self.keywords.get(k)
+            if isinstance(_df, pd.DataFrame):
+                if k not in _passed:
+                    _passed.add(k)
+                    __write_block(k, _df[rows[k] == src])
+            elif k in self.__include_kw and "PATH" not in k and "__inc_kfs__" in _e.__dict__:
+                _cards = list(_e.cards)
+                _n_p = len(_cards) if k == "*INCLUDE" else 1
+                for i, f in enumerate(_e.__inc_kfs__[:_n_p]):
+                    if f in moved:
+                        _cards[i] = os.path.relpath(dst(f), dst(src).parent) + "\n"
+                file.write(k + (" " + _e.keyword_settings if _e.keyword_settings else "") + "\n")
+                file.write("".join(_cards))
+            else:
+                file.write(_e.str)
+        if _master:
+            for k, _df in self.keywords.items():
+                if isinstance(_df, pd.DataFrame) and k not in _passed:
+                    __write_block(k, _df[rows[k] == src])
+        file.write("*END\n")
+
+    def __save_include(self, path, link=1):
+        _root = self.kfilepath.parent
+        _files, _owner, _rows, dirty, moved = self.__dirty_src()
+        dst = lambda f: (
+            path
+            if f == self.kfilepath
+            else path.parent / (f.name if f in moved else os.path.relpath(f, _root))
+        )
+        for f in _files:
+            _d = dst(f)
+            _d.parent.mkdir(parents=True, exist_ok=True)
+            if f in dirty:
+                _tmp = _d.with_name("~" + _d.name)
+                with open_kf(_tmp, "w") as file:
+                    self.__write_src(file, f, _owner, _rows, dst, moved)
+                os.replace(_tmp, _d)
+                continue
+            if _d.exists() or _d.is_symlink():
+                if _d.exists() and os.path.samefile(f, _d):
+                    continue
+                _d.unlink()
+            try:
+                if not link:
+                    raise OSError
+                os.link(f, _d)
+            except OSError:
+                try:
+                    if link != 2:
+                        raise OSError
+                    os.symlink(f.resolve(), _d)
+                except OSError:
+                    shutil.copy2(f, _d)
+        return path
+
+    def save_kf(self, path=0, vec_write=0, keep_include=0, link=1, compress=""):
+        self.flush_kws()
+        if path:
+            path = pathlib.Path(path)
+        else:
+            path = self.kfilepath or (pathlib.Path(os.getcwd()).resolve() / "test.k")
+            path = path.with_name(
+                re.sub(r"\.k$", "", path.stem, flags=re.I)
+                + time.strftime("_%Y_%m_%d_%H_%M_%S", time.localtime())
+                + ".k"
+            )
+        if compress and path.suffix.lower() != f".{compress}":
+            path = path.with_name(f"{path.name}.{compress}")
+        if keep_include and self.kfilepath:
+            return self.__save_include(path, link)
+        with open_kf(path, "w") as file:
+            if self.__parsing_topo:
+                passed_k = []
+                for _kw_e in self.__ori_kw_order:
+                    k = _kw_e.keyword
+                    if k in sum(
+                        [
+                            self.__topocls_name__[x]
+                            for x in ["nodes", "elems"]
+                            if self.__topocls_name__.get(x, False)
+                        ],
+                        [],
+                    ):
                         if isinstance(self.keywords[k], pd.DataFrame):
                             if k not in passed_k:
                                 kwobj_container = self.keywords[k]["obj"]
                                 file.write(
                                     k + " " + kwobj_container.iloc[0].keyword_settings + "\n"
                                 )
-                                for each in kwobj_container:
-                                    file.write(each.str_cardsonly)
+                                if vec_write:
+                                    self.__write_topo(file, k)
+                                else:
+                                    for each in kwobj_container:
+                                        file.write(each.str_cardsonly)
                             else:
                                 continue
                         else:
@@ -2659,6 +4327,116 @@ class bl_keyfile:
                         file.write(_kw_e.str)
         return path
 
+    def save_param_variants(self, param_sets, path=0, body=0):
+        if isinstance(param_sets, pd.DataFrame):
+            param_sets = param_sets.to_dict(orient="index")
+        elif not isinstance(param_sets, dict):
+            param_sets = dict(enumerate(param_sets))
+        _kfpath = pathlib.Path(self.kfilepath or (pathlib.Path(os.getcwd()).resolve() / "test.k"))
+        path = pathlib.Path(path) if path else _kfpath.with_name(_kfpath.stem + "_doe")
+        path.mkdir(parents=True, exist_ok=True)
+        _p_type = dict(zip(self.parameters["names"], self.parameters["type"]))
+        for each in param_sets.values():
+            for k in each.keys():
+                if str(k).upper() not in _p_type:
+                    raise KeyError(f"参数 '{k}' 不在parameters中")
+        body = pathlib.Path(body) if body else path / (_kfpath.stem + "_body.k")
+        _tmp = self.save_kf(body.with_name(f"~{body.name}.{os.getpid()}"))
+        if body.exists() and filecmp.cmp(_tmp, body, shallow=False):
+            _tmp.unlink()
+        else:
+            os.replace(_tmp, body)
+        _cf = self.__EntityCls_CardFields["*PARAMETER"][0]
+        _f_v = lambda t, v: (
+            f"{str(v):>{_cf[1]}s}"[: _cf[1]]
+            if t == "C"
+            else format_numeric2str(int(v) if t == "I" else float(v), _cf[1])
+        )
+        masters = []
+        for ix, each in param_sets.items():
+            _lines = ["*KEYWORD\n", "*PARAMETER_DUPLICATION\n", format_numeric2str(1, 10) + "\n"]
+            _lines.append("*PARAMETER\n")
+            for k, v in each.items():
+                _t = _p_type[str(k).upper()]
+                _lines.append(f"{_t} {str(k).upper()}".ljust(_cf[0])[: _cf[0]] + _f_v(_t, v) + "\n")
+            _lines.extend(["*INCLUDE\n", f"{os.path.relpath(body, path)}\n", "*END\n"])
+            master = path / f"{_kfpath.stem}_{ix}.k"
+            with open(master, "w") as file:
+                file.write("".join(_lines))
+            masters.append(master)
+        return masters
+
+    def save_patch(self, path=0, base=0):
+        self.flush_kws()
+        _kfpath = pathlib.Path(self.kfilepath or (pathlib.Path(os.getcwd()).resolve() / "test.k"))
+        path = pathlib.Path(path) if path else _kfpath.with_name(_kfpath.stem + "_patch.k")
+        base = pathlib.Path(base) if base else self.kfilepath
+        _base = {id(x) for v in self.__src_snap.values() for x in v}
+        _params, _adds, _conflict = [], defaultdict(list), set()
+        _n_base = 0
+        for _e in self.__ori_kw_order:
+            k = _e.keyword
+            if isinstance(self.keywords.get(k), pd.DataFrame):
+                continue
+            if id(_e.__dict__.get("__str_cardsonly__")) not in _base:
+                _adds[k].append(_e)
+                continue
+            _n_base += 1
+            if _e.is_edited:
+                if k in self.__param_kw:
+                    _params.append(_e)
+                else:
+                    _conflict.add(k)
+        if _n_base != sum(len(v) for v in self.__src_snap.values()):
+            _conflict.add("del")
+        for _type, _d in self.__diff_kf.items():
+            for each in _d:
+                k = next(iter(each)) if isinstance(each, dict) else each[0]
+                if _type != "add":
+                    if k not in self.__param_kw:
+                        _conflict.add(k)
+                elif isinstance(self.keywords.get(k), pd.DataFrame):
+                    _v = each[k]
+                    _adds[k].extend(_v if isinstance(_v, list) else [_v])
+        if _conflict or not base:
+            print(
+                f"Warning: {sorted(_conflict)} 的修改无法以补丁覆盖基准, 改为 save_kf(keep_include=1)"
+            )
+            return self.save_kf(path, keep_include=1)
+        _topo = TopoClsMap["nodes"] + TopoClsMap["elems"]
+        overlay = path.with_name(path.stem + "_overlay.k")
+        _tmp = overlay.with_name(f"~{overlay.name}.{os.getpid()}")
+        with open_kf(_tmp, "w") as file:
+            file.write("*KEYWORD\n")
+            for k, _objs in _adds.items():
+                if k in _topo:
+                    _df = self.__topo_kwdf(k, _objs)[1]
+                    file.write(k + " " + _objs[0].keyword_settings + "\n")
+                    file.write("".join(self.__topo_text(k, _df)))
+                else:
+                    file.write("".join(o.str for o in _objs))
+            file.write("*END\n")
+        if overlay.exists() and filecmp.cmp(_tmp, overlay, shallow=False):
+            _tmp.unlink()
+        else:
+            os.replace(_tmp, overlay)
+        _lines = ["*KEYWORD\n"]
+        if _params:
+            _lines.extend(["*PARAMETER_DUPLICATION\n", format_numeric2str(1, 10) + "\n"])
+            _lines.extend(e.str for e in _params)
+        _lines.extend(
+            [
+                "*INCLUDE\n",
+                f"{os.path.relpath(base, path.parent)}\n",
+                "*INCLUDE\n",
+                f"{overlay.name}\n",
+                "*END\n",
+            ]
+        )
+        with open_kf(path, "w") as file:
+            file.write("".join(_lines))
+        return path
+
     def show(self, save3d=0):
         BL_READER = importlib.import_module("BL_READER")
         if self.__parsing_topo:
@@ -2676,60 +4454,837 @@ class bl_keyfile:
     def solve(
         self,
         runpath="",
-        solver=pathlib.Path(os.getenv("lstc_file")).parent.joinpath(
+        solver=pathlib.Path(os.getenv("lstc_file", "")).parent.joinpath(
             "program", "ls-dyna_smp_d_R11_1_0_winx64_ifort160.exe"
         ),
         NCPU=4,
         MEMORY=200000000,
         show_log=0,
+        cache=None,
+        restart=0,
+        restart_deck="",
+        telemetry: float = 0,
+        stage=0,
+        monitor=None,
+        grace: float = 10,
     ):
         import subprocess
 
-        runfile = self.save_kf() if any(self.__diff_kf.values()) else self.kfilepath
-        runpath = pathlib.Path(runpath) if runpath else runfile.with_suffix("")
-        if runpath.exists():
-            shutil.rmtree(runpath)
-        runpath.mkdir(parents=True)
-        shutil.copy2(runfile, runpath / runfile.name)
-        current_path = os.getcwd()
-        os.chdir(runpath)
+        monitor = self.__run_monitor(monitor)
+        runfile, runpath, dump = self.__prepare_run(
+            runpath, restart, restart_deck, stage or bool(cache)
+        )
+        cache, key = self.__run_cache(cache, solver, NCPU, runpath, dump)
+        hit = cache.get(key, runpath) if key else None
+        if hit:
+            return hit
         res = subprocess.Popen(
-            f""""{solver}" I="{str(runpath / runfile.name)}" O="{str(runpath / "d3plot")}" NCPU={NCPU} MEMORY={MEMORY}""",
-            shell=True,
-            stdin=subprocess.PIPE,
+            solver_args(solver, runfile, runpath, NCPU, MEMORY, dump),
+            cwd=runpath,
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
         )
+        _tele = bl_telemetry(res.pid, runpath, telemetry).start() if telemetry else None
+        _watch = None
+        if monitor is not None:
+            # 读输出会阻塞, 规则检查与中止放在独立线程里轮询
+            _watch = threading.Thread(
+                target=monitor.watch_popen, args=(res, runpath, grace), daemon=True
+            )
+            _watch.start()
+        try:
+            with open(runpath / "bl_keyfile_solve.log", "a+") as f:
+                output = []
+                for _s in iter(res.stdout.readline, b""):
+                    _s = _s.decode(errors="replace").strip()
+                    if _s:
+                        output.append([datetime.datetime.now(), _s])
+                        f.write("|--->".join(str(x) for x in output[-1]) + "\n")
+                        if show_log:
+                            print("|--->".join(str(x) for x in output[-1]))
+                        if monitor is not None:
+                            monitor.feed(_s)
+            res.stdout.close()
+            if _tele is not None:
+                _tele.stop(final=1)
+            res.wait()
+        finally:
+            if res.poll() is None:
+                kill_popen(res, grace)
+            if _watch is not None:
+                _watch.join()
+            _tele_sum = _tele.stop() if _tele is not None else None
+        _res = {
+            "runpath": runpath,
+            **solve_summary(x[-1] for x in output),
+            "returncode": res.returncode,
+        }
+        if _tele is not None:
+            _res["telemetry"] = _tele_sum
+        if dump:
+            _res["restarted_from"] = dump.name
+        if monitor is not None:
+            monitor.poll_files(runpath)
+            _res["monitor"] = dict(monitor.state)
+            if monitor.reason:
+                _res["status"], _res["abort_reason"] = "aborted", monitor.reason
+        if key and res.returncode == 0 and not _res.get("abort_reason"):
+            cache.put(key, runpath, _res)
+        return _res
+
+    def __run_monitor(self, monitor=None):
+        monitor = solve_monitor(monitor)
+        if monitor is not None and not monitor.endtim and "*CONTROL_TERMINATION" in self.keywords:
+            try:
+                monitor.endtim = float(self.keywords["*CONTROL_TERMINATION"][0].cards[0][:10])
+            except (ValueError, IndexError):
+                pass
+        return monitor
+
+    def run_key(self, solver, NCPU=4, runpath=""):
+        if not runpath:
+            with tempfile.TemporaryDirectory() as _d:
+                _kfpath = pathlib.Path(self.kfilepath or "test.k")
+                self.save_kf(pathlib.Path(_d) / _kfpath.name, keep_include=1, link=2)
+                return self.run_key(solver, NCPU, _d)
+        return stage_key(runpath, solver, NCPU)
+
+    def __run_cache(self, cache, solver, NCPU, runpath, dump=None):
+        if not cache or dump is not None:
+            return None, None
+        cache = bl_runcache(cache) if isinstance(cache, (str, pathlib.Path)) else cache
+        return cache, self.run_key(solver, NCPU, runpath)
+
+    def __run_dir(self, runpath=""):
+        if runpath:
+            return pathlib.Path(runpath)
+        runpath = pathlib.Path(self.kfilepath or (pathlib.Path(os.getcwd()).resolve() / "test.k"))
+        runpath = runpath.with_suffix("")
+        if any(self.__diff_kf.values()):
+            runpath = runpath.with_name(
+                runpath.name + time.strftime("_%Y_%m_%d_%H_%M_%S", time.localtime())
+            )
+        return runpath
+
+    def __prepare_run(self, runpath="", restart=0, restart_deck="", stage=0):
+        runpath = self.__run_dir(runpath)
+        dump = find_restart(runpath) if restart else None
+        if dump is None:
+            runfile, runpath = self.__stage_run(runpath, stage)
+            return runfile, runpath, None
+        runfile = runpath / "bl_restart.k"
+        with open(runfile, "w") as file:
+            file.write("*KEYWORD\n" + restart_deck.strip("\n") + ("\n" if restart_deck else ""))
+            file.write("*END\n")
+        return runfile, runpath, dump
+
+    def __stage_run(self, runpath="", stage=0):
+        _kfpath = pathlib.Path(self.kfilepath or (pathlib.Path(os.getcwd()).resolve() / "test.k"))
+        runpath = self.__run_dir(runpath)
+        # 运行目录等于或包含主文件/包含文件所在目录时不能清空
+        _rp = runpath.resolve()
+        _inputs = [x for x in [_kfpath, *map(pathlib.Path, self.include_kfs)] if x.exists()]
+        _inputs = [x.resolve() for x in _inputs if x.resolve().is_relative_to(_rp)]
+        if not (stage or any(self.__diff_kf.values())) and _kfpath.is_file():
+            # 未修改的模型直接以原文件求解, 不重写也不链接输入文件
+            runfile = _kfpath.resolve()
+            if not _inputs:
+                discard_dir(runpath)
+            runpath.mkdir(parents=True, exist_ok=True)
+            return runfile, runpath
+        if _inputs:
+            raise ValueError(f"运行目录 {runpath} 含有输入文件 {_inputs[0]}, 拒绝清空后重写")
+        discard_dir(runpath)
+        runpath.mkdir(parents=True)
+        runfile = self.save_kf(runpath / _kfpath.name, keep_include=1, link=2)
+        return runfile, runpath
+
+    async def solve_async(
+        self,
+        runpath="",
+        solver=pathlib.Path(os.getenv("lstc_file", "")).parent.joinpath(
+            "program", "ls-dyna_smp_d_R11_1_0_winx64_ifort160.exe"
+        ),
+        NCPU=4,
+        MEMORY=200000000,
+        show_log=0,
+        timeout: float = None,
+        on_line=None,
+        grace: float = 10,
+        monitor=None,
+        cache=None,
+        restart=0,
+        restart_deck="",
+        telemetry: float = 0,
+        stage=0,
+    ):
+        import asyncio
+
+        monitor = self.__run_monitor(monitor)
+        runfile, runpath, dump = await asyncio.to_thread(
+            self.__prepare_run, runpath, restart, restart_deck, stage or bool(cache)
+        )
+        cache, key = await asyncio.to_thread(self.__run_cache, cache, solver, NCPU, runpath, dump)
+        hit = await asyncio.to_thread(cache.get, key, runpath) if key else None
+        if hit:
+            return hit
+        proc = await asyncio.create_subprocess_exec(
+            *solver_args(solver, runfile, runpath, NCPU, MEMORY, dump),
+            cwd=runpath,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        output, status = [], "finished"
         with open(runpath / "bl_keyfile_solve.log", "a+") as f:
-            output = []
-            for _s in iter(res.stdout.readline, b""):
-                _s = _s.decode().lstrip().rstrip().replace("\r\n", "").replace("\n", "")
-                if _s:
-                    output.append([datetime.datetime.now(), _s])
-                    f.write("|--->".join(str(x) for x in output[-1]) + "\n")
-                    if show_log:
-                        print("|--->".join(str(x) for x in output[-1]))
-        res.stdin.close()
-        res.stdout.close()
-        res.stderr.close()
-        os.chdir(current_path)
-        restr = r"^.*Total CPU time\s*=\s*(\d+)\s*seconds.*hours.*minutes"
-        for _s in output[::-1]:
-            match = re.search(restr, _s[-1])
+
+            async def pump(stream, tag):
+                # 按块读取并自行切行, 避免 readline 在超长行上丢弃数据
+                _buf = b""
+                while True:
+                    _chunk = await stream.read(2**16)
+                    _lines = (_buf + _chunk).split(b"\n")
+                    _buf = _lines.pop() if _chunk else b""
+                    for _s in _lines:
+                        _s = _s.decode(errors="replace").strip()
+                        if not _s:
+                            continue
+                        output.append([datetime.datetime.now(), _s])
+                        f.write(tag.join(str(x) for x in output[-1]) + "\n")
+                        if show_log:
+                            print(tag.join(str(x) for x in output[-1]))
+                        if monitor is not None:
+                            monitor.feed(_s)
+                        if on_line is not None:
+                            _r = on_line(_s, tag == "|-!->")
+                            if asyncio.iscoroutine(_r):
+                                await _r
+                    if not _chunk:
+                        return
+
+            async def drain():
+                await asyncio.gather(pump(proc.stdout, "|--->"), pump(proc.stderr, "|-!->"))
+                if _tele is not None:
+                    _tele.sample()
+                await proc.wait()
+
+            _watch = asyncio.create_task(monitor.watch(proc, runpath, grace)) if monitor else None
+            _tele = bl_telemetry(proc.pid, runpath, telemetry) if telemetry else None
+            _sampler = asyncio.create_task(_tele.watch(proc)) if _tele else None
+            try:
+                await asyncio.wait_for(drain(), timeout)
+            except asyncio.TimeoutError:
+                status = "timeout"
+            except asyncio.CancelledError:
+                status = "cancelled"
+            finally:
+                if proc.returncode is None:
+                    await kill_proc(proc, grace)
+                for _t in (_watch, _sampler):
+                    if _t is not None:
+                        _t.cancel()
+                        await asyncio.gather(_t, return_exceptions=True)
+                _tele_sum = _tele.stop() if _tele is not None else None
+                f.flush()
+        if status == "cancelled":
+            raise asyncio.CancelledError
+        _res = {
+            "runpath": runpath,
+            **solve_summary(x[-1] for x in output),
+            "returncode": proc.returncode,
+            "status": status,
+        }
+        if dump:
+            _res["restarted_from"] = dump.name
+        if _tele is not None:
+            _res["telemetry"] = _tele_sum
+        if monitor is not None:
+            monitor.poll_files(runpath)
+            _res["monitor"] = dict(monitor.state)
+            if monitor.reason:
+                _res["status"], _res["abort_reason"] = "aborted", monitor.reason
+        if key and _res["status"] == "finished" and proc.returncode == 0:
+            await asyncio.to_thread(cache.put, key, runpath, _res)
+        return _res
+
+
+def stage_key(runpath, solver, NCPU=4):
+    runpath = pathlib.Path(runpath)
+    _h = hashlib.sha256()
+    for f in sorted(x for x in runpath.rglob("*") if x.is_file()):
+        _h.update(f.relative_to(runpath).as_posix().encode() + b"\0")
+        with open(f, "rb") as _f:
+            for _b in iter(lambda: _f.read(2**20), b""):
+                _h.update(_b)
+        _h.update(b"\0")
+    _h.update(f"|{pathlib.Path(solver).resolve()}|NCPU={NCPU}".encode())
+    return _h.hexdigest()
+
+
+class bl_runcache:
+    def __init__(self, root, max_bytes: int = 0, max_entries: int = 0):
+        self.root = pathlib.Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    def __meta(self, key):
+        return self.root / key / "bl_runcache.json"
+
+    def get(self, key, runpath=""):
+        _m = self.__meta(key)
+        try:
+            with open(_m, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            os.utime(_m)
+        except (OSError, ValueError):
+            return None
+        if not runpath:
+            return {**meta["result"], "cached": True}
+        # 缓存条目只读, 拷贝到运行目录; 已落盘的输入文件与缓存一致, 不覆盖
+        runpath = pathlib.Path(runpath)
+        try:
+            shutil.copytree(
+                self.root / key,
+                runpath,
+                ignore=shutil.ignore_patterns("bl_runcache.json"),
+                copy_function=lambda a, b: os.path.exists(b) or shutil.copy2(a, b),
+                dirs_exist_ok=True,
+            )
+        except (OSError, shutil.Error):
+            return None
+        return {**meta["result"], "runpath": runpath, "cached": True}
+
+    def put(self, key, runpath, result: dict):
+        _d = self.root / key
+        if _d.exists():
+            return _d
+        _tmp = self.root / f"~{key}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            shutil.copytree(runpath, _tmp)
+        except (OSError, shutil.Error):
+            shutil.rmtree(_tmp, ignore_errors=True)
+            return None
+        _size = sum(x.stat().st_size for x in _tmp.rglob("*") if x.is_file())
+        _result = {k: v for k, v in result.items() if k not in ("runpath", "monitor")}
+        with open(_tmp / "bl_runcache.json", "w", encoding="utf-8") as f:
+            json.dump({"key": key, "size": _size, "result": _result}, f, default=str)
+        try:
+            os.rename(_tmp, _d)
+        except OSError:
+            shutil.rmtree(_tmp, ignore_errors=True)
+        self.evict()
+        return _d
+
+    def entries(self):
+        _e = []
+        for _m in self.root.glob("*/bl_runcache.json"):
+            try:
+                with open(_m, "r", encoding="utf-8") as f:
+                    _e.append((_m.stat().st_mtime, json.load(f)["size"], _m.parent))
+            except (OSError, ValueError, KeyError):
+                continue
+        return sorted(_e, key=lambda x: x[0])
+
+    def evict(self):
+        _e = self.entries()
+        _total = sum(x[1] for x in _e)
+        removed = []
+        while _e and (
+            (self.max_bytes and _total > self.max_bytes)
+            or (self.max_entries and len(_e) > self.max_entries)
+        ):
+            _, _size, _d = _e.pop(0)
+            shutil.rmtree(_d, ignore_errors=True)
+            _total -= _size
+            removed.append(_d.name)
+        return removed
+
+
+monitor_rules = {
+    "error_termination": lambda st: st["terminated"] == "error",
+    "energy_ratio": lambda st: (st["energy_ratio"] or 1.0) > 1.1,
+    "dt_collapse": lambda st: bool(st["dt"] and st["dt0"] and st["dt"] < st["dt0"] * 1e-3),
+}
+
+
+class bl_solve_monitor:
+    __glstat_keys = {
+        "time": "time",
+        "time step": "dt",
+        "total energy / initial energy": "energy_ratio",
+        "added mass": "added_mass",
+        "percentage increase": "added_mass_pct",
+    }
+
+    def __init__(
+        self,
+        endtim: float = 0,
+        rules: dict = None,
+        poll: float = 1.0,
+        files=("messag", "d3hsp", "glstat"),
+        window: int = 20,
+    ):
+        self.endtim = endtim
+        self.rules = {k: v for k, v in {**monitor_rules, **(rules or {})}.items() if v}
+        self.poll = poll
+        self.files = files
+        self.state = {
+            "cycle": 0,
+            "time": 0.0,
+            "dt": None,
+            "dt0": None,
+            "energy_ratio": None,
+            "added_mass": None,
+            "added_mass_pct": None,
+            "terminated": None,
+            "progress": 0.0,
+            "eta": None,
+        }
+        self.reason = None
+        self.__history = collections.deque(maxlen=window)
+        self.__offsets, self.__tails = {}, {}
+
+    def feed(self, line: str):
+        _st = self.state
+        _flat = re.sub(r"\s", "", line).lower()
+        if "errortermination" in _flat:
+            _st["terminated"] = "error"
+        elif "normaltermination" in _flat:
+            _st["terminated"] = "normal"
+        match = re.match(r"^\s*(\d+)\s+t\s+([-+.\dEe]+)\s+dt\s+([-+.\dEe]+)", line)
+        if match:
+            _st["cycle"] = int(match.group(1))
+            self.__set("time", match.group(2))
+            self.__set("dt", match.group(3))
+            return
+        match = re.match(r"^\s*([a-z /]+?)\s*\.{2,}\s*([-+.\dEe]+)\s*$", line.lower())
+        if match and match.group(1) in self.__glstat_keys:
+            self.__set(self.__glstat_keys[match.group(1)], match.group(2))
+            return
+        if not self.endtim:
+            match = re.search(r"termination time[\s.]*([-+.\dEe]+)", line.lower())
             if match:
-                return {"runpath": runpath, "TotalCpuTime": float(match.group(1))}
-        return {"runpath": runpath, "TotalCpuTime": 0}
+                try:
+                    self.endtim = float(match.group(1))
+                except ValueError:
+                    pass
+
+    def __set(self, key, value):
+        try:
+            value = float(value)
+        except ValueError:
+            return
+        _st = self.state
+        _st[key] = value
+        if key == "dt" and value > 0 and _st["dt0"] is None:
+            _st["dt0"] = value
+        if key == "time":
+            self.__history.append((time.time(), value))
+            if self.endtim:
+                _st["progress"] = min(value / self.endtim, 1.0)
+                (w0, t0), (w1, t1) = self.__history[0], self.__history[-1]
+                if t1 > t0 and w1 > w0:
+                    _st["eta"] = max(self.endtim - t1, 0) / ((t1 - t0) / (w1 - w0))
+
+    def poll_files(self, runpath):
+        for name in self.files:
+            _f = pathlib.Path(runpath) / name
+            try:
+                with open(_f, "rb") as fb:
+                    fb.seek(self.__offsets.get(name, 0))
+                    _b = fb.read()
+                    self.__offsets[name] = fb.tell()
+            except OSError:
+                continue
+            _b = self.__tails.get(name, b"") + _b
+            *lines, self.__tails[name] = _b.split(b"\n")
+            for _s in lines:
+                self.feed(_s.decode(errors="replace"))
+
+    def check(self):
+        for name, rule in self.rules.items():
+            if rule(self.state):
+                return name
+        return None
+
+    async def watch(self, proc, runpath, grace: float = 10):
+        import asyncio
+
+        while proc.returncode is None:
+            self.poll_files(runpath)
+            self.reason = self.reason or self.check()
+            if self.reason:
+                await kill_proc(proc, grace)
+                return self.reason
+            await asyncio.sleep(self.poll)
+
+    def watch_popen(self, proc, runpath, grace: float = 10):
+        import subprocess
+
+        while proc.poll() is None:
+            self.poll_files(runpath)
+            self.reason = self.reason or self.check()
+            if self.reason:
+                kill_popen(proc, grace)
+                return self.reason
+            try:
+                proc.wait(self.poll)
+            except subprocess.TimeoutExpired:
+                pass
+
+
+def solve_monitor(spec=None, **kwargs):
+    # spec: None/0 不监控; True/1 默认规则; dict 为 bl_solve_monitor 参数 (可跨进程/网络传递)
+    if isinstance(spec, bl_solve_monitor):
+        return spec
+    if spec is None or spec is False or (not isinstance(spec, dict) and not spec):
+        return None
+    spec = {**kwargs, **(spec if isinstance(spec, dict) else {})}
+    _bad = [k for k, v in (spec.get("rules") or {}).items() if v and not callable(v)]
+    if _bad:
+        raise ValueError(f"监控规则 {_bad} 只能为可调用对象或空值 (停用)")
+    return bl_solve_monitor(**spec)
+
+
+class bl_telemetry:
+    def __init__(self, pid: int, runpath=0, interval: float = 1.0, name="bl_telemetry.jsonl"):
+        try:
+            self.root = psutil.Process(pid)
+        except psutil.Error:
+            self.root = None
+        self.path = pathlib.Path(runpath) / name if runpath else None
+        self.interval = interval
+        self.samples = []
+        self.__procs, self.__io = {}, {}
+        self.__t0 = time.time()
+        self.__stop = threading.Event()
+        self.__thread, self.__summary = None, None
+        self.__file = open(self.path, "a") if self.path else None
+
+    def sample(self, record=1):
+        try:
+            _procs = [self.root] + self.root.children(recursive=True) if self.root else []
+        except psutil.Error:
+            _procs = []
+        cpu, rss, _alive = 0.0, 0, 0
+        for p in _procs:
+            try:
+                if p.pid not in self.__procs:
+                    self.__procs[p.pid] = p
+                cpu += self.__procs[p.pid].cpu_percent(None)
+                _alive += 1
+                rss += p.memory_info().rss
+                _io = p.io_counters()
+                self.__io[p.pid] = (_io.read_bytes, _io.write_bytes)
+            except (psutil.Error, AttributeError):
+                continue
+        # 首次 cpu_percent 只是建立基准; 进程已回收时读不到数据, 都不计入样本
+        if not record or not _alive:
+            return None
+        _s = {
+            "elapsed": round(time.time() - self.__t0, 3),
+            "cpu_percent": round(cpu, 1),
+            "rss": rss,
+            "read_bytes": sum(x[0] for x in self.__io.values()),
+            "write_bytes": sum(x[1] for x in self.__io.values()),
+            "procs": len(_procs),
+        }
+        self.samples.append(_s)
+        if self.__file is not None:
+            self.__file.write(json.dumps(_s) + "\n")
+            self.__file.flush()
+        return _s
+
+    def __loop(self):
+        while not self.__stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self.sample(record=0)
+        self.__thread = threading.Thread(target=self.__loop, daemon=True)
+        self.__thread.start()
+        return self
+
+    async def watch(self, proc):
+        import asyncio
+
+        self.sample(record=0)
+        while proc.returncode is None:
+            await asyncio.sleep(self.interval)
+            self.sample()
+
+    def summary(self):
+        _cpu = [x["cpu_percent"] for x in self.samples]
+        _rss = [x["rss"] for x in self.samples]
+        return {
+            "elapsed": round(time.time() - self.__t0, 3),
+            "samples": len(self.samples),
+            "cpu_mean": round(sum(_cpu) / len(_cpu), 1) if _cpu else None,
+            "cpu_max": max(_cpu, default=None),
+            "rss_mean": int(sum(_rss) / len(_rss)) if _rss else 0,
+            "rss_peak": max(_rss, default=0),
+            "read_bytes": sum(x[0] for x in self.__io.values()),
+            "write_bytes": sum(x[1] for x in self.__io.values()),
+            "procs_max": max((x["procs"] for x in self.samples), default=0),
+        }
+
+    def stop(self, final=0):
+        if self.__summary is not None:
+            return self.__summary
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+        if final:
+            self.sample()
+        self.__summary = self.summary()
+        if self.__file is not None:
+            self.__file.write(json.dumps({"summary": self.__summary}) + "\n")
+            self.__file.close()
+            self.__file = None
+        return self.__summary
+
+
+def telemetry_frame(results: list):
+    _rows = [
+        {"runpath": str(r.get("runpath", "")), "state": r.get("state", "done"), **r["telemetry"]}
+        for r in results
+        if isinstance(r, dict) and r.get("telemetry")
+    ]
+    _df = pd.DataFrame(_rows)
+    if len(_df):
+        _df["ncpu_used"] = (pd.to_numeric(_df["cpu_mean"]) / 100).round(2)
+    return _df
+
+
+def find_restart(runpath):
+    runpath = pathlib.Path(runpath)
+    if not runpath.is_dir():
+        return None
+    _dumps = [x for x in runpath.iterdir() if re.fullmatch(r"d3dump\d*|runrsf", x.name)]
+    _dumps = [x for x in _dumps if x.is_file() and x.stat().st_size]
+    return max(_dumps, key=lambda x: x.stat().st_mtime) if _dumps else None
+
+
+def solver_args(solver, runfile, runpath, NCPU=4, MEMORY=200000000, dump=None):
+    _args = [str(solver), f"I={runfile}", f"O={pathlib.Path(runpath) / 'd3plot'}"]
+    _args += [f"NCPU={NCPU}", f"MEMORY={MEMORY}"]
+    return _args + ([f"R={dump.name}"] if dump else [])
+
 
+cleanup_pool = None
 
-def __bl_keyfile_solve(f):
-    return bl_keyfile(f, parsing_topo=0, is_init=0, show_pbar=0).solve()
+
+def discard_dir(path, wait: bool = False):
+    global cleanup_pool
+    path = pathlib.Path(path)
+    _trash = sorted(path.parent.glob(f".~{path.name}.*"))
+    if path.exists():
+        _dst = path.with_name(f".~{path.name}.{os.getpid()}.{time.time_ns()}")
+        try:
+            os.rename(path, _dst)
+            _trash.append(_dst)
+        except OSError:
+            shutil.rmtree(path, ignore_errors=True)
+    if not _trash:
+        return None
+    if cleanup_pool is None:
+        cleanup_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bl_cleanup")
+    futures = [cleanup_pool.submit(shutil.rmtree, x, True) for x in _trash]
+    if wait:
+        for x in futures:
+            x.result()
+    return futures
+
+
+def solve_summary(lines):
+    restr = r"^.*Total CPU time\s*=\s*(\d+)\s*seconds.*hours.*minutes"
+    for _s in list(lines)[::-1]:
+        match = re.search(restr, _s)
+        if match:
+            return {"TotalCpuTime": float(match.group(1))}
+    return {"TotalCpuTime": 0}
+
+
+def kill_popen(proc, grace: float = 10):
+    import subprocess
+
+    try:
+        proc.terminate()
+        proc.wait(grace)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+async def kill_proc(proc, grace: float = 10):
+    import asyncio
+
+    try:
+        proc.terminate()
+        await asyncio.wait_for(proc.wait(), grace)
+    except ProcessLookupError:
+        pass
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+
+
+async def solve_many_async(kfiles: list, max_concurrent: int = 0, **kwargs):
+    import asyncio
+
+    _sem = asyncio.Semaphore(max_concurrent or psutil.cpu_count(logical=False))
+
+    async def one(f):
+        async with _sem:
+            _kf = await asyncio.to_thread(bl_keyfile, f, parsing_topo=0, is_init=0, show_pbar=0)
+            return await _kf.solve_async(**kwargs)
+
+    return await asyncio.gather(*(one(f) for f in kfiles), return_exceptions=True)
+
+
+def bl_keyfile_solve(f, **kwargs):
+    return bl_keyfile(f, parsing_topo=0, is_init=0, show_pbar=0).solve(**kwargs)
+
+
+class bl_jobqueue:
+    def __init__(self, queue_file=0, cores: int = 0, memory: int = 0, word_bytes: int = 8):
+        self.cores = int(cores or psutil.cpu_count(logical=False))
+        self.memory = int(memory or psutil.virtual_memory().available)
+        self.word_bytes = word_bytes
+        self.queue_file = pathlib.Path(queue_file) if queue_file else None
+        self.jobs: dict[str, dict] = {}
+        if self.queue_file and self.queue_file.exists():
+            with open(self.queue_file, "r", encoding="utf-8") as f:
+                self.jobs = json.load(f)
+            for job in self.jobs.values():
+                if job["state"] == "running":
+                    job["state"] = "pending"
+                    job["solve"]["restart"] = 1
+
+    def save(self):
+        if not self.queue_file:
+            return
+        self.queue_file.parent.mkdir(parents=True, exist_ok=True)
+        _tmp = self.queue_file.with_name("~" + self.queue_file.name)
+        with open(_tmp, "w", encoding="utf-8") as f:
+            json.dump(self.jobs, f, ensure_ascii=False, indent=1, default=str)
+        os.replace(_tmp, self.queue_file)
+
+    def submit(
+        self, kfile, NCPU=4, MEMORY=200000000, priority: int = 0, job_id: str = "", **solve_kwargs
+    ):
+        job_id = job_id or f"{len(self.jobs):05d}_{pathlib.Path(kfile).stem}"
+        if job_id in self.jobs:
+            return job_id
+        self.jobs[job_id] = {
+            "kfile": str(kfile),
+            "NCPU": int(NCPU),
+            "MEMORY": int(MEMORY),
+            "priority": int(priority),
+            "seq": len(self.jobs),
+            "state": "pending",
+            "solve": {
+                k: str(v) if isinstance(v, pathlib.Path) else v for k, v in solve_kwargs.items()
+            },
+            "result": None,
+        }
+        self.save()
+        return job_id
+
+    def retry(self, states=("failed",)):
+        for job in self.jobs.values():
+            if job["state"] in states:
+                job["state"] = "pending"
+                job["solve"]["restart"] = 1
+        self.save()
+
+    def __need(self, job):
+        return min(job["NCPU"], self.cores), job["MEMORY"] * self.word_bytes
+
+    def run(self, max_workers: int = 0, bar_title="Ls_Dyna_run", retries: int = 0):
+        _pending = sorted(
+            [k for k, v in self.jobs.items() if v["state"] == "pending"],
+            key=lambda k: (-self.jobs[k]["priority"], self.jobs[k]["seq"]),
+        )
+        max_workers = int(max_workers or self.cores)
+        free_cpu, free_mem = self.cores, self.memory
+        running, _obj = {}, []
+        _start_time = time.time()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor, tqdm(
+            total=len(_pending),
+            desc=f"    {bar_title.upper()} ".ljust(30),
+            leave=True,
+            unit="",
+            bar_format="{l_bar}{bar:10}|     {n_fmt:>15}/{total_fmt:<16}{postfix:<16}",
+        ) as pbar:
+            while _pending or running:
+                for k in list(_pending):
+                    if len(running) >= max_workers:
+                        break
+                    _cpu, _mem = self.__need(self.jobs[k])
+                    if running and (_cpu > free_cpu or _mem > free_mem):
+                        continue
+                    job = self.jobs[k]
+                    _kw = {**job["solve"], "NCPU": _cpu, "MEMORY": job["MEMORY"]}
+                    running[executor.submit(bl_keyfile_solve, job["kfile"], **_kw)] = k
+                    free_cpu, free_mem = free_cpu - _cpu, free_mem - _mem
+                    job["state"] = "running"
+                    _pending.remove(k)
+                self.save()
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    k = running.pop(future)
+                    job = self.jobs[k]
+                    _cpu, _mem = self.__need(job)
+                    free_cpu, free_mem = free_cpu + _cpu, free_mem + _mem
+                    try:
+                        job["result"] = future.result()
+                        job["state"] = "done" if not job["result"].get("returncode") else "failed"
+                    except Exception as e:
+                        job["result"] = {"error": repr(e)}
+                        job["state"] = "failed"
+                    if job["state"] == "failed" and job.get("attempts", 0) < retries:
+                        job["attempts"] = job.get("attempts", 0) + 1
+                        job["state"] = "pending"
+                        job["solve"]["restart"] = 1
+                        _pending.append(k)
+                        continue
+                    if job["state"] == "done":
+                        _obj.append(job["result"])
+                    pbar.update(1)
+                    _rss = max((x.get("telemetry", {}).get("rss_peak", 0) for x in _obj), default=0)
+                    pbar.set_postfix_str(
+                        f"ccm:{sum(x['TotalCpuTime'] for x in _obj)}s"
+                        + f"|tcm:{round(time.time()-_start_time,2)}s"
+                        + f"|rss:{_rss / 2**20:.0f}MB"
+                    )
+                self.save()
+        _failed = [k for k, v in self.jobs.items() if v["state"] == "failed"]
+        if _failed:
+            print(f"Warning: {len(_failed)} 个任务求解失败: {_failed}")
+        return [
+            {**(v["result"] or {}), "job_id": k, "state": v["state"]}
+            for k, v in self.jobs.items()
+            if v["state"] in ["done", "failed"]
+        ]
 
 
 def execute_in_parallel(
     runpath=".",
     filelist: list | set = 0,
     bar_title="Ls_Dyna_run",
-    max_workers=round(psutil.cpu_count(logical=False) / 4),
+    max_workers: int = 0,
+    NCPU=4,
+    MEMORY=200000000,
+    overrides: dict = None,
+    queue_file=0,
+    retries: int = 0,
+    telemetry: float = 0,
+    **solve_kwargs,
 ):
     runpath = pathlib.Path(runpath if runpath else os.getcwd()).resolve()
     if not runpath.exists():
@@ -2740,23 +5295,1126 @@ def execute_in_parallel(
                 shutil.copy2(f, runpath / f.name)
             except:
                 pass
-    filelist = runpath.glob("*.k")
-    _start_time = time.time()
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(__bl_keyfile_solve, f) for f in filelist]
-        _obj = []
-        with tqdm(
-            total=len(futures),
-            desc=f"    {bar_title.upper()} ".ljust(30),
-            leave=True,
-            unit="",
-            bar_format="{l_bar}{bar:10}|     {n_fmt:>15}/{total_fmt:<16}{postfix:<16}",
-        ) as pbar:
-            for res in as_completed(futures):
-                _obj.append(res.result())
+    queue = bl_jobqueue(queue_file)
+    overrides = overrides or {}
+    for f in sorted(runpath.glob("*.k")):
+        _o = {"NCPU": NCPU, "MEMORY": MEMORY, "telemetry": telemetry, **solve_kwargs}
+        _o.update(overrides.get(f.name, {}))
+        queue.submit(f, job_id=f.name, **_o)
+    _obj = queue.run(max_workers=max_workers, bar_title=bar_title, retries=retries)
+    _df = telemetry_frame(_obj)
+    if len(_df):
+        _df.to_csv(runpath / "bl_batch_telemetry.csv", index=False)
+    return _obj
+
+
+def read_glstat(path):
+    path = pathlib.Path(path)
+    path = path / "glstat" if path.is_dir() else path
+    records, _r = [], {}
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            match = re.match(r"^\s*([a-z /]+?)\s*\.{2,}\s*([-+.\dEe]+)\s*$", line.lower())
+            if not match:
+                continue
+            if match.group(1) == "time" and _r:
+                records.append(_r)
+                _r = {}
+            try:
+                _r[match.group(1)] = float(match.group(2))
+            except ValueError:
+                pass
+    if _r:
+        records.append(_r)
+    return pd.DataFrame(records)
+
+
+def extract_response(spec, runpath, result: dict = None, params: dict = None):
+    if callable(spec):
+        return float(spec(pathlib.Path(runpath), result or {}, params or {}))
+    _src, *_rest = str(spec).split(":")
+    if _src == "result":
+        return float((result or {})[_rest[0]])
+    if _src == "glstat":
+        _col, _agg = (_rest + ["last"])[:2]
+        _ser = read_glstat(runpath)[_col.lower()].dropna()
+        return float(_ser.iloc[-1] if _agg == "last" else getattr(_ser, _agg)())
+    raise ValueError(f"响应定义 '{spec}' 不支持")
+
+
+class bl_rbf:
+    def __init__(self, kernel="cubic", smooth: float = 1e-8, eps: float = 1.0):
+        self.kernel = kernel
+        self.smooth = smooth
+        self.eps = eps
+
+    def __phi(self, r):
+        if self.kernel == "cubic":
+            return r**3
+        if self.kernel == "thin_plate":
+            return np.where(r > 0, r**2 * np.log(np.where(r > 0, r, 1.0)), 0.0)
+        if self.kernel == "gaussian":
+            return np.exp(-((self.eps * r) ** 2))
+        raise ValueError(f"核函数 '{self.kernel}' 不支持")
+
+    def fit(self, X, y, lo, hi):
+        self.lo, self.hi = np.asarray(lo, float), np.asarray(hi, float)
+        self.Z = (np.asarray(X, float) - self.lo) / (self.hi - self.lo)
+        y = np.asarray(y, float)
+        self.mu, self.sd = y.mean(), y.std() or 1.0
+        n, d = self.Z.shape
+        P = np.hstack([np.ones((n, 1)), self.Z])
+        A = np.zeros((n + d + 1, n + d + 1))
+        A[:n, :n] = self.__phi(np.linalg.norm(self.Z[:, None] - self.Z[None], axis=-1))
+        A[:n, :n] += self.smooth * np.eye(n)
+        A[:n, n:], A[n:, :n] = P, P.T
+        b = np.concatenate([(y - self.mu) / self.sd, np.zeros(d + 1)])
+        self.coef = np.linalg.lstsq(A, b, rcond=None)[0]
+        return self
+
+    def predict(self, X, scaled=False):
+        Z = np.asarray(X, float)
+        Z = Z if scaled else (Z - self.lo) / (self.hi - self.lo)
+        n = len(self.Z)
+        K = self.__phi(np.linalg.norm(Z[:, None] - self.Z[None], axis=-1))
+        P = np.hstack([np.ones((len(Z), 1)), Z])
+        return (K @ self.coef[:n] + P @ self.coef[n:]) * self.sd + self.mu
+
+
+def latin_hypercube(n: int, d: int, rng=None):
+    rng = np.random.default_rng(rng)
+    _perm = rng.permuted(np.tile(np.arange(n)[:, None], (1, d)), axis=0)
+    return (_perm + rng.random((n, d))) / n
+
+
+class batch_multiline:
+    def __init__(
+        self,
+        keyfile=0,
+        bounds: dict = None,
+        response="result:TotalCpuTime",
+        runpath=0,
+        batch_size: int = 0,
+        n_init: int = 0,
+        minimize: bool = True,
+        explore: float = 0.3,
+        surrogate: str = "cubic",
+        seed: int = None,
+        path_envsfile=0,
+        **solve_kwargs,
+    ):
+        if path_envsfile:
+            with open(path_envsfile, "r", encoding="utf-8") as f:
+                _envs = json.load(f)
+            keyfile = keyfile or _envs.pop("keyfile")
+            bounds = bounds or _envs.pop("bounds")
+            response = _envs.pop("response", response)
+            runpath = runpath or _envs.pop("runpath", 0)
+            batch_size = batch_size or _envs.pop("batch_size", 0)
+            n_init = n_init or _envs.pop("n_init", 0)
+            minimize = _envs.pop("minimize", minimize)
+            explore = _envs.pop("explore", explore)
+            surrogate = _envs.pop("surrogate", surrogate)
+            seed = _envs.pop("seed", seed)
+            solve_kwargs = {**_envs, **solve_kwargs}
+        self.model = (
+            keyfile
+            if isinstance(keyfile, bl_keyfile)
+            else bl_keyfile(keyfile, parsing_topo=0, is_init=0, show_pbar=0)
+        )
+        self.model.collect_PARAMETER()
+        self.names = [str(k).upper() for k in bounds]
+        self.lo = np.array([float(v[0]) for v in bounds.values()])
+        self.hi = np.array([float(v[1]) for v in bounds.values()])
+        self.response = response
+        _kf = pathlib.Path(self.model.kfilepath)
+        self.runpath = pathlib.Path(runpath) if runpath else _kf.with_name(_kf.stem + "_opt")
+        self.runpath.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size or psutil.cpu_count(logical=False)
+        self.n_init = n_init or max(self.batch_size, 2 * len(self.names) + 1)
+        self.minimize = minimize
+        self.explore = explore
+        self.surrogate = bl_rbf(surrogate)
+        self.solve_kwargs = solve_kwargs
+        self.rng = np.random.default_rng(seed)
+        self.body = self.runpath / (_kf.stem + "_body.k")
+        self.queue = bl_jobqueue(self.runpath / "opt_ledger.json")
+        _hist = self.runpath / "opt_history.csv"
+        self.history = pd.read_csv(_hist) if _hist.exists() else pd.DataFrame()
+
+    @property
+    def best(self):
+        if "response" not in self.history:
+            return None
+        _h = self.history.dropna(subset=["response"])
+        if not len(_h):
+            return None
+        _ix = _h["response"].idxmin() if self.minimize else _h["response"].idxmax()
+        return _h.loc[_ix].to_dict()
+
+    def propose(self, n: int):
+        _d = len(self.names)
+        _h = self.history.dropna(subset=["response"]) if len(self.history) else self.history
+        if len(_h) < max(self.n_init, _d + 2):
+            return self.lo + latin_hypercube(n, _d, self.rng) * (self.hi - self.lo)
+        _y = _h["response"].to_numpy() * (1 if self.minimize else -1)
+        self.surrogate.fit(_h[self.names].to_numpy(), _y, self.lo, self.hi)
+        cand = latin_hypercube(max(2000, 200 * _d), _d, self.rng)
+        pred = self.surrogate.predict(cand, scaled=True)
+        pred = (pred - pred.min()) / (np.ptp(pred) or 1.0)
+        _z = (self.history[self.names].to_numpy() - self.lo) / (self.hi - self.lo)
+        dist = np.linalg.norm(cand[:, None] - _z[None], axis=-1).min(axis=1)
+        picks = []
+        for _ in range(n):
+            score = pred - self.explore * dist / (dist.max() or 1.0)
+            i = int(np.argmin(score))
+            picks.append(cand[i])
+            dist = np.minimum(dist, np.linalg.norm(cand - cand[i], axis=1))
+        return self.lo + np.array(picks) * (self.hi - self.lo)
+
+    def evaluate(self, X, it: int, max_workers: int = 0):
+        _dir = self.runpath / f"iter_{it:02d}"
+        _params = _dir / "params.csv"
+        if _params.exists():
+            X = pd.read_csv(_params, index_col=0)[self.names].to_numpy()
+        else:
+            _dir.mkdir(parents=True, exist_ok=True)
+            pd.DataFrame(X, columns=self.names).to_csv(_params)
+        _sets = {f"{it:02d}_{i:03d}": dict(zip(self.names, x)) for i, x in enumerate(X)}
+        masters = self.model.save_param_variants(_sets, _dir, self.body)
+        _ids = []
+        for k, f in zip(_sets, masters):
+            _ids.append(self.queue.submit(f, job_id=f"it{k}", **self.solve_kwargs))
+        self.queue.run(max_workers=max_workers, bar_title=f"Opt_iter_{it:02d}")
+        rows = []
+        for (k, p), job_id in zip(_sets.items(), _ids):
+            _job = self.queue.jobs[job_id]
+            _res = _job["result"] or {}
+            # 求解失败的样本记为 NaN; 响应定义错误直接抛出
+            _y = np.nan
+            if _job["state"] == "done":
+                _y = extract_response(self.response, _res["runpath"], _res, p)
+            rows.append({"iter": it, "job_id": job_id, **p, "response": _y})
+            rows[-1]["runpath"] = str(_res.get("runpath", ""))
+        return pd.DataFrame(rows)
+
+    def run_opt_loop(self, n_iter: int = 5, max_workers: int = 0):
+        it0 = int(self.history["iter"].max()) + 1 if len(self.history) else 0
+        for it in range(it0, it0 + n_iter):
+            _n = self.n_init if it == 0 else self.batch_size
+            _df = self.evaluate(self.propose(_n), it, max_workers)
+            self.history = pd.concat([self.history, _df], ignore_index=True)
+            self.history.to_csv(self.runpath / "opt_history.csv", index=False)
+        return self.history
+
+
+def __load_batch(paths, kwargs):
+    cache = {}
+    return [bl_keyfile(p, include_cache=cache, **kwargs) for p in paths]
+
+
+def load_many(
+    paths: list,
+    workers=psutil.cpu_count(logical=False),
+    bar_title="Load_kf",
+    **kwargs,
+):
+    paths = [pathlib.Path(p) for p in paths]
+    kwargs.setdefault("show_pbar", 0)
+    workers = max(1, min(int(workers), len(paths)))
+    _bar = lambda: tqdm(
+        total=len(paths),
+        desc=f"    {bar_title.upper()} ".ljust(30),
+        leave=True,
+        unit="",
+        bar_format="{l_bar}{bar:10}|     {n_fmt:>15}/{total_fmt:<16}",
+    )
+    models = [None] * len(paths)
+    if workers == 1:
+        cache = {}
+        with _bar() as pbar:
+            for i, p in enumerate(paths):
+                models[i] = bl_keyfile(p, include_cache=cache, **kwargs)
                 pbar.update(1)
-                pbar.set_postfix_str(
-                    f"ccm:{sum(x['TotalCpuTime'] for x in _obj)}s"
-                    + f"|tcm:{round(time.time()-_start_time,2)}s"
+        return models
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(__load_batch, [paths[i] for i in ix], kwargs): ix
+            for ix in split_sequence(list(range(len(paths))), workers)
+        }
+        with _bar() as pbar:
+            for future in as_completed(futures):
+                for i, m in zip(futures[future], future.result()):
+                    models[i] = m
+                pbar.update(len(futures[future]))
+    return models
+
+
+remote_ops = ("get", "fetch", "len", "repr", "call", "set", "shutdown", "close")
+remote_calls = {
+    "bl_keyfile": (
+        "filter_TopoDF_by_ids",
+        "collect_ids",
+        "collect_PARAMETER",
+        "collect_portion_MAT",
+        "collect_portion_SECTION",
+        "insert_kw",
+        "remove_kw",
+        "insert_kws",
+        "remove_kws",
+        "flush_kws",
+        "morph_nodes",
+        "save_kf",
+        "save_patch",
+        "save_param_variants",
+    ),
+    "entity": (
+        "get_related_elems",
+        "get_related_nodes",
+        "get_related_part",
+        "get_related_mat",
+        "get_related_section",
+        "get_centercoords",
+        "reshape_nodes",
+        "reset",
+    ),
+    "container": ("get", "keys", "values", "items", "index", "count", "head", "tail", "tolist"),
+}
+remote_reads = (
+    *("get_related_elems", "get_related_nodes", "get_related_part", "get_related_mat"),
+    *("get_related_section", "get_centercoords", *remote_calls["container"]),
+)
+
+
+def serve_dir():
+    _d = pathlib.Path(tempfile.gettempdir()) / (
+        f"bl_dyna_{os.getuid()}" if hasattr(os, "getuid") else "bl_dyna"
+    )
+    _d.mkdir(mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid"):
+        _st = _d.lstat()
+        if not _d.is_dir() or _d.is_symlink() or _st.st_uid != os.getuid():
+            raise PermissionError(f"{_d} 不属于当前用户")
+        if _st.st_mode & 0o077:
+            os.chmod(_d, 0o700)
+    return _d
+
+
+def serve_address(keyfile):
+    # 按绝对路径摘要区分不同目录下的同名模型; 文件名截短以免超出 socket 路径长度限制
+    _path = pathlib.Path(keyfile).resolve()
+    _stem = re.sub(r"\W", "_", _path.stem)[:32]
+    _stem = f"{_stem}_{hashlib.sha1(str(_path).encode()).hexdigest()[:12]}"
+    if os.name == "nt":
+        return rf"\\.\pipe\bl_dyna_{_stem}"
+    return str(serve_dir() / f"{_stem}.sock")
+
+
+def serve_keypath(address):
+    _a = repr(tuple(address)) if isinstance(address, (list, tuple)) else str(address)
+    return serve_dir() / (hashlib.sha1(_a.encode()).hexdigest()[:16] + ".key")
+
+
+def read_authkey(address):
+    path = serve_keypath(address)
+    if hasattr(os, "getuid"):
+        _st = path.lstat()
+        if path.is_symlink() or _st.st_uid != os.getuid() or _st.st_mode & 0o077:
+            raise PermissionError(f"{path} 不是当前用户私有的密钥文件")
+    return path.read_bytes()
+
+
+def write_authkey(address, authkey: bytes):
+    path = serve_keypath(address)
+    if path.exists() or path.is_symlink():
+        path.unlink()
+    _fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(_fd, "wb") as f:
+        f.write(authkey)
+    return path
+
+
+class bl_remote_handle:
+    __slots__ = ("n",)
+
+    def __init__(self, n: int):
+        self.n = n
+
+    def __reduce__(self):
+        return (bl_remote_handle, (self.n,))
+
+
+def wire_value(obj, handles: list, seen: dict):
+    if isinstance(obj, __LsDyna_Base):
+        if id(obj) not in seen:
+            seen[id(obj)] = len(handles)
+            handles.append(obj)
+        return bl_remote_handle(seen[id(obj)])
+    if isinstance(obj, dict):
+        return {k: wire_value(v, handles, seen) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return (tuple if isinstance(obj, tuple) else list)(
+            wire_value(x, handles, seen) for x in obj
+        )
+    if isinstance(obj, pd.DataFrame) and "obj" in obj:
+        obj = obj.copy()
+        obj["obj"] = [wire_value(x, handles, seen) for x in obj["obj"].tolist()]
+    return obj
+
+
+def unwire_value(obj, client):
+    if isinstance(obj, bl_remote_handle):
+        return bl_remote(client, (("handle", obj.n),))
+    if isinstance(obj, dict):
+        return {k: unwire_value(v, client) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(unwire_value(x, client) for x in obj)
+    if isinstance(obj, pd.DataFrame) and "obj" in obj:
+        obj["obj"] = [unwire_value(x, client) for x in obj["obj"].tolist()]
+    return obj
+
+
+def resolve_ref(model, ref, handles=()):
+    obj = model
+    for i, (kind, key) in enumerate(ref):
+        if kind == "handle" and not i:
+            obj = handles[key]
+        elif kind == "attr":
+            if not isinstance(key, str) or key.startswith("_"):
+                raise AttributeError(f"不允许远程访问属性 {key}")
+            obj = getattr(obj, key)
+        elif kind != "item":
+            raise ValueError(f"不支持的引用 {kind}")
+        elif isinstance(obj, pd.DataFrame) and "obj" in obj and isinstance(key, int):
+            obj = obj["obj"].iloc[key]
+        else:
+            obj = obj[key]
+    return obj
+
+
+def remote_callable(owner, step):
+    kind, name = step
+    if isinstance(owner, bl_keyfile):
+        _allow = remote_calls["bl_keyfile"]
+    elif isinstance(owner, __LsDyna_Base):
+        _allow = remote_calls["entity"]
+    elif isinstance(owner, (dict, MappingProxyType, list, tuple, pd.DataFrame, pd.Series)):
+        _allow = remote_calls["container"]
+    else:
+        _allow = ()
+    if kind != "attr" or name not in _allow:
+        raise PermissionError(f"不允许远程调用 {type(owner).__name__}.{name}")
+
+
+def __serve_conn(model, conn, stop, wake):
+    _rw = model._bl_keyfile__rwlock
+    _is_ref = lambda x: (
+        callable(x)
+        or isinstance(x, (bl_keyfile, __LsDyna_Base, dict, MappingProxyType))
+        or (isinstance(x, list) and any(isinstance(i, __LsDyna_Base) for i in x))
+        or (isinstance(x, pd.DataFrame) and "obj" in x)
+    )
+    handles, seen = [], {}
+    _wire = lambda x: wire_value(x, handles, seen)
+    with conn:
+        while True:
+            try:
+                op, ref, *args = conn.recv()
+            except (EOFError, OSError):
+                return
+            if op == "close":
+                return
+            try:
+                if op not in remote_ops:
+                    raise ValueError(f"不支持的请求 {op}")
+                if op == "call":
+                    if not ref:
+                        raise PermissionError("不允许远程调用模型本身")
+                    # 只读方法共享读锁, 其余方法可能修改模型, 独占写锁
+                    with (_rw.read if ref[-1][1] in remote_reads else _rw.write)():
+                        _owner = resolve_ref(model, ref[:-1], handles)
+                        remote_callable(_owner, ref[-1])
+                        res = ("val", _wire(resolve_ref(_owner, ref[-1:])(*args[0], **args[1])))
+                        _b = pickle.dumps(res, protocol=pickle.HIGHEST_PROTOCOL)
+                elif op in ["set", "shutdown"]:
+                    with _rw.write():
+                        if op == "set":
+                            _obj = resolve_ref(model, ref[:-1], handles)
+                            kind, key = ref[-1]
+                            if kind == "attr":
+                                if not isinstance(key, str) or key.startswith("_"):
+                                    raise AttributeError(f"不允许远程修改属性 {key}")
+                                setattr(_obj, key, args[0])
+                            else:
+                                _obj[key] = args[0]
+                        else:
+                            stop.set()
+                            wake()
+                    _b = pickle.dumps(("val", None))
+                else:
+                    with _rw.read():
+                        if op == "get":
+                            res = resolve_ref(model, ref, handles)
+                            res = ("ref", callable(res)) if _is_ref(res) else ("val", _wire(res))
+                        elif op == "fetch":
+                            res = ("val", resolve_ref(model, ref, handles))
+                        elif op == "len":
+                            res = ("val", len(resolve_ref(model, ref, handles)))
+                        else:
+                            res = ("val", repr(resolve_ref(model, ref, handles)))
+                        _b = pickle.dumps(res, protocol=pickle.HIGHEST_PROTOCOL)
+                conn.send_bytes(_b)
+            except Exception as e:
+                try:
+                    conn.send(("err", e))
+                except Exception:
+                    conn.send(("err", RuntimeError(repr(e))))
+            if stop.is_set():
+                return
+
+
+def serve_kf(keyfile, address=0, authkey: bytes = None, **kwargs):
+    model = keyfile if isinstance(keyfile, bl_keyfile) else bl_keyfile(keyfile, **kwargs)
+    address = address or serve_address(model.kfilepath or "model")
+    if os.name != "nt" and isinstance(address, str) and os.path.exists(address):
+        os.unlink(address)
+    authkey = authkey or os.urandom(32)
+    _keypath = write_authkey(address, authkey)
+    stop = threading.Event()
+
+    def __wake():
+        try:
+            Client(address, authkey=authkey).close()
+        except Exception:
+            pass
+
+    try:
+        with Listener(address, authkey=authkey) as listener:
+            print(f"bl_keyfile 服务已启动: {address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, OSError):
+                    continue
+                if stop.is_set():
+                    conn.close()
+                    break
+                threading.Thread(
+                    target=__serve_conn, args=(model, conn, stop, __wake), daemon=True
+                ).start()
+    finally:
+        _keypath.unlink(missing_ok=True)
+    return model
+
+
+class bl_remote:
+    def __init__(self, client, ref=(), is_callable=False):
+        self.__dict__["_client"] = client
+        self.__dict__["_ref"] = tuple(ref)
+        self.__dict__["_callable"] = is_callable
+
+    def __get(self, step):
+        ref = self._ref + (step,)
+        kind, res = self._client.request("get", ref)
+        return bl_remote(self._client, ref, res) if kind == "ref" else res
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.__get(("attr", name))
+
+    def __getitem__(self, key):
+        return self.__get(("item", key))
+
+    def __setattr__(self, name, value):
+        self._client.request("set", self._ref + (("attr", name),), value)
+
+    def __setitem__(self, key, value):
+        self._client.request("set", self._ref + (("item", key),), value)
+
+    def __len__(self):
+        return self._client.request("len", self._ref)[1]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __call__(self, *args, **kwargs):
+        return self._client.request("call", self._ref, args, kwargs)[1]
+
+    def fetch(self):
+        return self._client.request("fetch", self._ref)[1]
+
+    def __repr__(self):
+        return self._client.request("repr", self._ref)[1]
+
+
+class bl_keyfile_client(bl_remote):
+    def __init__(self, address, authkey: bytes = None):
+        super().__init__(self)
+        if os.path.splitext(str(address))[1].lower() in [".k", ".key", ".dyn", ".gz", ".zst"]:
+            address = serve_address(address)
+        authkey = authkey or read_authkey(address)
+        self.__dict__["_conn"] = Client(address, authkey=authkey)
+
+    def request(self, op, ref, *args):
+        self._conn.send((op, ref, *args))
+        kind, res = self._conn.recv()
+        if kind == "err":
+            raise res
+        return kind, unwire_value(res, self) if kind == "val" and op != "fetch" else res
+
+    def close(self):
+        if not self._conn.closed:
+            self._conn.send(("close", ()))
+            self._conn.close()
+
+    def shutdown(self):
+        self.request("shutdown", ())
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def send_msg(wfile, msg: dict, payload: bytes = b""):
+    wfile.write(json.dumps(msg, ensure_ascii=False, default=str).encode() + b"\n")
+    if payload:
+        wfile.write(payload)
+    wfile.flush()
+
+
+def recv_msg(rfile):
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def deck_files(path, encoding: str = "utf-8"):
+    path = pathlib.Path(path).resolve()
+    _files, _stack = [], [path]
+    while _stack:
+        _f = _stack.pop()
+        if _f in _files or not _f.exists():
+            continue
+        _files.append(_f)
+        kw, _block = "", []
+        for line in read_kf_lines(_f, encoding) + ["*END\n"]:
+            if not line.startswith("*"):
+                _block.append(line)
+                continue
+            if kw.startswith("*INCLUDE") and "PATH" not in kw:
+                _n_p = len(_block) if kw == "*INCLUDE" else 1
+                _stack.extend(
+                    (_f.parent / _l.strip()).resolve() for _l in _block[:_n_p] if _l.strip()
                 )
-        return _obj
\ No newline at end of file
+            kw, _block = line.split()[0].strip(), []
+    return _files
+
+
+def file_digest(path, cache: dict = None):
+    _st = os.stat(path)
+    _key = (str(path), _st.st_mtime_ns, _st.st_size)
+    if cache is not None and _key in cache:
+        return cache[_key]
+    _h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for _b in iter(lambda: f.read(2**20), b""):
+            _h.update(_b)
+    if cache is not None:
+        cache[_key] = _h.hexdigest()
+    return _h.hexdigest()
+
+
+wire_solve_kwargs = (
+    "show_log",
+    "timeout",
+    "grace",
+    "restart",
+    "restart_deck",
+    "telemetry",
+    "monitor",
+)
+
+
+def wire_token(token=""):
+    return token or os.getenv("BL_COORDINATOR_TOKEN", "")
+
+
+def safe_job_id(job_id):
+    if (
+        not isinstance(job_id, str)
+        or not re.fullmatch(r"[\w. -]+", job_id)
+        or job_id in (".", "..")
+    ):
+        raise ValueError(f"非法任务编号: {job_id!r}")
+    return job_id
+
+
+def safe_relpath(rel):
+    _p = pathlib.PurePosixPath(rel) if isinstance(rel, str) else None
+    if (
+        _p is None
+        or not _p.parts
+        or _p.is_absolute()
+        or ".." in _p.parts
+        or "\\" in rel
+        or ":" in rel
+    ):
+        raise ValueError(f"非法文件路径: {rel!r}")
+    return pathlib.Path(*_p.parts)
+
+
+class bl_coordinator:
+    def __init__(self, address=("127.0.0.1", 0), queue_file=0, token=""):
+        self.token = wire_token(token) or secrets.token_urlsafe(16)
+        self.queue = bl_jobqueue(queue_file)
+        self.workers: dict[str, dict] = {}
+        self.status: dict[str, dict] = {}
+        self.__blobs, self.__digests = {}, {}
+        self.__cond = threading.Condition()
+        self.__stop = threading.Event()
+        self.__sock = socket.create_server(address)
+        self.__sock.settimeout(0.5)
+        self.address = self.__sock.getsockname()[:2]
+        self.__thread = None
+
+    def submit(self, kfile, NCPU=4, MEMORY=200000000, priority: int = 0, job_id="", **kwargs):
+        if job_id:
+            safe_job_id(job_id)
+        if set(kwargs) - set(wire_solve_kwargs):
+            raise ValueError(
+                f"不支持分发的求解参数: {sorted(set(kwargs) - set(wire_solve_kwargs))}"
+            )
+        with self.__cond:
+            job_id = self.queue.submit(
+                pathlib.Path(kfile).resolve(), NCPU, MEMORY, priority, job_id, **kwargs
+            )
+            self.__cond.notify_all()
+        return job_id
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__accept, daemon=True)
+        self.__thread.start()
+        return self
+
+    def __accept(self):
+        while not self.__stop.is_set():
+            try:
+                conn, _ = self.__sock.accept()
+            except (socket.timeout, OSError):
+                continue
+            threading.Thread(target=self.__serve, args=(conn,), daemon=True).start()
+        self.__sock.close()
+
+    def __manifest(self, job):
+        _main = pathlib.Path(job["kfile"])
+        files = {}
+        for f in deck_files(_main):
+            _rel = os.path.relpath(f, _main.parent)
+            if _rel.startswith("..") or os.path.isabs(_rel):
+                raise ValueError(f"{f} 不在主文件目录下, 不支持分发")
+            _h = file_digest(f, self.__digests)
+            self.__blobs[_h] = f
+            files[pathlib.Path(_rel).as_posix()] = _h
+        return files
+
+    def __assign(self, name, msg):
+        jobs = self.queue.jobs
+        _pending = sorted(
+            [k for k, v in jobs.items() if v["state"] == "pending"],
+            key=lambda k: (-jobs[k]["priority"], jobs[k]["seq"]),
+        )
+        _w = self.workers[name]
+        _idle = msg["free_cores"] >= _w["cores"]
+        for k in _pending:
+            job = jobs[k]
+            _cpu = min(job["NCPU"], _w["cores"])
+            _mem = job["MEMORY"] * self.queue.word_bytes
+            _fits = _cpu <= msg["free_cores"] and _mem <= msg["free_memory"]
+            if not (_fits or _idle):
+                continue
+            try:
+                files = self.__manifest(job)
+            except (OSError, ValueError) as e:
+                job["state"], job["result"] = "failed", {"error": repr(e)}
+                continue
+            job["state"], job["worker"] = "running", name
+            return {
+                "op": "job",
+                "job_id": k,
+                **job,
+                "NCPU": _cpu,
+                "mem_bytes": _mem,
+                "files": files,
+            }
+        return None
+
+    def __serve(self, conn):
+        rfile, wfile = conn.makefile("rb"), conn.makefile("wb")
+        name, mine = None, set()
+        try:
+            while True:
+                msg = recv_msg(rfile)
+                if msg is None:
+                    break
+                op = msg["op"]
+                if name is None and op != "hello":
+                    break
+                if op == "hello":
+                    if not hmac.compare_digest(str(msg.get("token", "")), self.token):
+                        send_msg(wfile, {"op": "denied"})
+                        break
+                    name = msg["worker"]
+                    with self.__cond:
+                        self.workers[name] = {**msg, "connected": time.time()}
+                    send_msg(wfile, {"op": "welcome"})
+                elif op == "pull":
+                    with self.__cond:
+                        job = self.__assign(name, msg)
+                        if job is not None:
+                            mine.add(job["job_id"])
+                        self.queue.save()
+                        _busy = any(
+                            v["state"] in ("pending", "running") for v in self.queue.jobs.values()
+                        )
+                    if job is not None:
+                        send_msg(wfile, job)
+                    elif self.__stop.is_set() and not _busy:
+                        send_msg(wfile, {"op": "exit"})
+                    else:
+                        send_msg(wfile, {"op": "idle"})
+                elif op == "need":
+                    for _h in msg["hashes"]:
+                        if _h not in self.__blobs:
+                            raise ValueError(f"未知文件 {_h}")
+                        with open(self.__blobs[_h], "rb") as f:
+                            _b = f.read()
+                        send_msg(wfile, {"op": "blob", "hash": _h, "size": len(_b)}, _b)
+                elif op == "status":
+                    with self.__cond:
+                        if msg["job_id"] in mine:
+                            _st = {k: v for k, v in msg.items() if k != "token"}
+                            self.status[msg["job_id"]] = {
+                                **_st,
+                                "worker": name,
+                                "time": time.time(),
+                            }
+                elif op == "result":
+                    if msg["job_id"] not in mine:
+                        continue
+                    with self.__cond:
+                        job = self.queue.jobs[msg["job_id"]]
+                        job["result"] = msg["result"]
+                        job["state"] = "failed" if msg.get("failed") else "done"
+                        mine.discard(msg["job_id"])
+                        self.queue.save()
+                        self.__cond.notify_all()
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self.__cond:
+                for k in mine:
+                    if self.queue.jobs[k]["state"] == "running":
+                        self.queue.jobs[k]["state"] = "pending"
+                self.workers.pop(name, None)
+                self.queue.save()
+                self.__cond.notify_all()
+            conn.close()
+
+    def wait(self, timeout: float = None):
+        _busy = lambda: any(v["state"] in ("pending", "running") for v in self.queue.jobs.values())
+        with self.__cond:
+            self.__cond.wait_for(lambda: not _busy(), timeout)
+        return {k: v["result"] for k, v in self.queue.jobs.items() if v["state"] == "done"}
+
+    def close(self):
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class bl_worker:
+    def __init__(
+        self,
+        address,
+        root=0,
+        cores: int = 0,
+        memory: int = 0,
+        solver=None,
+        poll: float = 1.0,
+        name: str = "",
+        token: str = "",
+    ):
+        self.token = wire_token(token)
+        self.address = tuple(address) if not isinstance(address, str) else address
+        if isinstance(self.address, str):
+            _h, _p = self.address.rsplit(":", 1)
+            self.address = (_h, int(_p))
+        self.root = pathlib.Path(root or pathlib.Path(tempfile.gettempdir()) / "bl_worker")
+        self.cores = int(cores or psutil.cpu_count(logical=False))
+        self.memory = int(memory or psutil.virtual_memory().available)
+        self.solver = solver
+        self.poll = poll
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.__lock, self.__used = threading.Lock(), [0, 0]
+        self.__threads = []
+
+    def __request(self, msg):
+        with self.__lock:
+            send_msg(self.__w, msg)
+            if msg["op"] in ("status", "result"):
+                return None
+            if msg["op"] != "need":
+                return recv_msg(self.__r)
+            _blobs = {}
+            for _ in msg["hashes"]:
+                _m = recv_msg(self.__r)
+                _blobs[_m["hash"]] = self.__r.read(_m["size"])
+            return _blobs
+
+    def __stage(self, job):
+        files = {safe_relpath(k): v for k, v in job["files"].items()}
+        if any(not re.fullmatch(r"[0-9a-f]{64}", h) for h in files.values()):
+            raise ValueError("非法文件摘要")
+        _store = self.root / "blobs"
+        _store.mkdir(parents=True, exist_ok=True)
+        _missing = sorted({h for h in job["files"].values() if not (_store / h).exists()})
+        if _missing:
+            for _h, _b in self.__request({"op": "need", "hashes": _missing}).items():
+                if hashlib.sha256(_b).hexdigest() != _h:
+                    raise ValueError(f"文件 {_h} 校验失败")
+                _tmp = _store / f"~{_h}.{threading.get_ident()}"
+                with open(_tmp, "wb") as f:
+                    f.write(_b)
+                os.replace(_tmp, _store / _h)
+        _src = self.root / "runs" / job["job_id"] / "src"
+        discard_dir(_src)
+        for _rel, _h in files.items():
+            _d = _src / _rel
+            _d.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(_store / _h, _d)
+            except OSError:
+                shutil.copy2(_store / _h, _d)
+        return _src / safe_relpath(pathlib.PurePath(job["kfile"]).name)
+
+    def __run_job(self, job):
+        import asyncio
+
+        k = job["job_id"]
+        try:
+            deck = self.__stage({**job, "job_id": safe_job_id(k)})
+            monitor = solve_monitor(job["solve"].get("monitor", True), poll=self.poll)
+            _last = [0.0]
+
+            def on_line(line, is_stderr):
+                if time.time() - _last[0] >= self.poll:
+                    _last[0] = time.time()
+                    _state = dict(monitor.state) if monitor is not None else {}
+                    _st = {"op": "status", "job_id": k, "state": _state, "line": line}
+                    self.__request(_st)
+
+            kwargs = {
+                **{x: v for x, v in job["solve"].items() if x in wire_solve_kwargs},
+                "NCPU": job["NCPU"],
+                "MEMORY": job["MEMORY"],
+                "runpath": self.root / "runs" / k / "run",
+                "monitor": monitor,
+                "on_line": on_line,
+            }
+            if self.solver:
+                kwargs["solver"] = self.solver
+            kf = bl_keyfile(deck, parsing_topo=0, is_init=0, show_pbar=0)
+            res = asyncio.run(kf.solve_async(**kwargs))
+            msg = {"op": "result", "job_id": k, "result": {**res, "worker": self.name}}
+            msg["failed"] = res.get("returncode") != 0 or res.get("status") != "finished"
+        except Exception as e:
+            msg = {"op": "result", "job_id": k, "result": {"error": repr(e)}, "failed": True}
+        with self.__lock:
+            self.__used[0] -= job["NCPU"]
+            self.__used[1] -= job["mem_bytes"]
+        self.__request(msg)
+
+    def run(self):
+        with socket.create_connection(self.address) as conn:
+            self.__r, self.__w = conn.makefile("rb"), conn.makefile("wb")
+            _hello = {"op": "hello", "worker": self.name, "cores": self.cores, "token": self.token}
+            rep = self.__request({**_hello, "memory": self.memory})
+            if rep is None or rep["op"] != "welcome":
+                raise PermissionError(f"协调器 {self.address} 拒绝连接, 请检查令牌")
+            while True:
+                with self.__lock:
+                    free = self.cores - self.__used[0], self.memory - self.__used[1]
+                rep = self.__request({"op": "pull", "free_cores": free[0], "free_memory": free[1]})
+                if rep is None or rep["op"] == "exit":
+                    break
+                if rep["op"] == "job":
+                    with self.__lock:
+                        self.__used[0] += rep["NCPU"]
+                        self.__used[1] += rep["mem_bytes"]
+                    _t = threading.Thread(target=self.__run_job, args=(rep,), daemon=True)
+                    _t.start()
+                    self.__threads.append(_t)
+                    if free[0] - rep["NCPU"] > 0:
+                        continue
+                time.sleep(self.poll)
+            for _t in self.__threads:
+                _t.join()
+
+
+def deck_workload(path, encoding: str = "utf-8"):
+    path = pathlib.Path(path)
+    _params, _endtim, _elems, _nodes = {}, "0", 0, 0
+    _stack, _seen = [path], set()
+    while _stack:
+        _f = _stack.pop()
+        if _f in _seen or not _f.exists():
+            continue
+        _seen.add(_f)
+        kw, _block = "", []
+        for line in read_kf_lines(_f, encoding) + ["*END\n"]:
+            if not line.startswith("*"):
+                _block.append(line)
+                continue
+            if kw.startswith("*ELEMENT_") and _block:
+                _two = kw.startswith("*ELEMENT_SOLID") and len(_block[0].split()) == 2
+                _elems += len(_block) // 2 if _two else len(_block)
+            elif kw.startswith("*NODE"):
+                _nodes += len(_block)
+            elif kw.startswith("*PARAMETER") and "EXPRESSION" not in kw:
+                for _l in _block:
+                    _t = _l.split()
+                    for i in range(0, len(_t) - 2, 3):
+                        _params[_t[i + 1]] = _t[i + 2]
+            elif kw == "*CONTROL_TERMINATION" and _block:
+                _endtim = _block[0][:10].strip() or "0"
+            elif kw.startswith("*INCLUDE") and "PATH" not in kw:
+                _n_p = len(_block) if kw == "*INCLUDE" else 1
+                _stack.extend(_f.parent / _l.strip() for _l in _block[:_n_p] if _l.strip())
+            kw, _block = line.split()[0].strip(), []
+    _endtim = _params.get(_endtim.lstrip("&-"), _endtim)
+    try:
+        _endtim = float(_endtim)
+    except ValueError:
+        _endtim = 0.0
+    return {"elements": _elems, "nodes": _nodes, "endtim": _endtim}
+
+
+def fake_solver_main(argv: list = None):
+    _args = dict(x.split("=", 1) for x in (sys.argv[1:] if argv is None else argv) if "=" in x)
+    _args = {k.upper(): v.strip('"') for k, v in _args.items()}
+    deck = pathlib.Path(_args["I"]).resolve()
+    runpath = pathlib.Path(os.getcwd())
+    d3plot = pathlib.Path(_args.get("O", runpath / "d3plot"))
+    ncpu = max(abs(int(_args.get("NCPU", 1))), 1)
+    mode = os.getenv("BL_FAKE_MODE", "sleep")
+    scale = float(os.getenv("BL_FAKE_SCALE", "1e-4"))
+    states = int(os.getenv("BL_FAKE_STATES", "10"))
+    fail = float(os.getenv("BL_FAKE_FAIL", "0"))
+    kill = float(os.getenv("BL_FAKE_KILL", "0"))
+    n0, _mode = 0, "w"
+    if "R" in _args:
+        with open(runpath / _args["R"], "r") as f:
+            _dump = json.load(f)
+        wl, n0, _mode, kill = _dump["workload"], _dump["state"] + 1, "a", 0
+    else:
+        wl = deck_workload(deck)
+    endtim = wl["endtim"] or 1.0
+    cost = min(wl["elements"] * endtim * scale / ncpu, float(os.getenv("BL_FAKE_MAX", "3600")))
+    dt = endtim / max(states * 100, 1)
+    _t0, _cpu0 = time.time() - cost * n0 / max(states, 1), time.process_time()
+    _stamp = time.strftime("%m/%d/%Y %H:%M:%S")
+
+    def emit(line, *files):
+        print(line, flush=True)
+        for f in files:
+            f.write(line + "\n")
+            f.flush()
+
+    with open(runpath / "d3hsp", _mode) as hsp, open(runpath / "messag", _mode) as msg, open(
+        runpath / "glstat", _mode
+    ) as gls:
+        emit(f" Date: {_stamp}", hsp, msg)
+        emit(f" Input file: {deck.name}", hsp, msg)
+        emit(f" termination time.................  {endtim:.4E}", hsp)
+        emit(f" number of nodal points...........  {wl['nodes']}", hsp)
+        emit(f" number of solid/shell/beam elems.  {wl['elements']}", hsp)
+        emit(f" Memory size from command line: {_args.get('MEMORY', 0)}", hsp, msg)
+        emit(f" Running on {ncpu} thread(s)", hsp, msg)
+        if n0:
+            emit(f" restart from {_args['R']} at state {n0 - 1}", hsp, msg)
+        _cycle = 0
+        for n in range(n0, states + 1):
+            _p = n / states if states else 1.0
+            _t = endtim * _p
+            _target = cost * _p
+            while time.time() - _t0 < _target:
+                if mode == "burn":
+                    sum(i * i for i in range(20000))
+                else:
+                    time.sleep(min(_target - (time.time() - _t0), 0.05))
+            _cycle = int(round(_t / dt))
+            emit(f" {_cycle:>8d} t {_t:.4E} dt {dt:.2E} write d3plot file", hsp, msg)
+            gls.write(f" dt of cycle {_cycle:>8d} is controlled by shell {1:>10d}\n")
+            gls.write(f" time...........................   {_t:.5E}\n")
+            gls.write(f" time step......................   {dt:.5E}\n")
+            gls.write(f" kinetic energy.................   {1.0 - 0.5 * _p:.5E}\n")
+            gls.write(f" internal energy................   {0.5 * _p:.5E}\n")
+            gls.write(f" total energy / initial energy..   {1.0:.5E}\n")
+            gls.write(f" added mass.....................   {0.0:.5E}\n")
+            gls.write(f" percentage increase............   {0.0:.5E}\n\n")
+            gls.flush()
+            _plot = d3plot if n == 0 else d3plot.with_name(f"{d3plot.name}{n:02d}")
+            with open(_plot, "wb") as f:
+                f.write(os.urandom(min(wl["nodes"] * 12 + 64, 2**20)))
+            with open(runpath / "~d3dump01", "w") as f:
+                json.dump({"workload": wl, "state": n}, f)
+            os.replace(runpath / "~d3dump01", runpath / "d3dump01")
+            if kill and _p >= kill:
+                os._exit(137)
+            if fail and _p >= fail:
+                emit(" *** Error fake solver failure requested (BL_FAKE_FAIL)", hsp, msg)
+                emit(" E r r o r   t e r m i n a t i o n", hsp, msg)
+                return 1
+        _cpu, _wall = round(time.process_time() - _cpu0), round(time.time() - _t0)
+        emit(" N o r m a l    t e r m i n a t i o n", hsp, msg)
+        _s = _wall if mode == "sleep" else _cpu
+        emit(
+            f" Total CPU time     =  {_s:>10d} seconds (   {_s // 3600} hours  "
+            + f"{_s % 3600 // 60} minutes {_s % 60} seconds)",
+            hsp,
+        )
+        emit(f" Elapsed time   {_wall} seconds for {_cycle} cycles using {ncpu} SMP thread", hsp)
+    return 0
+
+
+def fake_solver(path=0):
+    path = pathlib.Path(path) if path else pathlib.Path(tempfile.gettempdir()) / "bl_fake_dyna"
+    _src = pathlib.Path(__file__).resolve()
+    if os.name == "nt":
+        path = path.with_suffix(".cmd")
+        _body = f'@"{sys.executable}" "{_src}" --fake-solver %*\n'
+    else:
+        _body = f'#!/bin/sh\nexec "{sys.executable}" "{_src}" --fake-solver "$@"\n'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        f.write(_body)
+    path.chmod(0o755)
+    return path
+
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--fake-solver"]:
+    sys.exit(fake_solver_main(sys.argv[2:]))
+if __name__ == "__main__" and sys.argv[1:2] == ["--worker"]:
+    bl_worker(*sys.argv[2:4]).run()
@@ -0,0 +1,36 @@
+import filecmp, pathlib, sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_keyfile
+
+DECK = pathlib.Path(__file__).with_name("roof_crush_impactor_03_pos.k")
+
+
+def test_clone_isolated_from_base_edits(tmp_path):
+    kf = bl_keyfile(str(DECK), show_pbar=0)
+    before = kf.save_kf(tmp_path / "before.k")
+    z = kf.keywords["*NODE"]["z"].iloc[2]
+    c = kf.clone()
+
+    kf.keywords["*NODE"]["obj"].iloc[2].z = 55.0
+    kf.keywords["*MAT_RIGID"][0]["MID"] = 77
+    assert kf.keywords["*NODE"]["z"].iloc[2] == 55.0
+    assert kf.keywords["*MAT_RIGID"][0].cards[0].startswith("        77")
+
+    assert c.keywords["*NODE"]["z"].iloc[2] == z
+    assert c.keywords["*NODE"]["obj"].iloc[2].z == z
+    assert c.keywords["*MAT_RIGID"][0].cards[0].startswith("         1")
+    assert filecmp.cmp(before, c.save_kf(tmp_path / "clone.k"), shallow=False)
+    assert not filecmp.cmp(before, kf.save_kf(tmp_path / "base.k"), shallow=False)
+
+
+def test_clone_edits_stay_in_clone(tmp_path):
+    kf = bl_keyfile(str(DECK), show_pbar=0)
+    before = kf.save_kf(tmp_path / "before.k")
+    c = kf.clone()
+    c2 = c.clone()
+    c.keywords["*NODE"]["obj"].iloc[3].x = 1.0
+    assert c.keywords["*NODE"]["x"].iloc[3] == 1.0
+    assert c2.keywords["*NODE"]["obj"].iloc[3].x != 1.0
+    assert filecmp.cmp(before, kf.save_kf(tmp_path / "base.k"), shallow=False)
+    assert filecmp.cmp(before, c2.save_kf(tmp_path / "clone2.k"), shallow=False)
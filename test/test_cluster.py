@@ -0,0 +1,40 @@
+import pathlib, shutil, sys, threading
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_coordinator, bl_worker, fake_solver
+
+DECK = pathlib.Path(__file__).with_name("merge_small.k")
+
+
+def test_coordinator_worker_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.setenv("BL_FAKE_SCALE", "0.01")
+    monkeypatch.setenv("BL_FAKE_STATES", "2")
+    solver = fake_solver(tmp_path / "bin" / "fake_dyna")
+    (tmp_path / "model").mkdir()
+    deck = shutil.copy(DECK, tmp_path / "model" / "small.k")
+    with bl_coordinator(("127.0.0.1", 0)) as co:
+        with pytest.raises(ValueError):
+            co.submit(deck, NCPU=1, job_id="../escape")
+        with pytest.raises(ValueError):
+            co.submit(deck, NCPU=1, solver="/bin/sh")
+        job_id = co.submit(deck, NCPU=1, MEMORY=1000, job_id="small")
+
+        intruder = bl_worker(co.address, root=tmp_path / "bad", solver=solver, token="wrong")
+        with pytest.raises(PermissionError):
+            intruder.run()
+        assert co.queue.jobs[job_id]["state"] == "pending"
+
+        worker = bl_worker(
+            co.address, root=tmp_path / "w", cores=2, solver=solver, poll=0.05, token=co.token
+        )
+        _t = threading.Thread(target=worker.run, daemon=True)
+        _t.start()
+        results = co.wait(timeout=120)
+    _t.join(30)
+    assert not _t.is_alive()
+    assert set(results) == {job_id}
+    res = results[job_id]
+    assert res["returncode"] == 0 and res["status"] == "finished"
+    assert pathlib.Path(res["runpath"], "d3hsp").exists()
+    assert (tmp_path / "w" / "runs" / job_id / "src" / "small.k").read_bytes() == deck.read_bytes()
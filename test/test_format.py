@@ -0,0 +1,39 @@
+import json, pathlib, sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import format_array2str, format_fields2str, format_numeric2str
+
+GOLDEN = json.loads((pathlib.Path(__file__).with_name("format_golden.json")).read_text("utf-8"))
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=lambda c: f"{c['kind']}{c['width']}")
+def test_format_numeric2str_golden(case):
+    assert [format_numeric2str(v, case["width"]) for v in case["values"]] == case["expected"]
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=lambda c: f"{c['kind']}{c['width']}")
+def test_format_array2str_golden(case):
+    values = np.array(case["values"], dtype=np.float64 if case["kind"] == "float" else np.int64)
+    assert format_array2str(values, case["width"]).tolist() == case["expected"]
+    _s = format_array2str(values, case["width"], dtype="S").tolist()
+    assert [x.decode("utf-8") for x in _s] == case["expected"]
+
+
+@pytest.mark.parametrize("width", [8, 10, 16, 20])
+def test_format_array2str_random(width):
+    rng = np.random.default_rng(width)
+    values = np.concatenate(
+        [rng.normal(0, 1000, 5000), rng.normal(0, 1, 5000), rng.uniform(-1e-3, 1e-3, 1000)]
+    )
+    expected = [format_numeric2str(v, width) for v in values.tolist()]
+    assert format_array2str(values, width).tolist() == expected
+    assert format_array2str(values.reshape(-1, 11), width).ravel().tolist() == expected
+
+
+def test_format_fields2str_mixed():
+    values = [7, 1.5, -0.25, "", 123456789, 2.5e-9]
+    widths = [8, 16, 16, 8, 8, 10]
+    expected = [" " * w if v == "" else format_numeric2str(v, w) for v, w in zip(values, widths)]
+    assert format_fields2str(values, widths) == expected
@@ -0,0 +1,65 @@
+import os, pathlib, sys
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_keyfile
+
+DECK = pathlib.Path(__file__).with_name("merge_small.k")
+
+
+def block(text, *kws):
+    _blocks = text.split("\n*")
+    return "".join("*" + b + "\n" for b in _blocks if b.split("\n")[0].lstrip("*") in kws)
+
+
+@pytest.fixture
+def deck(tmp_path):
+    text = DECK.read_text()
+    src, ext = tmp_path / "src", tmp_path / "ext"
+    (src / "sub").mkdir(parents=True)
+    ext.mkdir()
+    (src / "mesh.k").write_text("*KEYWORD\n" + block(text, "NODE", "ELEMENT_SHELL") + "*END\n")
+    (src / "sub" / "props.k").write_text(
+        "*KEYWORD\n" + block(text, "PART", "SECTION_SHELL", "MAT_ELASTIC") + "*END\n"
+    )
+    _extra = block(text, "DEFINE_TRANSFORMATION", "DEFINE_COORDINATE_NODES", "BOUNDARY_SPC_SET")
+    (ext / "extra.k").write_text("*KEYWORD\n" + _extra + "*END\n")
+    _sets = block(text, "SET_NODE_LIST", "SET_PART_LIST", "CONTACT_AUTOMATIC_SINGLE_SURFACE_ID")
+    (src / "master.k").write_text(
+        "*KEYWORD\n*INCLUDE\nmesh.k\n*INCLUDE\nsub/props.k\n*INCLUDE\n../ext/extra.k\n"
+        + _sets
+        + "*END\n"
+    )
+    return src / "master.k"
+
+
+def flat(path, out):
+    return bl_keyfile(str(path), show_pbar=0).save_kf(out).read_bytes()
+
+
+def test_keep_include_links_clean_files(deck, tmp_path):
+    kf = bl_keyfile(str(deck), show_pbar=0)
+    assert len(kf.keywords["*NODE"]) == 6 and "*BOUNDARY_SPC_SET" in kf.keywords
+    want = kf.save_kf(tmp_path / "flat.k")
+
+    out = kf.save_kf(tmp_path / "out" / "master.k", keep_include=1)
+    _src = deck.parent
+    assert os.path.samefile(out.parent / "mesh.k", _src / "mesh.k")
+    assert os.path.samefile(out.parent / "sub" / "props.k", _src / "sub" / "props.k")
+    # 目标目录外的包含文件放到主文件旁, 并改写 *INCLUDE
+    assert (out.parent / "extra.k").read_bytes() == (tmp_path / "ext" / "extra.k").read_bytes()
+    assert "../ext/extra.k" not in out.read_text()
+    assert flat(out, tmp_path / "a.k") == want.read_bytes()
+
+    kf.keywords["*NODE"]["obj"].iloc[1].x = 1.75
+    out = kf.save_kf(tmp_path / "edit" / "master.k", keep_include=1)
+    assert not os.path.samefile(out.parent / "mesh.k", _src / "mesh.k")
+    assert "1.75" in (out.parent / "mesh.k").read_text()
+    assert os.path.samefile(out.parent / "sub" / "props.k", _src / "sub" / "props.k")
+    assert flat(out, tmp_path / "b.k") == kf.save_kf(tmp_path / "flat_edit.k").read_bytes()
+    assert "1.75" not in (_src / "mesh.k").read_text()
+
+    out = kf.save_kf(tmp_path / "copy" / "master.k", keep_include=1, link=0)
+    _props = out.parent / "sub" / "props.k"
+    assert not os.path.samefile(_props, _src / "sub" / "props.k")
+    assert _props.read_bytes() == (_src / "sub" / "props.k").read_bytes()
@@ -0,0 +1,72 @@
+import pathlib, sys, threading
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_keyfile
+
+DECK = pathlib.Path(__file__).with_name("roof_crush_impactor_03_pos.k")
+
+
+def test_insert_kws_then_read():
+    kf = bl_keyfile(str(DECK), show_pbar=0)
+    n = len(kf.keywords["*NODE"])
+    kf.insert_kws("*NODE", np.array([[9999991, 1.0, 2.0, 3.0], [9999992, 4.0, 5.0, 6.0]]))
+    assert len(kf.keywords["*NODE"]) == n + 2
+    assert len(kf.nodes["*NODE"]) == n + 2
+    assert kf.keywords["*NODE"]["id"].iloc[-1] == 9999992
+    assert kf.keywords["*NODE"]["obj"].iloc[-1].z == 6.0
+
+
+def test_insert_kws_batch():
+    kf = bl_keyfile(str(DECK), show_pbar=0)
+    n = len(kf.keywords["*NODE"])
+    with kf.batch():
+        for i in range(3):
+            kf.insert_kws("*NODE", np.array([[9999991 + i, 1.0, 2.0, float(i)]]))
+        assert len(kf.keywords["*NODE"]) == n
+    assert len(kf.keywords["*NODE"]) == n + 3
+    assert kf.keywords["*NODE"]["z"].iloc[-3:].tolist() == [0.0, 1.0, 2.0]
+
+
+def test_remove_kws_drops_orphan_nodes():
+    kf = bl_keyfile(str(DECK), show_pbar=0)
+    n = len(kf.keywords["*NODE"])
+    kf.insert_kws("*NODE", np.array([[9999991 + i, float(i), 0.0, 0.0] for i in range(4)]))
+    kf.insert_kws("*ELEMENT_SHELL", np.array([[9999991, 1, 9999991, 9999992, 9999993, 9999994]]))
+    _n1 = kf.keywords["*ELEMENT_SHELL"]["id_nodes"].iloc[0]
+    result = kf.remove_kws("*ELEMENT_SHELL", [9999991, 1], drop_orphan_nodes=1)
+    assert sorted(e.id for e in result["del"]) == [1, 9999991]
+    assert 9999991 not in kf.keywords["*ELEMENT_SHELL"]["id"].to_numpy()
+    _used = {i for x in kf.keywords["*ELEMENT_SHELL"]["id_nodes"] for i in x}
+    _gone = {n.id for n in result["del_nodes"]}
+    assert {9999991, 9999992, 9999993, 9999994} <= _gone
+    assert not _gone & _used
+    assert set(_n1) - _used <= _gone
+    assert len(kf.keywords["*NODE"]) == n + 4 - len(_gone)
+
+
+def test_flush_under_concurrent_read_locks():
+    kf = bl_keyfile(str(DECK), show_pbar=0)
+    n = len(kf.keywords["*NODE"])
+    _rw, _gate, errors = kf._bl_keyfile__rwlock, threading.Barrier(2), []
+
+    def reader(i):
+        try:
+            with _rw.read():
+                _gate.wait(5)
+                # 持有读锁时 flush 升级为写锁, 两个读者不能互相等死
+                kf.flush_kws()
+                assert len(kf.keywords["*NODE"]) == n + 2
+                assert len(kf.filter_TopoDF_by_ids("nodes", [9999991 + i])) == 1
+        except Exception as e:
+            errors.append(e)
+
+    _nodes = np.array([[9999991, 1.0, 2.0, 3.0], [9999992, 4.0, 5.0, 6.0]])
+    kf.insert_kws("*NODE", _nodes, flush=0)
+    threads = [threading.Thread(target=reader, args=(i,), daemon=True) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    assert not any(t.is_alive() for t in threads) and not errors
+    assert len(kf.keywords["*NODE"]) == n + 2
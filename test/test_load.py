@@ -0,0 +1,55 @@
+import builtins, os, pathlib, shutil, sys
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import bl_dyna
+from bl_dyna import bl_keyfile, load_many
+
+DECK = pathlib.Path(__file__).with_name("roof_crush_impactor_03_pos.k")
+
+
+@pytest.fixture
+def decks(tmp_path):
+    shutil.copy(DECK, tmp_path / "body.k")
+    paths = []
+    for i, t in enumerate([1.0, 1.5, 2.0]):
+        path = tmp_path / f"var_{i}.k"
+        path.write_text(f"*KEYWORD\n*PARAMETER\nR T1      {t:<10}\n*INCLUDE\nbody.k\n*END\n")
+        paths.append(path)
+    return paths
+
+
+def saved(models, path):
+    path.mkdir()
+    return [m.save_kf(path / f"{i}.k").read_bytes() for i, m in enumerate(models)]
+
+
+def test_load_many_reads_shared_include_once(decks, tmp_path, monkeypatch):
+    single = saved([bl_keyfile(str(p), show_pbar=0) for p in decks], tmp_path / "single")
+    assert len(set(single)) == 3
+
+    calls = []
+
+    def counting(name, func):
+        def wrapper(path, *args, **kwargs):
+            if isinstance(path, (str, os.PathLike)) and pathlib.Path(path).name == "body.k":
+                calls.append(name)
+            return func(path, *args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(bl_dyna, "read_kf_lines", counting("parse", bl_dyna.read_kf_lines))
+    monkeypatch.setattr(builtins, "open", counting("open", builtins.open))
+    monkeypatch.setattr(os, "stat", counting("stat", os.stat))
+    models = load_many(decks, workers=1)
+    monkeypatch.undo()
+    # 包含文件只读取并切分一次, 其余模型仅 stat 校验缓存
+    assert calls.count("parse") == 1 and calls.count("open") == 1
+    assert calls.count("stat") >= 3
+    assert saved(models, tmp_path / "serial") == single
+
+    models[0].keywords["*NODE"]["obj"].iloc[0].x = 123.5
+    assert models[1].keywords["*NODE"]["obj"].iloc[0].x != 123.5
+
+    models = load_many(decks, workers=2)
+    assert saved(models, tmp_path / "pool") == single
@@ -0,0 +1,49 @@
+import pathlib, sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_keyfile
+
+DECK = pathlib.Path(__file__).with_name("merge_small.k")
+CATES = ["nodes", "elems", "parts", "mats", "sections", "sets", "contacts", "tranids", "cids"]
+
+
+def test_merge_shifts_all_ids(tmp_path):
+    kf, other = bl_keyfile(str(DECK), show_pbar=0), bl_keyfile(str(DECK), show_pbar=0)
+    ids = {k: kf.collect_ids(k) for k in CATES}
+    offsets = kf.merge(other)
+    for k in CATES:
+        assert offsets[k] > 0
+        merged = kf.collect_ids(k)
+        assert len(merged) == 2 * len(ids[k])
+        np.testing.assert_array_equal(merged, np.union1d(ids[k], ids[k] + offsets[k]))
+
+    _o_n, _o_p, _o_s = offsets["nodes"], offsets["parts"], offsets["sets"]
+    shells = kf.keywords["*ELEMENT_SHELL"]
+    assert shells["id_part"].tolist() == [1, 1, 1 + _o_p, 1 + _o_p]
+    assert shells["id_nodes"].iloc[2] == [i + _o_n for i in shells["id_nodes"].iloc[0]]
+    part = kf.keywords["*PART"]
+    assert part["id_sec"].tolist() == [1, 1 + offsets["sections"]]
+    assert part["id_mat"].tolist() == [1, 1 + offsets["mats"]]
+    sets = kf.keywords["*SET_NODE_LIST"]
+    assert sets["nids"].iloc[1] == [[i + _o_n for i in l] for l in sets["nids"].iloc[0]]
+    contact = kf.keywords["*CONTACT_AUTOMATIC_SINGLE_SURFACE_ID"][1]
+    assert contact.cards[1][:10] == f"{2 + _o_s:10d}"
+    coord = kf.keywords["*DEFINE_COORDINATE_NODES"][1]
+    assert coord.cards[0][:40] == "".join(f"{x:10d}" for x in [2, 1 + _o_n, 2 + _o_n, 4 + _o_n])
+    assert kf.keywords["*BOUNDARY_SPC_SET"][1].cards[0][:10] == f"{1 + _o_s:10d}"
+
+    reloaded = bl_keyfile(str(kf.save_kf(tmp_path / "merged.k")), show_pbar=0)
+    for k in CATES:
+        np.testing.assert_array_equal(reloaded.collect_ids(k), kf.collect_ids(k))
+
+
+def test_merge_rejects_collisions_and_overflow():
+    kf, other = bl_keyfile(str(DECK), show_pbar=0), bl_keyfile(str(DECK), show_pbar=0)
+    offsets = dict.fromkeys(CATES + ["curves", "hgids"], 100)
+    with pytest.raises(ValueError, match="nodes"):
+        kf.merge(other, offsets={**offsets, "nodes": 2})
+    with pytest.raises(ValueError, match="int32"):
+        kf.merge(other, offsets={**offsets, "nodes": 2**31 - 3})
+    assert len(kf.keywords["*NODE"]) == 6
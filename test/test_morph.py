@@ -0,0 +1,51 @@
+import pathlib, sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_keyfile
+
+DECK = pathlib.Path(__file__).with_name("roof_crush_impactor_03_pos.k")
+
+
+@pytest.fixture(scope="module")
+def base():
+    return bl_keyfile(str(DECK), show_pbar=0)
+
+
+def test_morph_and_reverse_roundtrip(base, tmp_path):
+    kf = base.clone()
+    ids = kf.keywords["*NODE"]["id"].iloc[::7].to_numpy()
+    kf.morph_nodes(ids, [0.5, -0.25, 2.0])
+    _n = kf.keywords["*NODE"].set_index("id")
+    _b = base.keywords["*NODE"].set_index("id")
+    assert np.allclose(_n.loc[ids, "x"] - _b.loc[ids, "x"], 0.5)
+    assert _n.drop(index=ids)[["x", "y", "z"]].equals(_b.drop(index=ids)[["x", "y", "z"]])
+    before = base.save_kf(tmp_path / "b.k").read_bytes()
+    assert kf.save_kf(tmp_path / "m.k").read_bytes() != before
+    m = bl_keyfile(str(tmp_path / "m.k"), show_pbar=0).keywords["*NODE"].set_index("id")
+    assert np.allclose(m.loc[ids, ["x", "y", "z"]], _n.loc[ids, ["x", "y", "z"]], atol=1e-3)
+
+    kf.morph_nodes(ids, [-0.5, 0.25, -2.0])
+    assert kf.save_kf(tmp_path / "r.k").read_bytes() == before
+
+
+def test_morph_rbf_hits_control_points(base, tmp_path):
+    before = base.save_kf(tmp_path / "before.k").read_bytes()
+    kf = base.clone()
+    _ids = kf.keywords["*NODE"]["id"].to_numpy()
+    control = _ids[[0, 3000, 6000, 9000, 12000]]
+    control_disp = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0], [0, 0, 0]], float)
+    disp = kf.morph_nodes(control=control, control_disp=control_disp)
+    assert disp.shape == (len(_ids), 3)
+    assert np.allclose(disp[[0, 3000, 6000, 9000, 12000]], control_disp, atol=1e-6)
+    _n = kf.keywords["*NODE"]
+    assert np.allclose(_n["obj"].iloc[3000].y - base.keywords["*NODE"]["y"].iloc[3000], 1.0)
+    # 克隆上的变形不影响基础模型
+    assert base.save_kf(tmp_path / "after.k").read_bytes() == before
+    assert not np.allclose(_n[["x", "y", "z"]], base.keywords["*NODE"][["x", "y", "z"]])
+
+    with pytest.raises(KeyError):
+        kf.morph_nodes(control=[-1], control_disp=[0, 0, 0])
+    with pytest.raises(ValueError):
+        kf.morph_nodes(control=control, control_disp=control_disp, method="spline")
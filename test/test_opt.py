@@ -0,0 +1,95 @@
+import pathlib, sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import batch_multiline, bl_rbf, extract_response, fake_solver, latin_hypercube
+
+DECK = pathlib.Path(__file__).with_name("merge_small.k")
+
+
+@pytest.fixture
+def solver(tmp_path, monkeypatch):
+    monkeypatch.setenv("BL_FAKE_SCALE", "0.1")
+    monkeypatch.setenv("BL_FAKE_STATES", "4")
+    _solver = fake_solver(tmp_path / "bin" / "fake_dyna")
+    # 首批第二个样本求解失败
+    path = _solver.with_name("flaky_dyna")
+    path.write_text(
+        "#!/bin/sh\n"
+        + 'case "$*" in *_00_001.k*) BL_FAKE_FAIL=0.5; export BL_FAKE_FAIL;; esac\n'
+        + f'exec "{_solver}" "$@"\n'
+    )
+    path.chmod(0o755)
+    return path
+
+
+@pytest.fixture
+def deck(tmp_path):
+    (tmp_path / "model").mkdir()
+    path = tmp_path / "model" / "small.k"
+    _text = DECK.read_text().replace("*KEYWORD\n", "*KEYWORD\n*PARAMETER\nR T1      1.0\n", 1)
+    path.write_text(_text)
+    return path
+
+
+def test_latin_hypercube_and_rbf():
+    X = latin_hypercube(8, 2, rng=0)
+    assert X.shape == (8, 2) and ((X >= 0) & (X < 1)).all()
+    assert all(sorted((X[:, j] * 8).astype(int)) == list(range(8)) for j in range(2))
+    X = latin_hypercube(20, 2, rng=1) * 2 - 1
+    y = (X**2).sum(axis=1)
+    rbf = bl_rbf().fit(X, y, [-1, -1], [1, 1])
+    assert np.allclose(rbf.predict(X), y, atol=1e-5)
+    assert abs(rbf.predict([[0.0, 0.0]])[0]) < 0.2
+
+
+def test_opt_loop_scores_finished_jobs(solver, deck, tmp_path):
+    scored = []
+
+    def response(runpath, result, params):
+        scored.append(runpath.name)
+        _ke = extract_response("glstat:kinetic energy:last", runpath)
+        assert _ke == pytest.approx(0.5)
+        return (params["T1"] - 1.2) ** 2 + _ke
+
+    opt = batch_multiline(
+        deck,
+        {"t1": (0.5, 2.0)},
+        response=response,
+        runpath=tmp_path / "opt",
+        batch_size=2,
+        n_init=4,
+        seed=0,
+        solver=str(solver),
+        NCPU=1,
+    )
+    hist = opt.run_opt_loop(n_iter=3, max_workers=2)
+
+    assert list(hist.groupby("iter").size()) == [4, 2, 2]
+    failed = hist[hist["job_id"] == "it00_001"]
+    assert len(failed) == 1 and np.isnan(failed["response"].iloc[0])
+    assert opt.queue.jobs["it00_001"]["state"] == "failed"
+    assert hist["response"].notna().sum() == 7 == len(scored)
+    assert hist["T1"].between(0.5, 2.0).all()
+    assert opt.best["job_id"] != "it00_001"
+    assert opt.best["response"] == hist["response"].min()
+
+    # 续跑: 读取历史记录, 从下一轮开始
+    opt = batch_multiline(
+        deck,
+        {"t1": (0.5, 2.0)},
+        response=response,
+        runpath=tmp_path / "opt",
+        batch_size=2,
+        solver=str(solver),
+        NCPU=1,
+    )
+    hist = opt.run_opt_loop(n_iter=1, max_workers=2)
+    assert list(hist.groupby("iter").size()) == [4, 2, 2, 2] and len(scored) == 9
+
+
+def test_extract_response_specs(tmp_path):
+    assert extract_response("result:TotalCpuTime", tmp_path, {"TotalCpuTime": 3}) == 3.0
+    with pytest.raises(ValueError):
+        extract_response("d3plot:x", tmp_path)
@@ -0,0 +1,47 @@
+import pathlib, sys
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_keyfile
+
+
+def write_deck(path, n_nodes=100002):
+    lines = ["*KEYWORD\n", "*NODE\n"]
+    for i in range(1, n_nodes + 1):
+        _l = f"{i:8d}{i * 0.5:16.4f}{-i * 0.25:16.4f}{i % 7:16.1f}"
+        if i % 1000 == 0:
+            _l += f"{i % 8:8d}{i % 3:8d}"
+        elif i % 1001 == 0:
+            _l += f"{7:8d}"
+        lines.append(_l + "\n")
+    lines.append("*ELEMENT_SHELL\n")
+    for i in range(1, 100002):
+        _n = [i, i + 1, i + 1, i] if i % 5 == 0 else [i, i + 1, i + 2, i + 3]
+        lines.append(f"{i:8d}{1:8d}" + "".join(f"{x:8d}" for x in _n) + "\n")
+    lines.append("*ELEMENT_BEAM\n")
+    for i in range(1, 101):
+        _l = f"{i:8d}{2:8d}{i:8d}{i + 1:8d}"
+        if i % 3 == 0:
+            _l += f"{i + 2:8d}{1:8d}{0:8d}"
+        elif i % 3 == 1:
+            _l += f"{i + 2:8d}" + " " * 8
+        lines.append(_l + "\n")
+    lines.append("*END\n")
+    path.write_text("".join(lines), "utf-8")
+    return path
+
+
+def test_process_parse_matches_serial(tmp_path):
+    deck = write_deck(tmp_path / "big.k")
+    serial = bl_keyfile(str(deck), show_pbar=0)
+    pooled = bl_keyfile(str(deck), show_pbar=0, acc_parsebyprocess=2)
+    for kw in ["*NODE", "*ELEMENT_SHELL", "*ELEMENT_BEAM"]:
+        _s, _p = serial.keywords[kw], pooled.keywords[kw]
+        pd.testing.assert_frame_equal(_s.drop(columns="obj"), _p.drop(columns="obj"))
+        assert [o.str for o in _s["obj"]] == [o.str for o in _p["obj"]]
+    _add = serial.keywords["*NODE"]["card1_add_fields"]
+    assert _add.iloc[999] == {"TC": "       0", "RC": "       1"}
+    assert _add.iloc[0] == {}
+    assert serial.keywords["*ELEMENT_BEAM"]["card1_add_fields"].iloc[0] == {"N3": 3, "RT1": ""}
+    _s, _p = serial.save_kf(tmp_path / "s.k"), pooled.save_kf(tmp_path / "p.k")
+    assert _s.read_text("utf-8") == _p.read_text("utf-8")
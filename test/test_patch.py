@@ -0,0 +1,31 @@
+import filecmp, pathlib, shutil, sys
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_keyfile
+
+DECK = pathlib.Path(__file__).with_name("roof_crush_impactor_03_pos.k")
+
+
+def test_save_patch_roundtrip(tmp_path):
+    base = tmp_path / "Base" / "Roof_Crush.k"
+    base.parent.mkdir()
+    (tmp_path / "Out").mkdir()
+    shutil.copy(DECK, base)
+    kf = bl_keyfile(str(base), show_pbar=0)
+    n_nodes = len(kf.keywords["*NODE"])
+    kf.insert_kws("*NODE", np.array([[9999991, 1.0, 2.0, 3.0]]))
+    patch = kf.save_patch(tmp_path / "Out" / "Roof_Patch.k")
+    assert (tmp_path / "Out" / "Roof_Patch_overlay.k").exists()
+    assert "../Base/Roof_Crush.k\n" in patch.read_text("utf-8")
+
+    mtime = (tmp_path / "Out" / "Roof_Patch_overlay.k").stat().st_mtime_ns
+    kf.save_patch(patch)
+    assert (tmp_path / "Out" / "Roof_Patch_overlay.k").stat().st_mtime_ns == mtime
+
+    reloaded = bl_keyfile(str(patch), show_pbar=0)
+    assert len(reloaded.keywords["*NODE"]) == n_nodes + 1
+    assert 9999991 in reloaded.keywords["*NODE"]["id"].to_numpy()
+    assert filecmp.cmp(
+        kf.save_kf(tmp_path / "edited.k"), reloaded.save_kf(tmp_path / "reloaded.k"), shallow=False
+    )
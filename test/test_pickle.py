@@ -0,0 +1,64 @@
+import pathlib, pickle, sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import attach_shm, attach_topo, bl_keyfile, detach_topo, shm_attached
+
+DECK = pathlib.Path(__file__).with_name("roof_crush_impactor_03_pos.k")
+
+
+@pytest.fixture(scope="module")
+def kf():
+    return bl_keyfile(str(DECK), show_pbar=0)
+
+
+def topo_sums(handle):
+    topo = attach_topo(handle)
+    try:
+        return {kw: {c: float(a.sum()) for c, a in cols.items()} for kw, cols in topo.items()}
+    finally:
+        del topo
+        detach_topo(handle)
+
+
+def test_pickle_roundtrip_saves_same_deck(kf, tmp_path):
+    kf.save_kf(tmp_path / "a.k")
+    other = pickle.loads(pickle.dumps(kf))
+    other.save_kf(tmp_path / "b.k")
+    assert (tmp_path / "a.k").read_bytes() == (tmp_path / "b.k").read_bytes()
+
+    # 反序列化得到的模型可独立修改
+    other.keywords["*NODE"]["obj"].iloc[0].x = 123.5
+    other.save_kf(tmp_path / "c.k")
+    kf.save_kf(tmp_path / "d.k")
+    assert (tmp_path / "c.k").read_bytes() != (tmp_path / "a.k").read_bytes()
+    assert (tmp_path / "d.k").read_bytes() == (tmp_path / "a.k").read_bytes()
+
+
+def test_share_topo_attach_and_cleanup(kf):
+    handle = kf.share_topo()
+    try:
+        assert "*NODE" in handle and "*ELEMENT_SHELL" in handle
+        topo = attach_topo(handle)
+        _n, _e = kf.keywords["*NODE"], kf.keywords["*ELEMENT_SHELL"]
+        assert np.array_equal(topo["*NODE"]["id"], _n["id"].to_numpy())
+        assert np.allclose(topo["*NODE"]["xyz"], _n[["x", "y", "z"]].to_numpy(float))
+        assert np.array_equal(topo["*ELEMENT_SHELL"]["id_part"], _e["id_part"].to_numpy())
+        _nl = _e["id_nodes"].tolist()
+        _mat = topo["*ELEMENT_SHELL"]["id_nodes"]
+        assert all(list(_mat[i, : len(x)]) == list(x) for i, x in enumerate(_nl[:500]))
+        del topo
+        detach_topo(handle)
+        names = [name for cols in handle.values() for name, _, _ in cols.values()]
+        assert not set(names) & set(shm_attached)
+
+        # 子进程按 handle 挂载, 读到的数据与本进程一致
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(topo_sums, handle).result() == topo_sums(handle)
+    finally:
+        kf.unshare_topo()
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            attach_shm(name)
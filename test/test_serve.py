@@ -0,0 +1,93 @@
+import pathlib, shutil, sys, threading, time
+from multiprocessing import AuthenticationError
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_keyfile, bl_keyfile_client, serve_address, serve_kf
+
+DECK = pathlib.Path(__file__).with_name("roof_crush_impactor_03_pos.k")
+
+
+@pytest.fixture
+def server(tmp_path):
+    kf = bl_keyfile(str(DECK), show_pbar=0)
+    address, authkey = str(tmp_path / "kf.sock"), b"0123456789abcdef"
+    _t = threading.Thread(target=serve_kf, args=(kf, address, authkey), daemon=True)
+    _t.start()
+    for _ in range(100):
+        if pathlib.Path(address).exists():
+            break
+        time.sleep(0.05)
+    yield kf, address, authkey
+    with bl_keyfile_client(address, authkey) as c:
+        c.shutdown()
+    _t.join(5)
+
+
+def test_client_roundtrip(server):
+    kf, address, authkey = server
+    with bl_keyfile_client(address, authkey) as c:
+        assert len(c.keywords["*NODE"]) == len(kf.keywords["*NODE"])
+        node = c.keywords["*NODE"][0]
+        assert node.id == kf.keywords["*NODE"]["id"].iloc[0]
+        node.x = 12.5
+        assert kf.keywords["*NODE"]["x"].iloc[0] == 12.5
+        assert c.keywords["*MAT_RIGID"][0].cards == kf.keywords["*MAT_RIGID"][0].cards
+        np.testing.assert_array_equal(c.collect_ids("parts"), kf.collect_ids("parts"))
+        with pytest.raises(PermissionError):
+            c.read_kf("other.k")
+
+
+def test_client_calls_are_serialized(server):
+    kf, address, authkey = server
+    n = len(kf.keywords["*NODE"])
+
+    def insert(base):
+        with bl_keyfile_client(address, authkey) as c:
+            for i in range(20):
+                c.insert_kws("*NODE", np.array([[base + i, 0.0, 0.0, float(i)]]))
+
+    _ts = [threading.Thread(target=insert, args=(b,)) for b in (9000001, 9100001, 9200001)]
+    for _t in _ts:
+        _t.start()
+    for _t in _ts:
+        _t.join()
+    assert len(kf.keywords["*NODE"]) == n + 60
+    assert kf.keywords["*NODE"]["id"].is_unique
+
+
+def test_client_rejects_bad_authkey(server):
+    kf, address, authkey = server
+    with pytest.raises(AuthenticationError):
+        bl_keyfile_client(address, b"not-the-key-0000")
+    with bl_keyfile_client(address, authkey) as c:
+        assert len(c.keywords["*NODE"]) == len(kf.keywords["*NODE"])
+
+
+def test_same_named_decks_get_distinct_addresses(tmp_path):
+    decks = []
+    for name, src in [("a", DECK), ("b", DECK.with_name("merge_small.k"))]:
+        (tmp_path / name).mkdir()
+        decks.append(shutil.copy(src, tmp_path / name / "deck.k"))
+    assert serve_address(decks[0]) != serve_address(decks[1])
+    assert serve_address(decks[0]) == serve_address(tmp_path / "b" / ".." / "a" / "deck.k")
+
+    threads = []
+    for d in decks:
+        kf = bl_keyfile(str(d), show_pbar=0)
+        threads.append(threading.Thread(target=serve_kf, args=(kf,), daemon=True))
+        threads[-1].start()
+    for d in decks:
+        for _ in range(100):
+            if pathlib.Path(serve_address(d)).exists():
+                break
+            time.sleep(0.05)
+    sizes = []
+    for d in decks:
+        with bl_keyfile_client(d) as c:
+            sizes.append(len(c.keywords["*NODE"]))
+            c.shutdown()
+    for t in threads:
+        t.join(5)
+    assert sizes == [14093, 6]
@@ -0,0 +1,269 @@
+import asyncio, json, pathlib, shutil, sys
+import pandas as pd
+import psutil
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_jobqueue, bl_keyfile, bl_runcache, bl_solve_monitor, fake_solver
+from bl_dyna import execute_in_parallel, find_restart, telemetry_frame, wire_solve_kwargs
+
+DECK = pathlib.Path(__file__).with_name("merge_small.k")
+
+
+@pytest.fixture
+def solver(tmp_path, monkeypatch):
+    monkeypatch.setenv("BL_FAKE_SCALE", "0.1")
+    monkeypatch.setenv("BL_FAKE_STATES", "4")
+    return fake_solver(tmp_path / "bin" / "fake_dyna")
+
+
+@pytest.fixture
+def deck(tmp_path):
+    (tmp_path / "model").mkdir()
+    return shutil.copy(DECK, tmp_path / "model" / "small.k")
+
+
+def test_solve_telemetry_opt_in(solver, deck, tmp_path):
+    kf = bl_keyfile(deck, show_pbar=0)
+    res = kf.solve(tmp_path / "run0", solver=solver, NCPU=1)
+    assert res["returncode"] == 0 and "telemetry" not in res
+    assert not (tmp_path / "run0" / "bl_telemetry.jsonl").exists()
+
+    res = kf.solve(tmp_path / "run1", solver=solver, NCPU=1, telemetry=0.02)
+    assert res["returncode"] == 0
+    assert res["telemetry"]["samples"] > 0
+    assert (tmp_path / "run1" / "bl_telemetry.jsonl").exists()
+    frame = telemetry_frame([res])
+    assert len(frame) == 1 and {"rss_peak", "cpu_mean", "ncpu_used"} <= set(frame.columns)
+
+
+def test_solve_runs_unchanged_deck_in_place(solver, deck, tmp_path):
+    kf = bl_keyfile(deck, show_pbar=0)
+    mtime = deck.stat().st_mtime_ns
+    res = kf.solve(tmp_path / "run", solver=solver, NCPU=1)
+    assert res["returncode"] == 0
+    assert "N o r m a l" in (tmp_path / "run" / "d3hsp").read_text()
+    assert not (tmp_path / "run" / "small.k").exists()
+    assert (tmp_path / "run" / "d3hsp").exists()
+    assert deck.stat().st_mtime_ns == mtime
+
+    res = kf.solve(tmp_path / "staged", solver=solver, NCPU=1, stage=1)
+    assert (tmp_path / "staged" / "small.k").exists()
+
+    kf.keywords["*NODE"]["obj"].iloc[0].x = 0.5
+    res = kf.solve(tmp_path / "edited", solver=solver, NCPU=1)
+    assert res["returncode"] == 0
+    assert "0.5" in (tmp_path / "edited" / "small.k").read_text("utf-8")
+    assert deck.stat().st_mtime_ns == mtime
+
+
+def test_solve_refuses_to_discard_input_dirs(solver, deck, tmp_path):
+    inc = tmp_path / "inc"
+    inc.mkdir()
+    (inc / "extra.k").write_text("*KEYWORD\n*END\n")
+    deck.write_text(deck.read_text().replace("*END", "*INCLUDE\n../inc/extra.k\n*END"))
+    kf = bl_keyfile(deck, show_pbar=0)
+    res = kf.solve(deck.parent, solver=solver, NCPU=1)
+    assert res["returncode"] == 0 and deck.exists()
+
+    kf.keywords["*NODE"]["obj"].iloc[0].x = 0.5
+    _before = sorted(tmp_path.rglob("*.k"))
+    for runpath in [deck.parent, tmp_path, inc]:
+        with pytest.raises(ValueError):
+            kf.solve(runpath, solver=solver, NCPU=1)
+    assert sorted(tmp_path.rglob("*.k")) == _before
+    assert "0.5" not in deck.read_text()
+    res = kf.solve(tmp_path / "run", solver=solver, NCPU=1)
+    assert res["returncode"] == 0 and (tmp_path / "run" / "extra.k").exists()
+
+
+def logged_solver(solver, log):
+    path = solver.with_name("logged_dyna")
+    path.write_text(
+        "#!/bin/sh\n"
+        + 'case "$*" in *bad*) exit 3;; esac\n'
+        + f'echo "start $(date +%s.%N)" >> "{log}"\n'
+        + f'"{solver}" "$@"\n'
+        + f'echo "end $(date +%s.%N)" >> "{log}"\n'
+    )
+    path.chmod(0o755)
+    return path
+
+
+def test_jobqueue_limits_and_failures(solver, tmp_path):
+    log = tmp_path / "jobs.log"
+    _solver = logged_solver(solver, log)
+    queue = bl_jobqueue(tmp_path / "queue.json", cores=2, memory=10**9)
+    for name in ["a", "b", "c", "bad"]:
+        (tmp_path / name).mkdir()
+        shutil.copy(DECK, tmp_path / name / f"{name}.k")
+        queue.submit(tmp_path / name / f"{name}.k", NCPU=8, MEMORY=1000, solver=_solver)
+    queue.submit(tmp_path / "missing.k", NCPU=1, solver=_solver)
+    results = queue.run(max_workers=4, retries=1)
+
+    states = {r["job_id"]: r["state"] for r in results}
+    assert [v for k, v in states.items() if "bad" not in k and "missing" not in k] == ["done"] * 3
+    assert [v for k, v in states.items() if "bad" in k or "missing" in k] == ["failed"] * 2
+    failed = {r["job_id"]: r for r in results if r["state"] == "failed"}
+    assert any(r.get("returncode") == 3 for r in failed.values())
+    assert any("error" in r for r in failed.values())
+    assert all(queue.jobs[k]["attempts"] == 1 for k in failed)
+    assert all(queue.jobs[k]["solve"]["restart"] == 1 for k in failed)
+
+    # 每个任务需要全部 2 核, 同一时刻只能有一个在运行
+    events = [l.split() for l in log.read_text().splitlines()]
+    assert [e[0] for e in events] == ["start", "end"] * 3
+    assert json.loads((tmp_path / "queue.json").read_text("utf-8")).keys() == queue.jobs.keys()
+
+
+def solver_procs():
+    _procs = []
+    for p in psutil.Process().children(recursive=True):
+        try:
+            if "--fake-solver" in p.cmdline() and p.status() != psutil.STATUS_ZOMBIE:
+                _procs.append(p)
+        except psutil.Error:
+            continue
+    return _procs
+
+
+def test_execute_in_parallel_batch_telemetry(solver, tmp_path):
+    batch = tmp_path / "batch"
+    batch.mkdir()
+    for name in ["a", "b"]:
+        shutil.copy(DECK, batch / f"{name}.k")
+    results = execute_in_parallel(
+        batch, max_workers=2, NCPU=1, telemetry=0.02, solver=solver, overrides={"b.k": {"NCPU": 2}}
+    )
+    assert [r["returncode"] for r in results] == [0, 0]
+    frame = pd.read_csv(batch / "bl_batch_telemetry.csv")
+    assert sorted(pathlib.Path(x).name for x in frame["runpath"]) == ["a", "b"]
+    assert (frame["samples"] > 0).all() and {"rss_peak", "ncpu_used"} <= set(frame.columns)
+
+    (batch / "bl_batch_telemetry.csv").unlink()
+    results = execute_in_parallel(batch, max_workers=2, NCPU=1, solver=solver)
+    assert all("telemetry" not in r for r in results)
+    assert not (batch / "bl_batch_telemetry.csv").exists()
+
+
+def test_solve_async_timeout_and_cancel(solver, deck, tmp_path, monkeypatch):
+    monkeypatch.setenv("BL_FAKE_SCALE", "30")
+    kf = bl_keyfile(deck, show_pbar=0)
+    lines = []
+    res = asyncio.run(
+        kf.solve_async(
+            tmp_path / "timeout",
+            solver=solver,
+            NCPU=1,
+            timeout=1.0,
+            grace=2,
+            on_line=lambda s, err: lines.append(s),
+        )
+    )
+    assert res["status"] == "timeout" and res["returncode"] != 0
+    assert any("Input file" in l for l in lines)
+    assert not solver_procs()
+
+    async def cancel():
+        task = asyncio.create_task(
+            kf.solve_async(tmp_path / "cancel", solver=solver, NCPU=1, grace=2)
+        )
+        await asyncio.sleep(1.0)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancel())
+    assert not solver_procs()
+    assert "N o r m a l" not in (tmp_path / "cancel" / "d3hsp").read_text()
+
+
+def test_monitor_rules():
+    monitor = bl_solve_monitor(endtim=1.0)
+    monitor.feed("       10 t 1.0000E-01 dt 1.00E-03 write d3plot file")
+    monitor.feed(" total energy / initial energy..   1.00000E+00")
+    assert monitor.check() is None and monitor.state["progress"] == pytest.approx(0.1)
+    monitor.feed(" total energy / initial energy..   1.20000E+00")
+    assert monitor.check() == "energy_ratio"
+    monitor = bl_solve_monitor(rules={"error_termination": None})
+    monitor.feed(" E r r o r   t e r m i n a t i o n")
+    assert monitor.state["terminated"] == "error" and monitor.check() is None
+
+
+def test_monitor_aborts_solve(solver, deck, tmp_path, monkeypatch):
+    kf = bl_keyfile(deck, show_pbar=0)
+    monkeypatch.setenv("BL_FAKE_FAIL", "0.5")
+    res = asyncio.run(kf.solve_async(tmp_path / "error", solver=solver, NCPU=1, monitor=True))
+    assert res["returncode"] == 1 and res["monitor"]["terminated"] == "error"
+
+    monkeypatch.setenv("BL_FAKE_FAIL", "0")
+    monkeypatch.setenv("BL_FAKE_SCALE", "2")
+    monitor = bl_solve_monitor(poll=0.05, rules={"halfway": lambda st: st["progress"] >= 0.25})
+    res = asyncio.run(
+        kf.solve_async(tmp_path / "rule", solver=solver, NCPU=1, monitor=monitor, grace=2)
+    )
+    assert res["status"] == "aborted" and res["abort_reason"] == "halfway"
+    assert 0.25 <= res["monitor"]["progress"] < 1.0
+    assert not solver_procs()
+
+
+def test_monitor_aborts_sync_and_queued_solve(solver, deck, tmp_path, monkeypatch):
+    monkeypatch.setenv("BL_FAKE_SCALE", "2")
+    kf = bl_keyfile(deck, show_pbar=0)
+    monitor = bl_solve_monitor(poll=0.05, rules={"halfway": lambda st: st["progress"] >= 0.25})
+    res = kf.solve(tmp_path / "rule", solver=solver, NCPU=1, monitor=monitor, grace=2)
+    assert res["status"] == "aborted" and res["abort_reason"] == "halfway"
+    assert 0.25 <= res["monitor"]["progress"] < 1.0 and res["returncode"] != 0
+    assert not solver_procs()
+
+    # 队列/分发只能传可序列化的监控参数
+    monkeypatch.setenv("BL_FAKE_SCALE", "0.1")
+    queue = bl_jobqueue(tmp_path / "queue.json", cores=2)
+    _spec = {"poll": 0.05, "rules": {"energy_ratio": None}}
+    for k, _m in [("m", _spec), ("n", None)]:
+        queue.submit(deck, job_id=k, NCPU=1, solver=solver, runpath=tmp_path / k, monitor=_m)
+    queue.run(max_workers=2)
+    _res = queue.jobs["m"]["result"]
+    assert queue.jobs["m"]["state"] == "done" and _res["monitor"]["terminated"] == "normal"
+    assert "monitor" not in queue.jobs["n"]["result"]
+    assert "monitor" in wire_solve_kwargs
+    with pytest.raises(ValueError):
+        kf.solve(tmp_path / "bad", solver=solver, monitor={"rules": {"energy_ratio": 2}})
+
+
+def test_runcache_hits_after_staged_change(solver, deck, tmp_path):
+    cache = bl_runcache(tmp_path / "cache")
+    kf = bl_keyfile(deck, show_pbar=0)
+    first = kf.solve(tmp_path / "run", solver=solver, NCPU=1, cache=cache)
+    assert first["returncode"] == 0 and not first.get("cached")
+    again = kf.solve(tmp_path / "run", solver=solver, NCPU=1, cache=cache)
+    assert again["cached"] and (tmp_path / "run" / "d3hsp").exists()
+
+    key = kf.run_key(solver, 1)
+    kf.keywords["*NODE"]["obj"].iloc[0].x = 0.5
+    assert kf.run_key(solver, 1) != key
+    edited = kf.solve(tmp_path / "edited", solver=solver, NCPU=1, cache=cache)
+    assert not edited.get("cached")
+    hit = kf.solve(tmp_path / "edited2", solver=solver, NCPU=1, cache=cache)
+    assert hit["cached"] and hit["runpath"] == tmp_path / "edited2"
+    assert "0.5" in (tmp_path / "edited2" / "small.k").read_text("utf-8")
+    assert len(cache.entries()) == 2
+
+
+def test_solve_resumes_from_d3dump(solver, deck, tmp_path, monkeypatch):
+    kf = bl_keyfile(deck, show_pbar=0)
+    assert find_restart(tmp_path / "run") is None
+    monkeypatch.setenv("BL_FAKE_KILL", "0.5")
+    killed = kf.solve(tmp_path / "run", solver=solver, NCPU=1)
+    assert killed["returncode"] == 137
+    assert find_restart(tmp_path / "run").name == "d3dump01"
+
+    monkeypatch.delenv("BL_FAKE_KILL")
+    res = kf.solve(
+        tmp_path / "run", solver=solver, NCPU=1, restart=1, restart_deck="*CONTROL_TERMINATION"
+    )
+    assert res["returncode"] == 0 and res["restarted_from"] == "d3dump01"
+    d3hsp = (tmp_path / "run" / "d3hsp").read_text()
+    assert "restart from d3dump01 at state 2" in d3hsp and "N o r m a l" in d3hsp
+    _deck = (tmp_path / "run" / "bl_restart.k").read_text()
+    assert _deck == "*KEYWORD\n*CONTROL_TERMINATION\n*END\n"
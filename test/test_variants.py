@@ -0,0 +1,46 @@
+import os, pathlib, sys
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_keyfile
+
+DECK = pathlib.Path(__file__).with_name("merge_small.k")
+
+
+@pytest.fixture
+def kf(tmp_path):
+    path = tmp_path / "Small.k"
+    _params = "*PARAMETER\nR T1             1.0\nI N1               2\n"
+    _text = DECK.read_text().replace("*KEYWORD\n", "*KEYWORD\n" + _params, 1)
+    path.write_text(_text)
+    return bl_keyfile(str(path), show_pbar=0)
+
+
+def test_param_variants_roundtrip(kf, tmp_path):
+    sets = {"a": {"T1": 2.5, "n1": 3}, "b": {"t1": 0.5}}
+    masters = kf.save_param_variants(sets, tmp_path / "doe")
+    body = tmp_path / "doe" / "Small_body.k"
+    assert [m.name for m in masters] == ["Small_a.k", "Small_b.k"]
+    assert body.exists()
+
+    for m, want in zip(masters, [{"T1": 2.5, "N1": 3.0}, {"T1": 0.5, "N1": 2.0}]):
+        var = bl_keyfile(str(m), show_pbar=0)
+        # *PARAMETER_DUPLICATION 取首个定义, 主文件在包含文件之前
+        _p = var.parameters.drop_duplicates("names").set_index("names")
+        assert {k: _p.loc[k, "vals_n"] for k in want} == want
+        assert _p.loc["N1", "type"] == "I"
+        assert len(var.keywords["*NODE"]) == len(kf.keywords["*NODE"])
+        assert len(var.keywords["*ELEMENT_SHELL"]) == len(kf.keywords["*ELEMENT_SHELL"])
+
+    # 模型未改动时复用主体文件, 改动后重写
+    os.utime(body, ns=(0, 0))
+    kf.save_param_variants(sets, tmp_path / "doe")
+    assert body.stat().st_mtime_ns == 0
+    kf.keywords["*NODE"]["obj"].iloc[0].x = 0.25
+    kf.save_param_variants(sets, tmp_path / "doe")
+    assert body.stat().st_mtime_ns != 0
+    var = bl_keyfile(str(masters[0]), show_pbar=0)
+    assert var.keywords["*NODE"]["x"].iloc[0] == 0.25
+
+    with pytest.raises(KeyError):
+        kf.save_param_variants({"c": {"T9": 1.0}}, tmp_path / "doe")
@@ -0,0 +1,64 @@
+import pathlib, sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from bl_dyna import bl_keyfile, open_kf
+
+HERE = pathlib.Path(__file__).parent
+
+
+def write_deck(path):
+    rng = np.random.default_rng(0)
+    _v = np.concatenate(
+        [rng.normal(0, 10, 300), 10.0 ** rng.integers(-12, 14, 147), [0.0, -0.0, 0.1]]
+    )
+    lines = ["*KEYWORD\n", "*NODE\n"]
+    for i, x in enumerate(_v.reshape(-1, 3), 1):
+        lines.append(f"{i:8d}{x[0]:16.9g}{x[1]:16.9g}{-x[2]:16.9g}\n")
+    lines.append("*ELEMENT_SOLID\n")
+    for i in range(1, 31):
+        lines.append(f"{i:8d}{3:8d}" + "".join(f"{(i + j) % 150 + 1:8d}" for j in range(8)) + "\n")
+    lines.append("*ELEMENT_BEAM\n")
+    for i in range(1, 31):
+        lines.append(f"{1000 + i:8d}{4:8d}{i:8d}{i + 1:8d}{i + 2:8d}\n")
+    lines.append("*END\n")
+    path.write_text("".join(lines))
+    return path
+
+
+@pytest.mark.parametrize("name", ["roof_crush_impactor_03_pos.k", "merge_small.k", "mixed.k"])
+def test_vec_write_matches_cached_strings(name, tmp_path):
+    deck = write_deck(tmp_path / name) if name == "mixed.k" else HERE / name
+    kf = bl_keyfile(str(deck), show_pbar=0)
+    _a = kf.save_kf(tmp_path / "a.k", vec_write=0).read_bytes()
+    _b = kf.save_kf(tmp_path / "b.k", vec_write=1).read_bytes()
+    assert _a == _b
+
+    kf.morph_nodes(kf.keywords["*NODE"]["id"].iloc[::3], [1e-7, -3.5, 12345.678])
+    _a = kf.save_kf(tmp_path / "c.k", vec_write=0).read_bytes()
+    _b = kf.save_kf(tmp_path / "d.k", vec_write=1).read_bytes()
+    assert _a == _b
+    again = bl_keyfile(str(tmp_path / "d.k"), show_pbar=0).keywords["*NODE"]
+    _xyz = kf.keywords["*NODE"][["x", "y", "z"]].to_numpy()
+    assert np.allclose(again[["x", "y", "z"]].to_numpy(), _xyz, rtol=1e-6, atol=1e-6)
+
+
+@pytest.mark.parametrize("compress", ["gz", "zst"])
+def test_compressed_save_reads_back(compress, tmp_path):
+    if compress == "zst":
+        pytest.importorskip("zstandard")
+    kf = bl_keyfile(str(HERE / "roof_crush_impactor_03_pos.k"), show_pbar=0)
+    plain = kf.save_kf(tmp_path / "plain.k")
+    packed = kf.save_kf(tmp_path / "packed.k", compress=compress)
+    assert packed.name == f"packed.k.{compress}"
+    assert packed.stat().st_size < plain.stat().st_size / 2
+    with open_kf(packed) as file:
+        assert file.read() == plain.read_text("utf-8")
+
+    # 压缩的主文件与包含文件均可直接读取
+    want = bl_keyfile(str(plain), show_pbar=0).save_kf(tmp_path / "want.k").read_bytes()
+    (tmp_path / "master.k").write_text(f"*KEYWORD\n*INCLUDE\n{packed.name}\n*END\n")
+    for path in [packed, tmp_path / "master.k"]:
+        again = bl_keyfile(str(path), show_pbar=0)
+        assert again.save_kf(tmp_path / "again.k").read_bytes() == want